@@ -0,0 +1,800 @@
+"""Modo assíncrono (ASGI) com as mesmas rotas e respostas do app Flask.
+
+    hypercorn asgi:app --workers 1 --bind 0.0.0.0:8000
+
+Postgres via psycopg 3 (AsyncConnectionPool), login via httpx; a verificação de
+token do Firebase Admin, que é bloqueante, roda numa thread apenas em cache miss.
+"""
+import asyncio
+import contextlib
+import functools
+import os
+import time
+
+from firebase_admin import auth
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from quart import Quart, Response, g, jsonify, request
+
+import app as wsgi
+from db_pool import PoolTimeout as SyncPoolTimeout
+from identity_client import AsyncIdentityToolkitClient, CircuitOpen
+import playback_progress
+from playback_progress import ProgressError
+import playlists
+from playlists import PlaylistError
+import recommendations
+import rollups
+from recommendations import RecommendationsUnavailable
+from responses import EncodedBody, conditional, content_etag, dumps, etag_matches, not_modified
+from search import SearchError, build_search_query, parse_search_params, search_key
+import search_index
+from singleflight import AsyncSingleFlight, SingleFlightTimeout
+
+app = Quart(__name__)
+
+def async_pool(host=None, port=None, min_size=int(os.getenv("DB_POOL_MIN", 1)),
+               timeout=float(os.getenv("DB_POOL_TIMEOUT", 5))):
+    return AsyncConnectionPool(
+        conninfo='',
+        kwargs={
+            'host': host or os.getenv("DB_HOST"),
+            'dbname': os.getenv("DB_NAME"),
+            'user': os.getenv("DB_USER"),
+            'password': os.getenv("DB_PASSWORD"),
+            'port': port or os.getenv("DB_PORT")
+        },
+        min_size=min_size,
+        max_size=int(os.getenv("DB_POOL_MAX", 10)),
+        timeout=timeout,
+        max_idle=float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+        check=AsyncConnectionPool.check_connection,
+        open=False
+    )
+
+
+db_pool = async_pool()
+# Um pool assíncrono por réplica; escolha, saúde e read-your-writes ficam com wsgi.db_router.
+replica_pools = {
+    replica.name: async_pool(host, port, min_size=0, timeout=float(os.getenv("DB_REPLICA_POOL_TIMEOUT", 1)))
+    for replica, (host, port) in zip(wsgi.db_router.replicas, wsgi.DB_REPLICAS)
+}
+
+identity_client = None
+sampler_lock = asyncio.Lock()
+# Mesmo contador do app Flask em /metrics; as esperas ficam no event loop.
+leituras = AsyncSingleFlight(timeout=wsgi.LEITURA_ESPERA_MAX, counter=wsgi.leituras_coalescidas)
+
+
+@app.before_serving
+async def startup():
+    global identity_client
+    await db_pool.open()
+    for pool in replica_pools.values():
+        await pool.open()
+    identity_client = AsyncIdentityToolkitClient(
+        os.getenv("IDENTITY_TOOLKIT_URL", "https://identitytoolkit.googleapis.com/v1"),
+        wsgi.FIREBASE_WEB_API_KEY,
+        pool_size=int(os.getenv("IDENTITY_TOOLKIT_POOL_SIZE", 10)),
+        connect_timeout=float(os.getenv("IDENTITY_TOOLKIT_CONNECT_TIMEOUT", 3.05)),
+        read_timeout=float(os.getenv("IDENTITY_TOOLKIT_READ_TIMEOUT", 10)),
+        retries=int(os.getenv("IDENTITY_TOOLKIT_RETRIES", 2)),
+        failure_threshold=int(os.getenv("IDENTITY_TOOLKIT_FAILURE_THRESHOLD", 5)),
+        reset_timeout=float(os.getenv("IDENTITY_TOOLKIT_RESET_TIMEOUT", 30))
+    )
+    wsgi.start_catalog_listener()
+
+
+@app.after_serving
+async def shutdown():
+    await identity_client.aclose()
+    await db_pool.close()
+    for pool in replica_pools.values():
+        await pool.close()
+
+
+@contextlib.asynccontextmanager
+async def read_connection(user=None):
+    # Mesma política de DbRouter.read, com os pools assíncronos.
+    router = wsgi.db_router
+    replica = router.choose(user)
+    conn = None
+    if replica is not None:
+        pool = replica_pools[replica.name]
+        try:
+            conn = await pool.getconn()
+        except PoolTimeout:
+            router.abandon(replica, failed=False)
+            replica = None
+        except Exception:
+            router.abandon(replica, failed=True)
+            replica = None
+    if replica is None:
+        async with db_pool.connection() as conn:
+            yield conn
+        return
+
+    try:
+        yield conn
+    except Exception:
+        if conn.closed:
+            router.report_failure(replica)
+        raise
+    finally:
+        if not conn.closed:
+            await conn.rollback()
+        await pool.putconn(conn)
+        router.release(replica)
+
+
+async def fetch(query, params=None, row_factory=None, user=None, primary=False):
+    async with (db_pool.connection() if primary else read_connection(user)) as conn:
+        async with conn.cursor(row_factory=row_factory) as cur:
+            await cur.execute(query, params)
+            return await cur.fetchall()
+
+
+async def verify_firebase_token(auth_header):
+    token = wsgi.extract_bearer_token(auth_header)
+    decoded_token = wsgi.token_cache.lookup(token)
+    if decoded_token is None:
+        decoded_token = await asyncio.to_thread(wsgi.token_cache.verify, token)
+    return decoded_token.get('uid')
+
+
+def tratar_erros(handler):
+    # Mesmo mapeamento de exceções das rotas autenticadas do app Flask.
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await handler(*args, **kwargs)
+        except ValueError as ve:
+            return jsonify({'message': str(ve)}), 401
+        except auth.InvalidIdTokenError:
+            return jsonify({'message': 'Token de autenticação inválido.'}), 401
+        # SyncPoolTimeout: pool psycopg2 dos helpers do app Flask chamados em threads.
+        except (PoolTimeout, SyncPoolTimeout, SingleFlightTimeout) as pt:
+            return jsonify({'message': str(pt)}), 503
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    return wrapper
+
+
+def send_encoded(entry):
+    if_none_match = request.headers.get('If-None-Match') if request.method in ('GET', 'HEAD') else None
+    status, body, headers = conditional(entry, if_none_match, request.headers.get('Accept-Encoding'),
+                                        wsgi.RESPOSTA_COMPRIMIR_MIN)
+    return Response(body, status=status, headers=headers, mimetype='application/json')
+
+
+def send_not_modified(etag):
+    status, body, headers = not_modified(etag)
+    return Response(body, status=status, headers=headers)
+
+
+def send_detalhes(body, etag):
+    if etag is None:
+        return send_encoded(EncodedBody(body, content_etag(body)))
+    entry = EncodedBody(body, etag)
+    wsgi.response_cache.set(entry)
+    return send_encoded(entry)
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+async def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule is not None else 'nao_mapeada'
+    started = g.pop('request_started', None)
+    if started is not None:
+        wsgi.http_latency.observe(time.perf_counter() - started, route, request.method)
+    wsgi.http_requests.inc(route, request.method, str(response.status_code))
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics_endpoint():
+    return Response(wsgi.metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/')
+async def index():
+    return "API rodando"
+
+
+@app.route('/status/pool', methods=['GET'])
+async def status_pool():
+    return jsonify(db_pool.get_stats()), 200
+
+
+@app.route('/status/replicas', methods=['GET'])
+async def status_replicas():
+    return jsonify(wsgi.db_router.stats()), 200
+
+
+@app.route('/status/token_cache', methods=['GET'])
+async def status_token_cache():
+    return jsonify(wsgi.token_cache.stats()), 200
+
+
+@app.route('/status/reproducao', methods=['GET'])
+async def status_reproducao():
+    stats = wsgi.playback_ingestor.stats()
+    stats['modo'] = wsgi.REPRODUCAO_MODO
+    return jsonify(stats), 200
+
+
+@app.route('/status/progresso', methods=['GET'])
+async def status_progresso():
+    return jsonify(wsgi.progress_coalescer.stats()), 200
+
+
+@app.route('/status/recomendacoes', methods=['GET'])
+async def status_recomendacoes():
+    return jsonify(await asyncio.to_thread(wsgi.recomendacoes.stats)), 200
+
+
+@app.route('/status/trending', methods=['GET'])
+async def status_trending():
+    stats = wsgi.rankings.stats()
+    stats['contagens'] = wsgi.play_rollup.stats()
+    return jsonify(stats), 200
+
+
+@app.route('/status/particoes', methods=['GET'])
+async def status_particoes():
+    return jsonify(wsgi.reproducao_particoes.stats()), 200
+
+
+@app.route('/status/busca', methods=['GET'])
+async def status_busca():
+    stats = wsgi.busca_index.stats()
+    stats['modo'] = wsgi.BUSCA_MODO
+    return jsonify(stats), 200
+
+
+@app.route('/status/leituras', methods=['GET'])
+async def status_leituras():
+    return jsonify(leituras.stats()), 200
+
+
+@app.route('/status/login', methods=['GET'])
+async def status_login():
+    return jsonify(identity_client.stats()), 200
+
+
+@app.route('/status/catalogo', methods=['GET'])
+async def status_catalogo():
+    stats = wsgi.catalog_snapshot.stats()
+    stats['ativo'] = wsgi.CATALOGO_SNAPSHOT
+    return jsonify(stats), 200
+
+
+@app.route('/status/respostas', methods=['GET'])
+async def status_respostas():
+    stats = wsgi.response_cache.stats()
+    stats['versoes_ativas'] = wsgi.catalog_listener.connected
+    return jsonify(stats), 200
+
+
+@app.route('/status/title_cache', methods=['GET'])
+async def status_title_cache():
+    stats = wsgi.title_cache.stats()
+    stats['listener'] = wsgi.catalog_listener.stats()
+    return jsonify(stats), 200
+
+
+@app.route('/signup', methods=['POST'])
+async def signup():
+    data = await request.get_json(silent=True)
+
+    if not data or 'email' not in data or 'senha' not in data or 'nome' not in data:
+        return jsonify({'message': 'Nome, email e senha são obrigatórios!'}), 400
+
+    try:
+        await asyncio.to_thread(wsgi.init_firebase)
+        user = await asyncio.to_thread(
+            auth.create_user,
+            email=data['email'],
+            password=data['senha'],
+            display_name=data['nome']
+        )
+        custom_token = await asyncio.to_thread(auth.create_custom_token, user.uid)
+
+        async with db_pool.connection() as conn:
+            await conn.execute(
+                "INSERT INTO sys_usuario (usu_no_nome, usu_no_email, usu_in_status) VALUES (%s, %s, 'A')",
+                (data['nome'], data['email'])
+            )
+
+        return jsonify({'token': custom_token.decode('utf-8')}), 201
+    except PoolTimeout as pt:
+        return jsonify({'message': str(pt)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/login', methods=['POST'])
+async def login():
+    data = await request.get_json(silent=True)
+
+    if not data or 'email' not in data or 'senha' not in data:
+        return jsonify({'message': 'Email e senha são obrigatórios!'}), 400
+
+    try:
+        r = await identity_client.sign_in_with_password(data['email'], data['senha'])
+
+        if r.status_code == 200:
+            return jsonify({'token': r.json()['idToken']}), 200
+        else:
+            return jsonify(r.json()), r.status_code
+    except CircuitOpen as co:
+        return jsonify({'message': str(co)}), 503
+    except identity_client._httpx.TimeoutException:
+        return jsonify({'message': 'Tempo esgotado aguardando o serviço de autenticação.'}), 504
+    except identity_client._httpx.TransportError:
+        return jsonify({'message': 'Serviço de autenticação indisponível.'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/catalogo', methods=['GET'])
+@tratar_erros
+async def catalog():
+    user_id = await verify_firebase_token(request.headers.get('Authorization'))
+
+    seed = request.args.get('seed')
+    pagina = request.args.get('pagina', 0, type=int)
+    if seed is not None:
+        seed = f'{user_id}:{seed}'
+
+    sampler = wsgi.catalog_sampler
+    snapshot = wsgi.current_catalog()
+    if sampler.needs_refresh():
+        async with sampler_lock:
+            if sampler.needs_refresh():
+                if snapshot is not None:
+                    sampler.refresh(list(snapshot.ids))
+                else:
+                    rows = await fetch("SELECT vol_co_volume FROM sys_volumes WHERE vol_in_status = 'A'")
+                    sampler.refresh([row[0] for row in rows])
+    # Do array já carregado: uma invalidação depois do needs_refresh() faria sample()
+    # recarregar com psycopg2, bloqueando o event loop.
+    ids = sampler.sample_from(sampler.current(), wsgi.CATALOGO_TAMANHO, seed=seed, page=max(pagina, 0))
+    if not ids:
+        return jsonify([]), 200
+
+    if snapshot is not None:
+        catalog_items = {i: snapshot.get(i) for i in ids if i in snapshot.index}
+    else:
+        rows = await fetch("""
+            SELECT vol_co_volume, vol_no_volume, vol_tx_small_descricao
+            FROM sys_volumes
+            WHERE vol_co_volume = ANY(%s) AND vol_in_status = 'A'
+        """, (ids,), row_factory=dict_row)
+        catalog_items = {item['vol_co_volume']: item for item in rows}
+
+    result = [{'titulo': catalog_items[i]['vol_no_volume'], 'descricao': catalog_items[i]['vol_tx_small_descricao']}
+              for i in ids if i in catalog_items]
+    return jsonify(result), 200
+
+
+@app.route('/detalhes/<int:codigo_titulo>', methods=['GET'])
+@tratar_erros
+async def detalhes_titulo(codigo_titulo):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    etag = wsgi.catalog_versions.etag(codigo_titulo) if wsgi.catalog_listener.connected else None
+    if etag is not None:
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return send_not_modified(etag)
+        entry = wsgi.response_cache.get(etag)
+        if entry is not None:
+            return send_encoded(entry)
+
+    cached = wsgi.title_cache.get(codigo_titulo)
+    if cached is not None:
+        return send_detalhes(cached, etag)
+
+    generation = wsgi.title_cache.generation()
+    body = await leituras.do('detalhes', (codigo_titulo, generation), lambda: load_detalhes_body(codigo_titulo, generation))
+    if body is not None:
+        return send_detalhes(body, etag)
+    return jsonify({'message': 'Título não encontrado ou inativo.'}), 404
+
+
+async def load_detalhes_body(codigo_titulo, generation):
+    snapshot = wsgi.current_catalog()
+    if snapshot is not None:
+        detalhes = snapshot.get(codigo_titulo)
+    else:
+        rows = await fetch("""
+            SELECT vol_no_volume, vol_tx_sinopse, vol_tx_elenco, vol_tx_diretor,
+                   vol_av_avaliacao, vol_tp_genero, vol_nu_classificacao
+            FROM sys_volumes
+            WHERE vol_co_volume = %s AND vol_in_status = 'A'
+        """, (codigo_titulo,), row_factory=dict_row, primary=True)
+        detalhes = rows[0] if rows else None
+
+    if not detalhes:
+        return None
+    body = dumps(wsgi.serialize_detalhes(detalhes))
+    wsgi.title_cache.set(codigo_titulo, body, generation=generation)
+    return body
+
+
+@app.route('/detalhes/lote', methods=['POST'])
+@tratar_erros
+async def detalhes_lote():
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    ids, erro = wsgi.validate_lote_ids(await request.get_json(silent=True))
+    if erro:
+        return jsonify({'message': erro}), 400
+
+    corpos = {}
+    pendentes = []
+    for codigo in ids:
+        cached = wsgi.title_cache.get(codigo)
+        if cached is not None:
+            corpos[codigo] = cached
+        else:
+            pendentes.append(codigo)
+
+    inativos = []
+    if pendentes:
+        generation = wsgi.title_cache.generation()
+        snapshot = wsgi.current_catalog()
+        if snapshot is not None:
+            rows = wsgi.snapshot_lote_rows(snapshot, pendentes)
+        else:
+            rows = await fetch("""
+                SELECT vol_co_volume, vol_in_status, vol_no_volume, vol_tx_sinopse, vol_tx_elenco,
+                       vol_tx_diretor, vol_av_avaliacao, vol_tp_genero, vol_nu_classificacao
+                FROM sys_volumes
+                WHERE vol_co_volume = ANY(%s)
+            """, (pendentes,), row_factory=dict_row, primary=True)
+        for detalhes in rows:
+            if detalhes['vol_in_status'] != 'A':
+                inativos.append(detalhes['vol_co_volume'])
+                continue
+            body = dumps(wsgi.serialize_detalhes(detalhes))
+            wsgi.title_cache.set(detalhes['vol_co_volume'], body, generation=generation)
+            corpos[detalhes['vol_co_volume']] = body
+
+    body = wsgi.detalhes_lote_body(ids, corpos, inativos)
+    return send_encoded(EncodedBody(body, content_etag(body)))
+
+
+@app.route('/historico/<int:usu_co_usuario>', methods=['GET'])
+@tratar_erros
+async def historico_visualizacao(usu_co_usuario):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    apos = None
+    if request.args.get('cursor'):
+        apos = wsgi.decode_cursor(request.args['cursor'])
+        if apos is None:
+            return jsonify({'message': 'Cursor inválido.'}), 400
+
+    if request.args.get('formato') == 'ndjson':
+        return Response(exportar_historico(usu_co_usuario, apos), mimetype='application/x-ndjson')
+
+    limite = request.args.get('limite', wsgi.HISTORICO_LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > wsgi.HISTORICO_LIMITE_MAX:
+        return jsonify({'message': f'O limite deve estar entre 1 e {wsgi.HISTORICO_LIMITE_MAX}.'}), 400
+
+    etag = wsgi.historico_versions.etag(usu_co_usuario, apos, limite) if wsgi.catalog_listener.connected else None
+    if etag is not None:
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return send_not_modified(etag)
+        entry = wsgi.response_cache.get(etag)
+        if entry is not None:
+            return send_encoded(entry)
+
+    historico_items = await fetch(wsgi.HISTORICO_SQL + 'LIMIT %(limite)s',
+                                  {**wsgi.historico_params(usu_co_usuario, apos), 'limite': limite + 1},
+                                  row_factory=dict_row, user=usu_co_usuario, primary=etag is not None)
+
+    body = dumps([wsgi.serialize_historico(item) for item in historico_items[:limite]])
+    headers = {}
+    if len(historico_items) > limite:
+        headers['X-Proximo-Cursor'] = wsgi.encode_cursor(historico_items[limite - 1])
+    entry = EncodedBody(body, etag or content_etag(body), headers)
+    if etag is not None:
+        wsgi.response_cache.set(entry)
+    return send_encoded(entry)
+
+
+async def exportar_historico(usu_co_usuario, apos=None):
+    async with read_connection(usu_co_usuario) as conn:
+        async with conn.cursor(name='historico_export', row_factory=dict_row) as cur:
+            cur.itersize = wsgi.HISTORICO_EXPORT_ITERSIZE
+            await cur.execute(wsgi.HISTORICO_SQL, wsgi.historico_params(usu_co_usuario, apos))
+            async for item in cur:
+                yield dumps(wsgi.serialize_historico(item)) + b'\n'
+
+
+@app.route('/reproducao', methods=['POST'])
+@tratar_erros
+async def registrar_reproducao():
+    data = await request.get_json(silent=True)
+
+    if not data or 'user_id' not in data or 'titulo_id' not in data:
+        return jsonify({'message': 'ID do usuário e ID do título são obrigatórios!'}), 400
+    try:
+        ep_temp = playback_progress.parse_ep_temp(data.get('ep_temp'))
+    except ProgressError as pe:
+        return jsonify({'message': str(pe)}), 400
+
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    if wsgi.REPRODUCAO_MODO == 'async':
+        return await enfileirar_reproducao(data, ep_temp)
+
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT COUNT(*) FROM sys_usuario WHERE usu_co_usuario = %s", (data['user_id'],))
+            user_count = (await cur.fetchone())[0]
+            await cur.execute("SELECT COUNT(*) FROM sys_volumes WHERE vol_co_volume = %s", (data['titulo_id'],))
+            titulo_count = (await cur.fetchone())[0]
+
+            if user_count == 0 or titulo_count == 0:
+                return jsonify({'message': 'Usuário ou título não encontrado.'}), 404
+
+            await cur.execute("""
+                INSERT INTO sys_volumes_reproducao (volr_no_titulo, usu_co_usuario, volr_co_volume, volr_tp_volume, volr_ep_temp)
+                VALUES (
+                    (SELECT vol_no_volume FROM sys_volumes WHERE vol_co_volume = %s),
+                    %s, %s, (SELECT vol_tp_volume FROM sys_volumes WHERE vol_co_volume = %s), %s
+                )
+            """, (data['titulo_id'], data['user_id'], data['titulo_id'], data['titulo_id'], ep_temp))
+    wsgi.db_router.mark_write(data['user_id'])
+    wsgi.play_rollup.start()
+    wsgi.play_rollup.add(data['titulo_id'])
+    wsgi.reproducao_particoes.start()
+
+    return jsonify({'message': 'Reprodução registrada com sucesso!'}), 201
+
+
+async def enfileirar_reproducao(data, ep_temp=None):
+    # KnownIds e o spool usam I/O bloqueante (banco em cache miss, fsync): ficam numa thread.
+    volume = await asyncio.to_thread(wsgi.known_ids.volume, data['titulo_id'])
+    if volume is None or not await asyncio.to_thread(wsgi.known_ids.has_user, data['user_id']):
+        return jsonify({'message': 'Usuário ou título não encontrado.'}), 404
+
+    ingestor = wsgi.playback_ingestor
+    ingestor.start()
+    wsgi.reproducao_particoes.start()
+    try:
+        await asyncio.to_thread(ingestor.submit, data['user_id'], data['titulo_id'], volume[0], volume[1], ep_temp)
+    except wsgi.QueueFull as qf:
+        response = jsonify({'message': str(qf)})
+        response.headers['Retry-After'] = str(max(1, int(ingestor.flush_interval)))
+        return response, 503
+    wsgi.play_rollup.start()
+    wsgi.play_rollup.add(data['titulo_id'])
+    wsgi.db_router.mark_write(data['user_id'])
+    return jsonify({'message': 'Reprodução recebida e será registrada em instantes.'}), 202
+
+
+@app.route('/progresso', methods=['POST'])
+@tratar_erros
+async def registrar_progresso():
+    try:
+        progresso = playback_progress.parse_progresso(await request.get_json(silent=True))
+    except ProgressError as pe:
+        return jsonify({'message': str(pe)}), 400
+
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    volume = await asyncio.to_thread(wsgi.known_ids.volume, progresso['titulo_id'])
+    if volume is None or not await asyncio.to_thread(wsgi.known_ids.has_user, progresso['user_id']):
+        return jsonify({'message': 'Usuário ou título não encontrado.'}), 404
+
+    coalescer = wsgi.progress_coalescer
+    coalescer.start()
+    try:
+        # Só memória: não precisa de thread.
+        coalescer.submit(progresso['user_id'], progresso['titulo_id'], volume[0], volume[1], progresso['posicao'],
+                         progresso['duracao'], progresso['ep_temp'], progresso['concluido'])
+    except wsgi.QueueFull as qf:
+        response = jsonify({'message': str(qf)})
+        response.headers['Retry-After'] = str(max(1, int(coalescer.flush_interval)))
+        return response, 503
+    return '', 204
+
+
+@app.route('/continuar/<int:usu_co_usuario>', methods=['GET'])
+@tratar_erros
+async def continuar_assistindo(usu_co_usuario):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    limite = request.args.get('limite', playback_progress.CONTINUAR_LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > playback_progress.CONTINUAR_LIMITE_MAX:
+        return jsonify({'message': f'O limite deve estar entre 1 e {playback_progress.CONTINUAR_LIMITE_MAX}.'}), 400
+
+    pendentes = wsgi.progress_coalescer.pending(usu_co_usuario)
+    rows = await fetch(playback_progress.CONTINUAR_SQL, (usu_co_usuario, limite + len(pendentes)), row_factory=dict_row,
+                       user=usu_co_usuario)
+    itens = playback_progress.merge_continuar(rows, pendentes, limite)
+    return jsonify([playback_progress.serialize_continuar(item) for item in itens]), 200
+
+
+@app.route('/catalogo/trending', methods=['GET'])
+@tratar_erros
+async def catalogo_trending():
+    return await send_ranking('trending')
+
+
+@app.route('/catalogo/top', methods=['GET'])
+@tratar_erros
+async def catalogo_top():
+    return await send_ranking('top')
+
+
+async def send_ranking(lista):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    limite = request.args.get('limite', rollups.TRENDING_LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > rollups.TRENDING_LIMITE_MAX:
+        return jsonify({'message': f'O limite deve estar entre 1 e {rollups.TRENDING_LIMITE_MAX}.'}), 400
+
+    if not wsgi.rankings.ready():
+        await asyncio.to_thread(wsgi.rankings.refresh)
+    return send_encoded(wsgi.rankings.current().body(lista, request.args.get('genero'), limite))
+
+
+async def load_recommended_rows(ids):
+    rows = wsgi.snapshot_volume_rows(ids)
+    if rows is not None or not ids:
+        return rows or {}
+    rows = await fetch(recommendations.HIDRATAR_SQL, (list(ids),), row_factory=dict_row)
+    return {row['vol_co_volume']: row for row in rows}
+
+
+@app.route('/recomendacoes/<int:usu_co_usuario>', methods=['GET'])
+@tratar_erros
+async def recomendacoes_usuario(usu_co_usuario):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    limite = request.args.get('limite', recommendations.RECOMENDACOES_LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > recommendations.RECOMENDACOES_LIMITE_MAX:
+        return jsonify({'message': f'O limite deve estar entre 1 e {recommendations.RECOMENDACOES_LIMITE_MAX}.'}), 400
+
+    recentes = await fetch(recommendations.SEMENTES_SQL, (usu_co_usuario, wsgi.RECOMENDACOES_JANELA),
+                           user=usu_co_usuario)
+    sementes = recommendations.seeds(recentes, wsgi.RECOMENDACOES_SEMENTES)
+    try:
+        # A primeira consulta abre o .npy (np.load): fora do event loop.
+        vizinhos = await asyncio.to_thread(lambda: {semente: wsgi.recomendacoes.neighbors(semente) for semente in sementes})
+    except RecommendationsUnavailable as ru:
+        return jsonify({'message': str(ru)}), 503
+    rows = await load_recommended_rows({volume for lista in vizinhos.values() for volume, _ in lista})
+    grupos = recommendations.group(sementes, vizinhos, rows, limite, [row[0] for row in recentes])
+    return jsonify(wsgi.serialize_recomendacoes(sementes, grupos, rows)), 200
+
+
+@app.route('/recomendacoes/titulo/<int:codigo_titulo>', methods=['GET'])
+@tratar_erros
+async def recomendacoes_titulo(codigo_titulo):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    limite = request.args.get('limite', recommendations.RECOMENDACOES_LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > recommendations.RECOMENDACOES_LIMITE_MAX:
+        return jsonify({'message': f'O limite deve estar entre 1 e {recommendations.RECOMENDACOES_LIMITE_MAX}.'}), 400
+
+    try:
+        vizinhos = await asyncio.to_thread(wsgi.recomendacoes.neighbors, codigo_titulo)
+    except RecommendationsUnavailable as ru:
+        return jsonify({'message': str(ru)}), 503
+    rows = await load_recommended_rows({volume for volume, _ in vizinhos})
+    titulos = [(volume, score) for volume, score in vizinhos if volume in rows][:limite]
+    return jsonify([recommendations.serialize_titulo(rows[volume], score) for volume, score in titulos]), 200
+
+
+@app.route('/busca', methods=['POST'])
+@tratar_erros
+async def buscar_titulos():
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    try:
+        params = parse_search_params(await request.get_json(silent=True))
+    except SearchError as se:
+        return jsonify({'message': str(se)}), 400
+
+    if wsgi.BUSCA_MODO == 'memoria':
+        index = wsgi.busca_index
+        index.start()
+        if not index.ready():
+            await asyncio.to_thread(index.refresh)
+        geracao, titulos = index.search(params)
+        result = [{'titulo': titulo[search_index.NOME], 'descricao': titulo[search_index.DESCRICAO]} for titulo in titulos]
+        response = jsonify(result)
+        response.headers['X-Indice-Geracao'] = str(geracao)
+        return response, 200
+
+    result = await leituras.do('busca', search_key(params), lambda: buscar_no_banco(params))
+    return jsonify(result), 200
+
+
+async def buscar_no_banco(params):
+    query, sql_params = build_search_query(params)
+    titulos = await fetch(query, sql_params, row_factory=dict_row)
+    return [{'titulo': titulo['vol_no_volume'], 'descricao': titulo['vol_tx_small_descricao']} for titulo in titulos]
+
+
+@app.route('/lista_reproducao', methods=['POST'])
+@tratar_erros
+async def criar_lista_reproducao():
+    data = await request.get_json(silent=True)
+
+    if not data or 'user_id' not in data or 'nome_lista' not in data or 'codigos_volumes' not in data:
+        return jsonify({'message': 'Token, ID do usuário, nome da lista e códigos dos volumes são obrigatórios!'}), 400
+
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    async with db_pool.connection() as conn:
+        await conn.execute("""
+            INSERT INTO sys_lista_reproducao (usu_co_usuario, vol_co_volume, lrep_no_lista, lrep_in_status)
+            VALUES (%s, %s, %s, 'A')
+        """, (data['user_id'], data['codigos_volumes'], data['nome_lista']))
+    wsgi.db_router.mark_write(data['user_id'])
+
+    return jsonify({'message': 'Lista de reprodução criada com sucesso!'}), 201
+
+
+@app.route('/lista_reproducao/<int:lrep_co_lista>', methods=['GET'])
+@tratar_erros
+async def ler_lista_reproducao(lrep_co_lista):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    try:
+        usuario = playlists.parse_usuario(request.args.get('user_id'))
+    except PlaylistError as pe:
+        return jsonify({'message': str(pe)}), 400
+
+    rows = await fetch(playlists.LISTA_HIDRATADA_SQL, {'lista': lrep_co_lista, 'usuario': usuario}, row_factory=dict_row,
+                       user=usuario)
+    if not rows:
+        return jsonify({'message': 'Lista de reprodução não encontrada.'}), 404
+    return jsonify(playlists.serialize_lista(rows)), 200
+
+
+@app.route('/listas_reproducao/<int:usu_co_usuario>', methods=['GET'])
+@tratar_erros
+async def listas_do_usuario(usu_co_usuario):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    contem = request.args.get('contem', type=int)
+    query = playlists.LISTAS_CONTENDO_SQL if contem is not None else playlists.LISTAS_USUARIO_SQL
+    listas = await fetch(query, {'usuario': usu_co_usuario, 'contem': contem}, row_factory=dict_row, user=usu_co_usuario)
+    return jsonify([playlists.serialize_resumo(lista) for lista in listas]), 200
+
+
+@app.route('/lista_reproducao/<int:lrep_co_lista>/volumes', methods=['POST', 'PUT', 'DELETE'])
+@tratar_erros
+async def alterar_lista_reproducao(lrep_co_lista):
+    await verify_firebase_token(request.headers.get('Authorization'))
+
+    try:
+        usuario, codigos = playlists.parse_alteracao(await request.get_json(silent=True))
+    except PlaylistError as pe:
+        return jsonify({'message': str(pe)}), 400
+
+    params = {'lista': lrep_co_lista, 'usuario': usuario, 'codigos': codigos, 'codigo': codigos[0]}
+    async with db_pool.connection() as conn:
+        row = await (await conn.execute(wsgi.lista_update_sql(request.method, codigos), params)).fetchone()
+        existe = row is not None
+        if not existe and request.method in ('POST', 'PUT'):
+            existe = await (await conn.execute(playlists.LISTA_EXISTE_SQL, params)).fetchone() is not None
+    wsgi.db_router.mark_write(usuario)
+
+    if row is None:
+        if existe:
+            return jsonify({'message': playlists.conflito(request.method)}), 409
+        return jsonify({'message': 'Lista de reprodução não encontrada.'}), 404
+    return jsonify({'lrep_co_lista': lrep_co_lista, 'codigos_volumes': row[0]}), 200
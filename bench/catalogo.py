@@ -0,0 +1,136 @@
+"""Vazão da importação e exportação do catálogo com um arquivo sintético.
+
+    python -m bench.catalogo --titulos 1000000
+    python -m bench.catalogo --formato ndjson --saida bench/catalogo.json
+
+Usa as mesmas variáveis DB_* do app e grava em sys_volumes a partir do código
+--inicio; ao final remove os títulos criados (a menos de --manter), o que
+exige um usuário superusuário: aponte para um banco descartável. Mede a
+carga inicial, uma recarga idêntica (nenhuma linha muda), uma exportação e
+o pico de memória do processo, que não deve crescer com --titulos.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import tempfile
+import time
+
+from app import Volume, connect_to_db
+from bench.seed import gerar_volumes
+from catalog_io import CARGA_EM_MASSA_SQL, export_catalog, fields_from_table, import_catalog
+from responses import dumps
+
+
+def gerar_arquivo(path, formato, titulos, inicio, semente):
+    columns = [column.name for column in Volume.__table__.columns]
+    rng = random.Random(semente)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if formato == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(columns)
+        for row in gerar_volumes(rng, titulos):
+            row = (row[0] + inicio - 1,) + row[1:]
+            if formato == 'csv':
+                writer.writerow(row)
+            else:
+                f.write(dumps(dict(zip(columns, row))).decode('utf-8'))
+                f.write('\n')
+
+
+def pico_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def importar(path, formato):
+    conn = connect_to_db()
+    try:
+        with open(path, encoding='utf-8', newline='') as f:
+            return import_catalog(conn, f, formato, fields_from_table(Volume.__table__), estrito=True)
+    finally:
+        conn.close()
+
+
+def remover(inicio):
+    conn = connect_to_db()
+    try:
+        cur = conn.cursor()
+        cur.execute(CARGA_EM_MASSA_SQL)
+        # Os títulos gerados não têm reproduções: sem a checagem de FK linha a linha
+        # (que varre sys_volumes_reproducao) a remoção leva segundos. Requer superusuário.
+        cur.execute("SET LOCAL session_replication_role = replica")
+        cur.execute('DELETE FROM sys_volumes WHERE vol_co_volume >= %s', (inicio,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titulos', type=int, default=1000000)
+    parser.add_argument('--formato', choices=('csv', 'ndjson'), default='csv')
+    parser.add_argument('--inicio', type=int, default=10000000, help='primeiro código gerado')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--manter', action='store_true', help='não remove os títulos importados')
+    parser.add_argument('--saida', help='grava o resultado em JSON')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f'catalogo.{args.formato}')
+        start = time.perf_counter()
+        gerar_arquivo(path, args.formato, args.titulos, args.inicio, args.semente)
+        geracao_s = time.perf_counter() - start
+        arquivo_mb = os.path.getsize(path) / 1024 / 1024
+        rss_inicial = pico_rss_mb()
+
+        try:
+            carga = importar(path, args.formato)
+            recarga = importar(path, args.formato)
+            rss_importacao = pico_rss_mb()
+
+            conn = connect_to_db()
+            start = time.perf_counter()
+            try:
+                with open(os.path.join(tmp, 'exportado'), 'w', encoding='utf-8', newline='') as out:
+                    exportados = export_catalog(conn, out, args.formato,
+                                                [column.name for column in Volume.__table__.columns])
+            finally:
+                conn.close()
+            exportacao_s = time.perf_counter() - start
+        finally:
+            if not args.manter:
+                remover(args.inicio)
+
+    result = {
+        'meta': {
+            'python': platform.python_version(),
+            'titulos': args.titulos,
+            'formato': args.formato,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'arquivo_mb': round(arquivo_mb, 1),
+        'geracao_s': round(geracao_s, 2),
+        'carga': {'duracao_s': round(carga.duracao_s, 2), 'inseridas': carga.inseridas,
+                  'linhas_s': round(carga.lidas / carga.duracao_s)},
+        'recarga': {'duracao_s': round(recarga.duracao_s, 2), 'atualizadas': recarga.atualizadas,
+                    'linhas_s': round(recarga.lidas / recarga.duracao_s)},
+        'exportacao': {'duracao_s': round(exportacao_s, 2), 'linhas': exportados,
+                       'linhas_s': round(exportados / exportacao_s)},
+        'pico_rss_antes_mb': round(rss_inicial, 1),
+        'pico_rss_importacao_mb': round(rss_importacao, 1),
+    }
+    print(f"{args.titulos} títulos ({result['arquivo_mb']} MB {args.formato}): carga {result['carga']['linhas_s']} "
+          f"linhas/s, recarga {result['recarga']['linhas_s']} linhas/s, exportação "
+          f"{result['exportacao']['linhas_s']} linhas/s, pico RSS {result['pico_rss_importacao_mb']} MB")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""Histórico de reproduções: tabela única (antes) x partições mensais (depois).
+
+    python -m bench.particoes --reproducoes 5000000 --meses 24
+    python -m bench.particoes --saida bench/particoes.json
+
+Usa as mesmas variáveis DB_* do app e trabalha num schema próprio
+(bench_particoes), apagado ao final. As duas tabelas recebem as mesmas linhas,
+espalhadas pelos últimos --meses. "simples" tem o índice e a consulta
+anteriores (ordem de volr_co_reproducao); "particionada" tem os da migração
+0010. Mede a primeira página e uma página antiga do /historico (tempo e blocos
+lidos, via EXPLAIN ANALYZE), inserção em lote e a remoção de um mês para a
+retenção: gravar o .csv.gz e apagar as linhas (DELETE) ou a partição (DROP).
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from psycopg2.extras import execute_values
+
+from app import HISTORICO_SQL, connect_to_db, historico_params
+from playback_partitions import add_months, archive, month_start, partition_name
+
+SCHEMA = 'bench_particoes'
+
+COLUNAS = """
+    volr_co_reproducao integer NOT NULL,
+    volr_no_titulo varchar(45) NOT NULL,
+    usu_co_usuario integer NOT NULL,
+    volr_co_volume integer NOT NULL,
+    volr_tp_volume varchar(1),
+    volr_ep_temp varchar(5),
+    volr_dt_reproducao timestamptz NOT NULL DEFAULT now()
+"""
+
+# A consulta de antes da migração 0010, contra o índice da 0005.
+HISTORICO_ANTERIOR_SQL = """
+    SELECT volr_co_reproducao, volr_no_titulo, volr_tp_volume, volr_ep_temp
+    FROM reproducao_simples
+    WHERE usu_co_usuario = %(usuario)s AND (%(codigo)s::integer IS NULL OR volr_co_reproducao < %(codigo)s)
+    ORDER BY volr_co_reproducao DESC
+    LIMIT 21
+"""
+
+
+def connect():
+    conn = connect_to_db()
+    cur = conn.cursor()
+    cur.execute(f'SET search_path = {SCHEMA}')
+    cur.close()
+    conn.commit()
+    return conn
+
+
+def criar(conn, reproducoes, usuarios, meses, semente, inicio, fim):
+    cur = conn.cursor()
+    cur.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+    cur.execute(f'CREATE SCHEMA {SCHEMA}')
+    cur.execute(f'SET search_path = {SCHEMA}')
+    cur.execute(f'CREATE TABLE reproducao_simples ({COLUNAS}, PRIMARY KEY (volr_co_reproducao))')
+    cur.execute(f"""
+        CREATE TABLE reproducao_particionada ({COLUNAS}, PRIMARY KEY (volr_co_reproducao, volr_dt_reproducao))
+        PARTITION BY RANGE (volr_dt_reproducao)
+    """)
+    mes = inicio
+    while mes <= fim:
+        cur.execute(f'CREATE TABLE {partition_name(mes, "reproducao_particionada")} PARTITION OF reproducao_particionada '
+                    'FOR VALUES FROM (%s) TO (%s)', (mes, add_months(mes, 1)))
+        mes = add_months(mes, 1)
+    # Ids crescem com a data, como na tabela real; usuários com atividade desigual.
+    cur.execute('SELECT setseed(%s)', (semente / 2 ** 31,))
+    cur.execute("""
+        INSERT INTO reproducao_simples
+        SELECT i, 'Titulo ' || mod(i, 20000), (%(usuarios)s * power(random(), 2))::integer + 1, mod(i, 20000) + 1, 'F', NULL,
+               %(inicio)s + (%(fim)s - %(inicio)s) * (i::float8 / %(reproducoes)s)
+        FROM generate_series(1, %(reproducoes)s) i
+    """, {'usuarios': usuarios, 'reproducoes': reproducoes, 'inicio': inicio, 'fim': datetime.now(timezone.utc)})
+    cur.execute('INSERT INTO reproducao_particionada SELECT * FROM reproducao_simples')
+    cur.execute("""
+        CREATE INDEX ix_simples_usuario ON reproducao_simples (usu_co_usuario, volr_co_reproducao DESC)
+        INCLUDE (volr_no_titulo, volr_tp_volume, volr_ep_temp)
+    """)
+    cur.execute("""
+        CREATE INDEX ix_particionada_usuario
+        ON reproducao_particionada (usu_co_usuario, volr_dt_reproducao DESC, volr_co_reproducao DESC)
+        INCLUDE (volr_no_titulo, volr_tp_volume, volr_ep_temp)
+    """)
+    conn.commit()
+    conn.autocommit = True
+    cur.execute('VACUUM ANALYZE reproducao_simples')
+    cur.execute('VACUUM ANALYZE reproducao_particionada')
+    conn.autocommit = False
+    cur.close()
+
+
+def explain(cur, sql, params):
+    cur.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, params)
+    plan = cur.fetchone()[0]
+    plan = (plan if isinstance(plan, list) else json.loads(plan))[0]
+    blocos = plan['Plan'].get('Shared Hit Blocks', 0) + plan['Plan'].get('Shared Read Blocks', 0)
+    return plan['Execution Time'], blocos
+
+
+def consultas(conn, usuarios, quantidade, rng, antes):
+    """Primeira página e página a partir de `antes`, nas duas tabelas, para os mesmos usuários."""
+    cur = conn.cursor()
+    cur.execute('SELECT volr_co_reproducao FROM reproducao_simples WHERE volr_dt_reproducao <= %s '
+                'ORDER BY volr_dt_reproducao DESC LIMIT 1', (antes,))
+    codigo_antes = cur.fetchone()[0]
+    particionada_sql = HISTORICO_SQL.replace('sys_volumes_reproducao', 'reproducao_particionada') + 'LIMIT 21'
+    amostras = {chave: [] for chave in ('simples_primeira', 'particionada_primeira', 'simples_antiga', 'particionada_antiga')}
+    for _ in range(quantidade):
+        usuario = int(usuarios * rng.random() ** 2) + 1
+        amostras['simples_primeira'].append(explain(cur, HISTORICO_ANTERIOR_SQL, {'usuario': usuario, 'codigo': None}))
+        amostras['particionada_primeira'].append(explain(cur, particionada_sql, historico_params(usuario, None)))
+        amostras['simples_antiga'].append(explain(cur, HISTORICO_ANTERIOR_SQL, {'usuario': usuario, 'codigo': codigo_antes}))
+        amostras['particionada_antiga'].append(explain(cur, particionada_sql, historico_params(usuario, (antes, codigo_antes))))
+    cur.close()
+    conn.commit()
+    resultado = {}
+    for chave, valores in amostras.items():
+        tempos = sorted(t for t, _ in valores)
+        resultado[chave] = {
+            'p50_ms': round(statistics.median(tempos), 3),
+            'p95_ms': round(tempos[int(len(tempos) * 0.95) - 1], 3),
+            'blocos_medio': round(statistics.mean(b for _, b in valores), 1),
+        }
+    return resultado
+
+
+def insercao(conn, tabela, lotes, tamanho):
+    cur = conn.cursor()
+    cur.execute(f'SELECT max(volr_co_reproducao) FROM {tabela}')
+    proximo = cur.fetchone()[0] + 1
+    start = time.perf_counter()
+    for _ in range(lotes):
+        rows = [(proximo + i, 'Novo', i % 1000 + 1, i % 20000 + 1, 'F') for i in range(tamanho)]
+        execute_values(cur, f'INSERT INTO {tabela} (volr_co_reproducao, volr_no_titulo, usu_co_usuario, '
+                            'volr_co_volume, volr_tp_volume) VALUES %s', rows, page_size=1000)
+        conn.commit()
+        proximo += tamanho
+    cur.close()
+    return round(lotes * tamanho / (time.perf_counter() - start))
+
+
+def retencao_simples(conn, ate, diretorio):
+    start = time.perf_counter()
+    cur = conn.cursor()
+    with gzip.open(os.path.join(diretorio, 'simples.csv.gz'), 'wb') as f:
+        cur.copy_expert(cur.mogrify('COPY (SELECT * FROM reproducao_simples WHERE volr_dt_reproducao < %s) '
+                                    'TO STDOUT WITH (FORMAT csv, HEADER)', (ate,)).decode(), f, size=65536)
+    cur.execute('DELETE FROM reproducao_simples WHERE volr_dt_reproducao < %s', (ate,))
+    linhas = cur.rowcount
+    conn.commit()
+    cur.close()
+    return {'linhas': linhas, 'duracao_ms': round((time.perf_counter() - start) * 1000, 1)}
+
+
+def tamanho_mb(conn, relacao):
+    cur = conn.cursor()
+    # pg_partition_tree não lista uma tabela comum; a pai particionada tem tamanho zero.
+    cur.execute("""
+        SELECT pg_total_relation_size(%(relacao)s::regclass) + coalesce((
+            SELECT sum(pg_total_relation_size(relid)) FROM pg_partition_tree(%(relacao)s::regclass)
+            WHERE relid <> %(relacao)s::regclass), 0)::bigint
+    """, {'relacao': relacao})
+    total = cur.fetchone()[0]
+    cur.close()
+    conn.commit()
+    return round(total / 1024 / 1024, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reproducoes', type=int, default=5000000)
+    parser.add_argument('--usuarios', type=int, default=10000)
+    parser.add_argument('--meses', type=int, default=24)
+    parser.add_argument('--consultas', type=int, default=300)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--manter', action='store_true', help=f'não apaga o schema {SCHEMA}')
+    parser.add_argument('--saida', help='grava o resultado em JSON')
+    args = parser.parse_args(argv)
+
+    fim = month_start(datetime.now(timezone.utc))
+    inicio = add_months(fim, -(args.meses - 1))
+    conn = connect()
+    try:
+        start = time.perf_counter()
+        criar(conn, args.reproducoes, args.usuarios, args.meses, args.semente, inicio, fim)
+        carga_s = time.perf_counter() - start
+
+        rng = random.Random(args.semente)
+        resultado_consultas = consultas(conn, args.usuarios, args.consultas, rng, add_months(fim, -args.meses // 2))
+        resultado_insercao = {'simples_linhas_s': insercao(conn, 'reproducao_simples', 20, 5000),
+                              'particionada_linhas_s': insercao(conn, 'reproducao_particionada', 20, 5000)}
+        tamanhos = {'simples_mb': tamanho_mb(conn, 'reproducao_simples'),
+                    'particionada_mb': tamanho_mb(conn, 'reproducao_particionada')}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            simples = retencao_simples(conn, add_months(inicio, 1), tmp)
+            # archive() calcula o corte a partir de now: o mês mais antigo fica fora da retenção.
+            agora = add_months(inicio, args.meses) + timedelta(days=1)
+            start = time.perf_counter()
+            arquivadas = archive(conn, tmp, args.meses - 1, table='reproducao_particionada', now=agora)
+            particionada = {'linhas': sum(a['linhas'] for a in arquivadas),
+                            'duracao_ms': round((time.perf_counter() - start) * 1000, 1)}
+        tamanhos_depois = {'simples_mb': tamanho_mb(conn, 'reproducao_simples'),
+                           'particionada_mb': tamanho_mb(conn, 'reproducao_particionada')}
+    finally:
+        if not args.manter:
+            cur = conn.cursor()
+            cur.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+            conn.commit()
+        conn.close()
+
+    result = {
+        'meta': {
+            'python': platform.python_version(),
+            'reproducoes': args.reproducoes,
+            'usuarios': args.usuarios,
+            'meses': args.meses,
+            'consultas': args.consultas,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'carga_s': round(carga_s, 1),
+        'tamanho': tamanhos,
+        'historico': resultado_consultas,
+        'insercao': resultado_insercao,
+        'retencao_um_mes': {'simples': simples, 'particionada': particionada},
+        'tamanho_apos_retencao': tamanhos_depois,
+    }
+    h = result['historico']
+    print(f"{args.reproducoes} reproduções em {args.meses} meses. /historico p50 (blocos): primeira página "
+          f"{h['simples_primeira']['p50_ms']} ms ({h['simples_primeira']['blocos_medio']}) -> "
+          f"{h['particionada_primeira']['p50_ms']} ms ({h['particionada_primeira']['blocos_medio']}); página antiga "
+          f"{h['simples_antiga']['p50_ms']} ms ({h['simples_antiga']['blocos_medio']}) -> "
+          f"{h['particionada_antiga']['p50_ms']} ms ({h['particionada_antiga']['blocos_medio']}). Retenção de um mês: "
+          f"{simples['duracao_ms']} ms -> {particionada['duracao_ms']} ms.")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Tempo e memória do cálculo de recomendações com reproduções sintéticas.
+
+    python -m bench.recomendacoes --reproducoes 5000000 --usuarios 500000 --volumes 20000
+    python -m bench.recomendacoes --saida bench/recomendacoes.json
+
+Não usa o banco: gera pares (usuário, volume) com popularidade de cauda longa
+(Zipf) e mede só build_neighbors, mais a consulta de vizinhos via mmap.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from recommendations import Recommendations, build_neighbors, save
+
+
+def gerar_pares(reproducoes, usuarios, volumes, semente):
+    rng = np.random.default_rng(semente)
+    # Atividade por usuário log-normal; poucos títulos concentram as reproduções.
+    atividade = rng.lognormal(0, 1, usuarios)
+    usu = rng.choice(usuarios, reproducoes, p=atividade / atividade.sum())
+    ranks = (rng.zipf(1.2, reproducoes) - 1) % volumes
+    vol = rng.permutation(volumes)[ranks] + 1
+    return usu.astype(np.int32), vol.astype(np.int32)
+
+
+def pico_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reproducoes', type=int, default=5000000)
+    parser.add_argument('--usuarios', type=int, default=500000)
+    parser.add_argument('--volumes', type=int, default=20000)
+    parser.add_argument('--k', type=int, default=50)
+    parser.add_argument('--max-por-usuario', type=int, default=2000)
+    parser.add_argument('--memoria-bloco', type=int, default=64, help='MB por bloco de linhas')
+    parser.add_argument('--consultas', type=int, default=100000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='grava o resultado em JSON')
+    args = parser.parse_args(argv)
+
+    usuarios, volumes = gerar_pares(args.reproducoes, args.usuarios, args.volumes, args.semente)
+    rss_dados = pico_rss_mb()
+
+    start = time.perf_counter()
+    tabela = build_neighbors(usuarios, volumes, args.k, max_por_usuario=args.max_por_usuario,
+                             memoria_bloco=args.memoria_bloco * 1024 * 1024)
+    calculo_s = time.perf_counter() - start
+    rss_calculo = pico_rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'recomendacoes.npy')
+        save(path, tabela, {'k': args.k})
+        recomendacoes = Recommendations(path, check_interval=3600)
+        ids = np.random.default_rng(args.semente).choice(tabela['volume'], args.consultas)
+        recomendacoes.neighbors(int(ids[0]))
+        start = time.perf_counter()
+        for vol in ids.tolist():
+            recomendacoes.neighbors(vol)
+        consulta_us = (time.perf_counter() - start) / args.consultas * 1e6
+        arquivo_mb = os.path.getsize(path) / 1024 / 1024
+
+    result = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'reproducoes': args.reproducoes,
+            'usuarios': args.usuarios,
+            'volumes': args.volumes,
+            'k': args.k,
+            'max_por_usuario': args.max_por_usuario,
+            'memoria_bloco_mb': args.memoria_bloco,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'volumes_com_reproducao': len(tabela),
+        'calculo_s': round(calculo_s, 2),
+        'pico_rss_dados_mb': round(rss_dados, 1),
+        'pico_rss_calculo_mb': round(rss_calculo, 1),
+        'arquivo_mb': round(arquivo_mb, 1),
+        'consulta_us': round(consulta_us, 2),
+    }
+    print(f"{args.reproducoes} reproduções, {len(tabela)} títulos: cálculo em {result['calculo_s']} s, "
+          f"pico RSS {result['pico_rss_calculo_mb']} MB, arquivo {result['arquivo_mb']} MB, "
+          f"consulta {result['consulta_us']} µs")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
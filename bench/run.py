@@ -0,0 +1,223 @@
+"""Carga de concorrência fixa em cada rota, com p50/p95/p99 e RPS em JSON.
+
+    python -m bench.seed --volumes 10000 --usuarios 1000 --reproducoes 100000
+    python -m bench.run --saida bench/baseline.json
+    python -m bench.run --comparar bench/baseline.json
+
+Sem --url, sobe `python -m bench.serve` num subprocesso (Firebase e Identity
+Toolkit substituídos por stubs locais) e o encerra no fim.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from bench.stubs import bench_token
+
+PALAVRAS_BUSCA = ('noite', 'cidade', 'segredo', 'amor', 'estrela', 'sombra', 'herói', 'ilha')
+
+
+def scenarios(volumes, usuarios):
+    """Cada cenário devolve (método, caminho, corpo JSON) a partir de um Random."""
+    return {
+        'catalogo': lambda rng: ('GET', '/catalogo', None),
+        'detalhes': lambda rng: ('GET', f'/detalhes/{rng.randint(1, volumes)}', None),
+        'detalhes_lote': lambda rng: ('POST', '/detalhes/lote', {'ids': [rng.randint(1, volumes) for _ in range(20)]}),
+        'historico': lambda rng: ('GET', f'/historico/{rng.randint(1, usuarios)}?limite=20', None),
+        'busca': lambda rng: ('POST', '/busca', {'q': rng.choice(PALAVRAS_BUSCA)}),
+        'reproducao': lambda rng: ('POST', '/reproducao', {
+            'user_id': rng.randint(1, usuarios), 'titulo_id': rng.randint(1, volumes)}),
+        'lista_reproducao': lambda rng: ('POST', '/lista_reproducao', {
+            'user_id': rng.randint(1, usuarios), 'nome_lista': 'bench',
+            'codigos_volumes': [rng.randint(1, volumes) for _ in range(5)]}),
+        'login': lambda rng: ('POST', '/login', {'email': f'bench{rng.randint(1, usuarios)}@example.com', 'senha': 'x'}),
+    }
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank: sempre um valor observado.
+    if not sorted_values:
+        return None
+    k = math.ceil(p / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(k, len(sorted_values) - 1))]
+
+
+def summarize(latencies, statuses, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+        'status': {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+def drive(base_url, scenario, concurrency, duration, warmup, seed, usuarios):
+    """Roda `concurrency` workers com conexões keep-alive até o prazo; só mede depois do aquecimento."""
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    results = []
+    lock = threading.Lock()
+
+    def worker(n):
+        rng = random.Random(seed * 1000 + n)
+        session = requests.Session()
+        session.headers['Authorization'] = 'Bearer ' + bench_token(rng.randint(1, usuarios))
+        latencies, statuses, errors = [], {}, 0
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            method, path, body = scenario(rng)
+            t0 = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, timeout=30)
+                response.content
+                status = response.status_code
+            except requests.RequestException:
+                status = None
+            t1 = time.perf_counter()
+            if t0 < measure_from:
+                continue
+            if status is None or status >= 500:
+                errors += 1
+            if status is not None:
+                statuses[status] = statuses.get(status, 0) + 1
+            latencies.append(t1 - t0)
+        session.close()
+        with lock:
+            results.append((latencies, statuses, errors))
+
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies, statuses, errors = [], {}, 0
+    for lat, st, err in results:
+        latencies.extend(lat)
+        errors += err
+        for code, n in st.items():
+            statuses[code] = statuses.get(code, 0) + n
+    return summarize(latencies, statuses, errors, duration)
+
+
+def compare(current, baseline, tolerance):
+    """Lista as regressões de p95 ou RPS acima da tolerância relativa."""
+    regressions = []
+    for route, base in baseline.get('routes', {}).items():
+        now = current['routes'].get(route)
+        if now is None or not base.get('requests'):
+            continue
+        if base['p95_ms'] and now['p95_ms'] is not None and now['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {base['p95_ms']} -> {now['p95_ms']} ms")
+        if base['rps'] and now['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{route}: RPS {base['rps']} -> {now['rps']}")
+    return regressions
+
+
+def wait_ready(base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url + '/', timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Servidor em {base_url} não respondeu em {timeout:.0f}s.')
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='servidor já em execução (não sobe o bench.serve)')
+    parser.add_argument('--modo', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--porta', type=int, default=8800)
+    parser.add_argument('--rotas', default=','.join(scenarios(1, 1)), help='lista separada por vírgulas')
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--duracao', type=float, default=10.0, help='segundos medidos por rota')
+    parser.add_argument('--aquecimento', type=float, default=2.0, help='segundos descartados por rota')
+    parser.add_argument('--volumes', type=int, default=10000, help='mesmo valor usado no bench.seed')
+    parser.add_argument('--usuarios', type=int, default=1000, help='mesmo valor usado no bench.seed')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='grava o resultado em JSON')
+    parser.add_argument('--comparar', help='baseline JSON para comparação')
+    parser.add_argument('--tolerancia', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    available = scenarios(args.volumes, args.usuarios)
+    routes = [r.strip() for r in args.rotas.split(',') if r.strip()]
+    unknown = [r for r in routes if r not in available]
+    if unknown:
+        parser.error(f"rotas desconhecidas: {', '.join(unknown)}")
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f'http://127.0.0.1:{args.porta}'
+        server = subprocess.Popen([sys.executable, '-m', 'bench.serve', '--porta', str(args.porta), '--modo', args.modo])
+    try:
+        wait_ready(base_url)
+        result = {
+            'meta': {
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'modo': args.modo if server else None,
+                'concorrencia': args.concorrencia,
+                'duracao_s': args.duracao,
+                'volumes': args.volumes,
+                'usuarios': args.usuarios,
+                'env': {k: v for k, v in os.environ.items() if k.endswith('_MODO') or k.startswith('DB_POOL_')},
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            },
+            'routes': {},
+        }
+        for route in routes:
+            summary = drive(base_url, available[route], args.concorrencia, args.duracao, args.aquecimento,
+                            args.semente, args.usuarios)
+            result['routes'][route] = summary
+            print(f"{route:<18} {summary['rps']:>9.1f} req/s  p50 {summary['p50_ms']} ms  "
+                  f"p95 {summary['p95_ms']} ms  p99 {summary['p99_ms']} ms  erros {summary['errors']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.tolerancia)
+        for regression in regressions:
+            print('REGRESSÃO', regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Popula um Postgres local com dados sintéticos para o benchmark.
+
+    python -m bench.seed --volumes 20000 --usuarios 2000 --reproducoes 200000
+
+Usa as mesmas variáveis DB_* do app e APAGA os dados existentes das tabelas
+(TRUNCATE): aponte para um banco descartável. O gerador é determinístico (--semente),
+então duas execuções com os mesmos parâmetros produzem o mesmo banco.
+"""
+import argparse
+import random
+import time
+
+from psycopg2.extras import execute_values
+
+GENEROS = ('Ação', 'Comédia', 'Drama', 'Terror', 'Ficção Científica', 'Documentário', 'Animação', 'Romance')
+CLASSIFICACOES = ('L', '10', '12', '14', '16', '18')
+PALAVRAS = (
+    'noite', 'cidade', 'segredo', 'guerra', 'amor', 'estrela', 'rio', 'sombra', 'fogo', 'mar',
+    'último', 'perdido', 'verão', 'caminho', 'silêncio', 'família', 'herói', 'tempo', 'ilha', 'coração'
+)
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Heitor', 'Isabela', 'João')
+LOTE = 5000
+
+
+def frase(rng, n):
+    return ' '.join(rng.choice(PALAVRAS) for _ in range(n))
+
+
+def gerar_volumes(rng, total):
+    for i in range(1, total + 1):
+        yield (
+            i,
+            f'{frase(rng, 3).title()} {i}'[:45],
+            'A' if rng.random() < 0.95 else 'I',
+            rng.choice('FS'),
+            frase(rng, 12)[:300],
+            frase(rng, 60),
+            ', '.join(f'{rng.choice(NOMES)} {rng.choice(PALAVRAS).title()}' for _ in range(4)),
+            f'{rng.choice(NOMES)} {rng.choice(PALAVRAS).title()}'[:40],
+            str(rng.randint(1, 5)),
+            rng.choice(GENEROS),
+            rng.choice(CLASSIFICACOES),
+        )
+
+
+def gerar_usuarios(total):
+    for i in range(1, total + 1):
+        yield (i, f'Usuário {i}', f'bench{i}@example.com', 'A')
+
+
+def gerar_reproducoes(rng, total, volumes, usuarios, titulos):
+    # Distribuição de cauda longa: poucos títulos concentram a maior parte das reproduções.
+    for _ in range(total):
+        vol = min(int(rng.paretovariate(1.2)), volumes)
+        titulo, tipo = titulos[vol]
+        ep_temp = f'T{rng.randint(1, 5)}E{rng.randint(1, 12)}' if tipo == 'S' else None
+        yield (titulo, rng.randint(1, usuarios), vol, tipo, ep_temp)
+
+
+def inserir(conn, sql, rows):
+    cur = conn.cursor()
+    lote = []
+    total = 0
+    for row in rows:
+        lote.append(row)
+        if len(lote) >= LOTE:
+            execute_values(cur, sql, lote, page_size=LOTE)
+            total += len(lote)
+            lote = []
+    if lote:
+        execute_values(cur, sql, lote, page_size=LOTE)
+        total += len(lote)
+    cur.close()
+    return total
+
+
+def seed(conn, volumes, usuarios, reproducoes, semente=42):
+    rng = random.Random(semente)
+    cur = conn.cursor()
+    cur.execute("TRUNCATE sys_volumes_reproducao, sys_lista_reproducao, sys_volumes, sys_usuario RESTART IDENTITY")
+    cur.close()
+
+    linhas_volumes = list(gerar_volumes(rng, volumes))
+    titulos = {row[0]: (row[1], row[3]) for row in linhas_volumes}
+    inserir(conn, """
+        INSERT INTO sys_volumes (vol_co_volume, vol_no_volume, vol_in_status, vol_tp_volume, vol_tx_small_descricao,
+                                 vol_tx_sinopse, vol_tx_elenco, vol_tx_diretor, vol_av_avaliacao, vol_tp_genero,
+                                 vol_nu_classificacao)
+        VALUES %s
+    """, linhas_volumes)
+    inserir(conn, "INSERT INTO sys_usuario (usu_co_usuario, usu_no_nome, usu_no_email, usu_in_status) VALUES %s",
+            gerar_usuarios(usuarios))
+    inserir(conn, """
+        INSERT INTO sys_volumes_reproducao (volr_no_titulo, usu_co_usuario, volr_co_volume, volr_tp_volume, volr_ep_temp)
+        VALUES %s
+    """, gerar_reproducoes(rng, reproducoes, volumes, usuarios, titulos))
+
+    cur = conn.cursor()
+    # As sequências do SERIAL continuam depois dos ids explícitos.
+    cur.execute("SELECT setval(pg_get_serial_sequence('sys_volumes', 'vol_co_volume'), %s)", (max(volumes, 1),))
+    cur.execute("SELECT setval(pg_get_serial_sequence('sys_usuario', 'usu_co_usuario'), %s)", (max(usuarios, 1),))
+    cur.execute("ANALYZE sys_volumes, sys_usuario, sys_volumes_reproducao")
+    cur.close()
+    conn.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--volumes', type=int, default=10000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--reproducoes', type=int, default=100000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--migrar', action='store_true', help='executa app.migrate() antes de popular')
+    args = parser.parse_args(argv)
+
+    import app
+
+    if args.migrar:
+        app.migrate()
+    start = time.perf_counter()
+    conn = app.connect_to_db()
+    try:
+        seed(conn, args.volumes, args.usuarios, args.reproducoes, args.semente)
+    finally:
+        conn.close()
+    print(f'{args.volumes} volumes, {args.usuarios} usuários e {args.reproducoes} reproduções '
+          f'em {time.perf_counter() - start:.1f}s.')
+
+
+if __name__ == '__main__':
+    main()
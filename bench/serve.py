@@ -0,0 +1,48 @@
+"""Sobe o app com os stubs do Firebase, para ser medido pelo bench.run.
+
+    python -m bench.serve --porta 8800 [--modo asgi]
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from bench.stubs import install_firebase_stubs, start_identity_toolkit_stub
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8800)
+    parser.add_argument('--modo', choices=('wsgi', 'asgi'), default='wsgi')
+    args = parser.parse_args(argv)
+
+    _, identity_url = start_identity_toolkit_stub(args.host)
+    os.environ['IDENTITY_TOOLKIT_URL'] = identity_url
+    os.environ.setdefault('FIREBASE_WEB_API_KEY', 'bench')
+
+    import app
+
+    install_firebase_stubs(app)
+
+    if args.modo == 'asgi':
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+        import asgi
+
+        config = Config()
+        config.bind = [f'{args.host}:{args.porta}']
+        config.accesslog = None
+        asyncio.run(serve(asgi.app, config))
+    else:
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        # HTTP/1.1 para manter as conexões do gerador de carga vivas.
+        WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        app.warm_up()
+        make_server(args.host, args.porta, app.app, threaded=True).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Substitutos locais do Firebase para o benchmark.
+
+Tokens de benchmark têm o formato `bench:<uid>` e são aceitos sem rede; o
+Identity Toolkit é um servidor HTTP local que devolve esses tokens.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOKEN_PREFIX = 'bench:'
+
+
+def bench_token(uid):
+    return f'{TOKEN_PREFIX}{uid}'
+
+
+def verify_id_token(token, check_revoked=False, **kwargs):
+    from firebase_admin import auth
+
+    if not token.startswith(TOKEN_PREFIX):
+        raise auth.InvalidIdTokenError('Token de benchmark inválido.')
+    uid = token[len(TOKEN_PREFIX):]
+    now = int(time.time())
+    return {'uid': uid, 'iat': now, 'exp': now + 3600}
+
+
+class _User:
+    def __init__(self, uid):
+        self.uid = uid
+
+
+def install_firebase_stubs(app_module):
+    """Troca as chamadas ao Firebase Admin do app pelos stubs locais."""
+    from firebase_admin import auth
+
+    counter = iter(range(1, 1 << 62))
+    auth.verify_id_token = verify_id_token
+    auth.create_user = lambda **kwargs: _User(f'novo-{next(counter)}')
+    auth.create_custom_token = lambda uid, *args, **kwargs: bench_token(uid).encode('utf-8')
+    app_module.init_firebase = lambda: None
+
+
+class _IdentityToolkitHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if self.path.split('?')[0].endswith('/accounts:signInWithPassword') and payload.get('password'):
+            status, body = 200, {'idToken': bench_token(payload.get('email', 'anonimo')), 'expiresIn': '3600'}
+        else:
+            status, body = 400, {'error': {'code': 400, 'message': 'INVALID_PASSWORD'}}
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_identity_toolkit_stub(host='127.0.0.1', port=0):
+    """Sobe o stub numa thread e devolve (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), _IdentityToolkitHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='identity-toolkit-stub', daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}/v1'
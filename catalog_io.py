@@ -0,0 +1,299 @@
+"""Importação e exportação do catálogo (sys_volumes) em CSV ou NDJSON.
+
+A importação valida cada linha enquanto lê o arquivo e a entrega ao COPY
+de uma tabela temporária; um único INSERT ... ON CONFLICT leva a carga para
+sys_volumes. Nada além de um buffer do COPY fica na memória do cliente,
+qualquer que seja o tamanho do arquivo.
+"""
+import csv
+import gzip
+import io
+import json
+import time
+
+from responses import dumps
+
+MAX_ERROS_LISTADOS = 20
+FORMATOS = ('csv', 'ndjson')
+
+# Com a flag ligada, o trigger de NOTIFY de sys_volumes não dispara por linha
+# (migrations/0007): a carga avisa uma vez só, com payload '*'.
+CARGA_EM_MASSA_SQL = "SET LOCAL app.carga_em_massa = 'on'"
+NOTIFY_CARGA_SQL = "SELECT pg_notify('sys_volumes_changed', '*')"
+
+
+class CatalogImportError(Exception):
+    pass
+
+
+class Field:
+    __slots__ = ('name', 'length', 'nullable', 'integer')
+
+    def __init__(self, name, length=None, nullable=True, integer=False):
+        self.name = name
+        self.length = length
+        self.nullable = nullable
+        self.integer = integer
+
+
+def fields_from_table(table):
+    """Campos e limites tirados do modelo: o arquivo é validado com as mesmas regras das colunas."""
+    return [Field(column.name, getattr(column.type, 'length', None), column.nullable, column.type.python_type is int)
+            for column in table.columns]
+
+
+def detect_format(path):
+    nome = path[:-3] if path.endswith('.gz') else path
+    if nome.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if nome.endswith('.csv'):
+        return 'csv'
+    raise CatalogImportError('Não foi possível deduzir o formato pela extensão; use --formato csv ou ndjson.')
+
+
+def open_text(path, mode):
+    if path == '-':
+        return None
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_records(f, formato, fields):
+    """(campos presentes no arquivo, iterador de (número da linha, dict)).
+
+    No CSV só as colunas do cabeçalho são importadas; as demais ficam como
+    estão no banco. No NDJSON valem todos os campos, e os ausentes viram NULL.
+    """
+    names = {field.name for field in fields}
+    if formato == 'ndjson':
+        return fields, _ndjson_records(f, names)
+
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if not header:
+        raise CatalogImportError('Arquivo CSV sem cabeçalho.')
+    desconhecidas = [name for name in header if name not in names]
+    if desconhecidas:
+        raise CatalogImportError(f"Colunas desconhecidas no cabeçalho: {', '.join(desconhecidas)}.")
+    if len(set(header)) != len(header):
+        raise CatalogImportError('Colunas repetidas no cabeçalho.')
+    faltando = [field.name for field in fields if not field.nullable and field.name not in header]
+    if faltando:
+        raise CatalogImportError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}.")
+    return [field for field in fields if field.name in header], _csv_records(reader, header)
+
+
+def _csv_records(reader, header):
+    for row in reader:
+        if len(row) != len(header):
+            yield reader.line_num, None
+            continue
+        yield reader.line_num, {name: value for name, value in zip(header, row) if value != ''}
+
+
+def _ndjson_records(f, names):
+    for numero, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield numero, None
+            continue
+        if isinstance(record, dict) and not names.issuperset(record):
+            yield numero, None
+            continue
+        yield numero, record
+
+
+def validate(record, fields):
+    """Linha pronta para o COPY, na ordem de fields; ValueError com a mensagem se for inválida."""
+    if not isinstance(record, dict):
+        raise ValueError('linha malformada ou com campos desconhecidos')
+    values = []
+    for field in fields:
+        value = record.get(field.name)
+        if value is None:
+            if field.name == 'vol_in_status':
+                value = 'A'
+            elif not field.nullable:
+                raise ValueError(f'{field.name} é obrigatório')
+            values.append(value)
+        elif field.integer:
+            if isinstance(value, bool):
+                raise ValueError(f'{field.name} deve ser inteiro')
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'{field.name} deve ser inteiro')
+            if value < 1:
+                raise ValueError(f'{field.name} deve ser positivo')
+            values.append(value)
+        else:
+            if value.__class__ is not str:
+                value = str(value)
+            if field.length is not None and len(value) > field.length:
+                raise ValueError(f'{field.name} excede {field.length} caracteres')
+            values.append(value)
+    return values
+
+
+def _quote(value):
+    return '"' + (value.replace('"', '""') if '"' in value else value) + '"'
+
+
+def csv_line(values):
+    # NULL é o campo vazio sem aspas; texto vai sempre entre aspas, então '' continua sendo ''.
+    return ','.join('' if value is None else _quote(value) if value.__class__ is str else str(value)
+                    for value in values) + '\n'
+
+
+class CopySource(io.RawIOBase):
+    """Arquivo somente-leitura sobre um gerador de linhas, consumido pelo copy_expert."""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._pending = b''
+        # O psycopg2 troca uma exceção levantada aqui por QueryCanceled; guardamos a original.
+        self.error = None
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunks = [self._pending]
+        total = len(self._pending)
+        while size < 0 or total < size:
+            try:
+                row = next(self._rows, None)
+            except Exception as e:
+                self.error = e
+                raise
+            if row is None:
+                break
+            chunk = csv_line(row).encode('utf-8')
+            chunks.append(chunk)
+            total += len(chunk)
+        data = b''.join(chunks)
+        if size < 0 or len(data) <= size:
+            self._pending = b''
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+class ImportResult:
+    __slots__ = ('lidas', 'invalidas', 'inseridas', 'atualizadas', 'erros', 'duracao_s')
+
+    def __init__(self):
+        self.lidas = 0
+        self.invalidas = 0
+        self.inseridas = 0
+        self.atualizadas = 0
+        self.erros = []
+        self.duracao_s = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _valid_rows(records, fields, result, estrito):
+    for numero, record in records:
+        result.lidas += 1
+        try:
+            values = validate(record, fields)
+        except ValueError as e:
+            if estrito:
+                raise CatalogImportError(f'Linha {numero}: {e}.')
+            result.invalidas += 1
+            if len(result.erros) < MAX_ERROS_LISTADOS:
+                result.erros.append((numero, str(e)))
+            continue
+        yield [numero] + values
+
+
+def merge_sql(columns, atualizaveis):
+    nomes = ', '.join(columns)
+    atualizaveis = [c for c in atualizaveis if c != 'vol_co_volume']
+    # A última ocorrência de um código no arquivo vence; linhas iguais às do
+    # banco não são reescritas (nem geram WAL).
+    return f"""
+        WITH m AS (
+            INSERT INTO sys_volumes AS v ({nomes})
+            SELECT DISTINCT ON (vol_co_volume) {nomes}
+            FROM sys_volumes_carga
+            ORDER BY vol_co_volume, linha DESC
+            ON CONFLICT (vol_co_volume) DO UPDATE SET
+                {', '.join(f'{c} = EXCLUDED.{c}' for c in atualizaveis)}
+            WHERE ({', '.join(f'v.{c}' for c in atualizaveis)})
+                IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in atualizaveis)})
+            RETURNING (xmax = 0) AS inserida
+        )
+        SELECT count(*) FILTER (WHERE inserida), count(*) FILTER (WHERE NOT inserida) FROM m
+    """
+
+
+def import_catalog(conn, f, formato, fields, estrito=False):
+    """Carrega o arquivo aberto em f numa única transação e devolve um ImportResult."""
+    start = time.perf_counter()
+    result = ImportResult()
+    presentes, records = read_records(f, formato, fields)
+    # Títulos novos sem status entram ativos; nos existentes o status só muda se vier no arquivo.
+    carga = presentes + [field for field in fields if field.name == 'vol_in_status' and field not in presentes]
+    columns = [field.name for field in carga]
+    source = CopySource(_valid_rows(records, carga, result, estrito))
+    cur = conn.cursor()
+    try:
+        cur.execute(CARGA_EM_MASSA_SQL)
+        cur.execute(f"""
+            CREATE TEMP TABLE sys_volumes_carga ON COMMIT DROP AS
+            SELECT 0::bigint AS linha, {', '.join(columns)} FROM sys_volumes WITH NO DATA
+        """)
+        cur.copy_expert(f"COPY sys_volumes_carga (linha, {', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                        source, size=65536)
+        cur.execute(merge_sql(columns, [field.name for field in presentes]))
+        result.inseridas, result.atualizadas = cur.fetchone()
+        if result.inseridas:
+            cur.execute("""
+                SELECT setval(pg_get_serial_sequence('sys_volumes', 'vol_co_volume'), max(vol_co_volume))
+                FROM sys_volumes
+            """)
+        if result.inseridas or result.atualizadas:
+            cur.execute(NOTIFY_CARGA_SQL)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if source.error is not None:
+            raise source.error from None
+        raise
+    finally:
+        cur.close()
+    result.duracao_s = time.perf_counter() - start
+    return result
+
+
+def export_catalog(conn, out, formato, columns, itersize=10000):
+    """Escreve sys_volumes em out (texto) em ordem de código; devolve o número de linhas."""
+    cur = conn.cursor()
+    if formato == 'csv':
+        out.write(','.join(columns) + '\n')
+        cur.copy_expert(f"COPY (SELECT {', '.join(columns)} FROM sys_volumes ORDER BY vol_co_volume) "
+                        "TO STDOUT WITH (FORMAT csv)", out, size=65536)
+        total = cur.rowcount
+        cur.close()
+        conn.commit()
+        return total
+
+    cur.close()
+    total = 0
+    cur = conn.cursor(name='exportar_catalogo')
+    cur.itersize = itersize
+    cur.execute(f"SELECT {', '.join(columns)} FROM sys_volumes ORDER BY vol_co_volume")
+    for row in cur:
+        out.write(dumps(dict(zip(columns, row))).decode('utf-8'))
+        out.write('\n')
+        total += 1
+    cur.close()
+    conn.commit()
+    return total
@@ -0,0 +1,79 @@
+import hashlib
+import math
+import random
+import threading
+import time
+from array import array
+
+
+class CatalogSampler:
+    """Amostra títulos ativos a partir de um array de ids recarregado periodicamente."""
+
+    def __init__(self, load_ids, refresh_interval=60.0, clock=time.monotonic):
+        self._load_ids = load_ids
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._ids = None
+        self._loaded_at = None
+        self._refresh_lock = threading.Lock()
+
+    def ids(self):
+        ids = self._ids
+        if ids is not None and self._clock() - self._loaded_at < self.refresh_interval:
+            return ids
+
+        # Só uma thread recarrega; as demais seguem com o array anterior enquanto existir.
+        if ids is not None and not self._refresh_lock.acquire(blocking=False):
+            return ids
+        if ids is None:
+            self._refresh_lock.acquire()
+        try:
+            if self._ids is ids:
+                self.refresh()
+            return self._ids
+        finally:
+            self._refresh_lock.release()
+
+    def needs_refresh(self):
+        return self._ids is None or self._clock() - self._loaded_at >= self.refresh_interval
+
+    def current(self):
+        """Último array carregado, sem recarregar mesmo que esteja vencido."""
+        return self._ids
+
+    def refresh(self, ids=None):
+        self._ids = array('q', self._load_ids() if ids is None else ids)
+        self._loaded_at = self._clock()
+
+    def invalidate(self):
+        self._loaded_at = float('-inf')
+
+    def sample(self, k, seed=None, page=0):
+        ids = self.ids()
+        return self.sample_from(ids, k, seed, page)
+
+    @staticmethod
+    def sample_from(ids, k, seed=None, page=0):
+        n = len(ids)
+        if n == 0:
+            return []
+        if seed is None:
+            return random.sample(ids, min(k, n))
+
+        # Permutação afim determinística: mesma seed -> mesma ordem, páginas sem repetição.
+        start = page * k
+        if start >= n:
+            return []
+        digest = hashlib.sha256(str(seed).encode('utf-8')).digest()
+        step = int.from_bytes(digest[:8], 'big') % n or 1
+        while math.gcd(step, n) != 1:
+            step += 1
+        offset = int.from_bytes(digest[8:16], 'big') % n
+        return [ids[(offset + i * step) % n] for i in range(start, min(start + k, n))]
+
+    def stats(self):
+        ids = self._ids
+        return {
+            'size': len(ids) if ids is not None else 0,
+            'age_s': self._clock() - self._loaded_at if ids is not None else None,
+        }
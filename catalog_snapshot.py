@@ -0,0 +1,170 @@
+import sys
+import threading
+import time
+from array import array
+
+# Colunas carregadas de sys_volumes, nesta ordem.
+COLUMNS = (
+    'vol_co_volume', 'vol_no_volume', 'vol_tx_small_descricao', 'vol_tx_sinopse', 'vol_tx_elenco',
+    'vol_tx_diretor', 'vol_av_avaliacao', 'vol_tp_genero', 'vol_nu_classificacao', 'vol_tp_volume', 'vol_in_status'
+)
+# Valores repetidos em milhares de linhas: uma única cópia de cada string.
+INTERNED = ('vol_av_avaliacao', 'vol_tp_genero', 'vol_nu_classificacao', 'vol_tp_volume', 'vol_in_status')
+STATUS = COLUMNS.index('vol_in_status')
+
+
+class VolumeRecord:
+    __slots__ = COLUMNS
+
+    def __init__(self, row):
+        for name, value in zip(COLUMNS, row):
+            if name in INTERNED and value is not None:
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+    def __getitem__(self, name):
+        # Permite usar o registro onde o código espera uma linha do DictCursor.
+        return getattr(self, name)
+
+    def values(self, columns):
+        return tuple(getattr(self, name) for name in columns)
+
+
+class Snapshot:
+    """Geração imutável do catálogo ativo; trocada inteira a cada refresh."""
+
+    __slots__ = ('generation', 'records', 'index', 'ids', 'inactive', 'loaded_at', 'load_ms')
+
+    def __init__(self, generation, rows, loaded_at, load_ms=0.0):
+        self.generation = generation
+        self.records = []
+        inactive = []
+        for row in rows:
+            if row[STATUS] == 'A':
+                self.records.append(VolumeRecord(row))
+            else:
+                inactive.append(row[0])
+        # Inativos só pelo id: /detalhes/lote distingue "inativo" de "não encontrado".
+        self.inactive = frozenset(inactive)
+        self.index = {record.vol_co_volume: i for i, record in enumerate(self.records)}
+        self.ids = array('i', self.index)
+        self.loaded_at = loaded_at
+        self.load_ms = load_ms
+
+    def get(self, vol_co_volume):
+        i = self.index.get(vol_co_volume)
+        return self.records[i] if i is not None else None
+
+    def memory_bytes(self):
+        total = (sys.getsizeof(self.records) + sys.getsizeof(self.index) + sys.getsizeof(self.ids)
+                 + sys.getsizeof(self.inactive))
+        seen = set()
+        for record in self.records:
+            total += sys.getsizeof(record)
+            for name in COLUMNS:
+                value = getattr(record, name)
+                if value is not None and id(value) not in seen:
+                    seen.add(id(value))
+                    total += sys.getsizeof(value)
+        return total
+
+
+class CatalogSnapshot:
+    """Cópia em memória dos volumes ativos, recarregada por intervalo ou NOTIFY.
+
+    current() devolve None enquanto não houver snapshot ou depois de uma
+    invalidação ainda não recarregada: nesses casos os handlers vão ao banco.
+    """
+
+    def __init__(self, load_rows, refresh_interval=60.0, clock=time.monotonic):
+        self._load_rows = load_rows
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._snapshot = None
+        self._stale = False
+        self._stale_during_load = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def current(self):
+        if self._stale:
+            return None
+        return self._snapshot
+
+    def get(self, vol_co_volume):
+        snapshot = self.current()
+        return snapshot.get(vol_co_volume) if snapshot is not None else None
+
+    def refresh(self):
+        with self._refresh_lock:
+            with self._lock:
+                generation = self._snapshot.generation + 1 if self._snapshot is not None else 1
+                # Invalidações que chegarem durante a carga deixam o snapshot stale de novo.
+                self._stale_during_load = False
+            start = self._clock()
+            try:
+                rows = self._load_rows()
+            except Exception:
+                self.failures += 1
+                raise
+            loaded_at = self._clock()
+            snapshot = Snapshot(generation, rows, loaded_at, (loaded_at - start) * 1000)
+            with self._lock:
+                self._snapshot = snapshot
+                self._stale = self._stale_during_load
+                self.refreshes += 1
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+            self._stale_during_load = True
+        self._wake.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='catalog-snapshot-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._snapshot is not None:
+                self._wake.wait(self.refresh_interval)
+                self._wake.clear()
+                if self._stop.is_set():
+                    return
+            try:
+                self.refresh()
+            except Exception:
+                # Mantém o snapshot anterior (ou o fallback para o banco) e tenta de novo.
+                self._stop.wait(min(5.0, self.refresh_interval))
+
+    def stats(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'generation': 0, 'size': 0, 'stale': self._stale, 'refreshes': self.refreshes,
+                    'failures': self.failures}
+        return {
+            'generation': snapshot.generation,
+            'size': len(snapshot.records),
+            'inactive': len(snapshot.inactive),
+            'load_ms': snapshot.load_ms,
+            'age_s': self._clock() - snapshot.loaded_at,
+            'stale': self._stale,
+            'memory_bytes': snapshot.memory_bytes(),
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+        }
@@ -0,0 +1,197 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Pool de conexões thread-safe compartilhado por todos os handlers do processo."""
+
+    def __init__(self, connect, minconn=1, maxconn=10, timeout=5.0, check_interval=30.0, max_idle=300.0):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError('Configuração de pool inválida: 0 <= minconn <= maxconn e maxconn >= 1.')
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.max_idle = max_idle
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._acquire_total = 0.0
+        self._acquire_max = 0.0
+        self._listeners = []
+
+    def add_acquire_listener(self, callback):
+        self._listeners.append(callback)
+
+    def open(self):
+        # Pré-aquece o pool até minconn; chamado no warm-up, nunca no import.
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self, timeout=None):
+        start = time.monotonic()
+        deadline = start + (self.timeout if timeout is None else timeout)
+        conn = None
+        last_used = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout('Pool de conexões encerrado.')
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout('Tempo esgotado aguardando conexão com o banco de dados.')
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._discarded += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._acquisitions += 1
+            self._acquire_total += elapsed
+            if elapsed > self._acquire_max:
+                self._acquire_max = elapsed
+        for callback in self._listeners:
+            callback(elapsed)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard or conn.closed:
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._discarded += 1
+                self._cond.notify()
+            return
+
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                expired.append(conn)
+            else:
+                self._idle.append((conn, now))
+                # Mantém as mais recentes no fim; as mais antigas saem além de minconn.
+                while self._size > self.minconn and self._idle and now - self._idle[0][1] > self.max_idle:
+                    expired.append(self._idle.pop(0)[0])
+                    self._size -= 1
+            self._cond.notify()
+        for old in expired:
+            self._close_quietly(old)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            # Também no GeneratorExit de uma resposta em streaming abortada pelo cliente.
+            self.putconn(conn, discard=bool(conn.closed))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle = []
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            acquisitions = self._acquisitions
+            return {
+                'min': self.minconn,
+                'max': self.maxconn,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': self._waiting,
+                'acquisitions': acquisitions,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'acquire_ms_avg': (self._acquire_total / acquisitions * 1000) if acquisitions else 0.0,
+                'acquire_ms_max': self._acquire_max * 1000,
+            }
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.check_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,231 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from db_pool import PoolTimeout
+
+# Atraso de replicação em segundos; 0 quando tudo o que foi recebido já foi
+# aplicado (réplica em dia, mesmo sem escritas recentes no primário).
+LAG_SQL = """
+    SELECT coalesce(CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END, 0)
+"""
+
+STRATEGIES = ('round_robin', 'least_busy')
+
+
+def parse_hosts(value):
+    """'host1:5433,/tmp/socket:5434,host3' -> [(host, port), ...]; porta None usa a padrão."""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, sep, port = item.rpartition(':')
+        if sep and port.isdigit():
+            hosts.append((host, port))
+        else:
+            hosts.append((item, None))
+    return hosts
+
+
+class Replica:
+    __slots__ = ('name', 'pool', 'healthy', 'lag', 'in_use', 'reads', 'failures', 'checked_at')
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.healthy = True
+        self.lag = None
+        self.in_use = 0
+        self.reads = 0
+        self.failures = 0
+        self.checked_at = None
+
+
+class DbRouter:
+    """Escolhe onde cada leitura roda: uma réplica saudável ou o primário.
+
+    Leituras de um usuário que escreveu há menos de ryw_window segundos vão
+    para o primário (read-your-writes). A janela é por processo: com vários
+    workers, ela deve cobrir também o atraso máximo aceito (max_lag).
+    """
+
+    def __init__(self, primary, replicas=(), strategy='round_robin', ryw_window=5.0, max_lag=10.0,
+                 check_interval=5.0, max_users=100000, clock=time.monotonic):
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Estratégia de réplica inválida: {strategy}. Use {" ou ".join(STRATEGIES)}.')
+        self._primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.ryw_window = ryw_window
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.max_users = max_users
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._recent_writes = OrderedDict()
+        self._next = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.primary_reads = 0
+        self.pinned_reads = 0
+        self.fallbacks = 0
+
+    def mark_write(self, user):
+        if not self.replicas or user is None:
+            return
+        with self._lock:
+            key = str(user)
+            self._recent_writes[key] = self._clock() + self.ryw_window
+            self._recent_writes.move_to_end(key)
+            while len(self._recent_writes) > self.max_users:
+                self._recent_writes.popitem(last=False)
+
+    def pinned(self, user):
+        if user is None:
+            return False
+        with self._lock:
+            key = str(user)
+            expires = self._recent_writes.get(key)
+            if expires is None:
+                return False
+            if expires > self._clock():
+                return True
+            del self._recent_writes[key]
+            return False
+
+    def choose(self, user=None):
+        """Réplica para esta leitura, ou None para usar o primário."""
+        if not self.replicas:
+            return None
+        self.start()
+        if self.pinned(user):
+            with self._lock:
+                self.pinned_reads += 1
+            return None
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if not healthy:
+                self.primary_reads += 1
+                return None
+            start = self._next % len(healthy)
+            self._next += 1
+            rotated = healthy[start:] + healthy[:start]
+            if self.strategy == 'least_busy':
+                replica = min(rotated, key=lambda r: r.in_use)
+            else:
+                replica = rotated[0]
+            replica.in_use += 1
+            replica.reads += 1
+            return replica
+
+    def release(self, replica):
+        with self._lock:
+            replica.in_use -= 1
+
+    def report_failure(self, replica):
+        # Fora da rotação até o próximo health check bem-sucedido.
+        with self._lock:
+            replica.healthy = False
+            replica.failures += 1
+
+    def abandon(self, replica, failed):
+        """Desiste da réplica escolhida antes de usá-la; a leitura vai para o primário.
+
+        Pool esgotado (failed=False) é réplica ocupada, não doente.
+        """
+        with self._lock:
+            replica.in_use -= 1
+            self.fallbacks += 1
+        if failed:
+            self.report_failure(replica)
+
+    @contextmanager
+    def read(self, user=None):
+        replica = self.choose(user)
+        conn = None
+        if replica is not None:
+            try:
+                conn = replica.pool.getconn()
+            except PoolTimeout:
+                self.abandon(replica, failed=False)
+                replica = None
+            except Exception:
+                self.abandon(replica, failed=True)
+                replica = None
+        if replica is None:
+            with self._primary() as conn:
+                yield conn
+            return
+
+        try:
+            yield conn
+        finally:
+            # Também no GeneratorExit de uma resposta em streaming abortada pelo cliente.
+            if conn.closed:
+                self.report_failure(replica)
+                replica.pool.putconn(conn, discard=True)
+            else:
+                replica.pool.putconn(conn)
+            self.release(replica)
+
+    def check(self):
+        for replica in self.replicas:
+            try:
+                with replica.pool.connection(timeout=min(2.0, self.check_interval)) as conn:
+                    cur = conn.cursor()
+                    cur.execute(LAG_SQL)
+                    lag = float(cur.fetchone()[0])
+                    cur.close()
+                    conn.rollback()
+                healthy = lag <= self.max_lag
+            except Exception:
+                lag = None
+                healthy = False
+            with self._lock:
+                replica.lag = lag
+                replica.healthy = healthy
+                replica.checked_at = self._clock()
+
+    def start(self):
+        if self._thread is not None or not self.replicas:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='db-replica-health', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            self.check()
+
+    def stats(self):
+        with self._lock:
+            now = self._clock()
+            return {
+                'strategy': self.strategy,
+                'ryw_window': self.ryw_window,
+                'max_lag': self.max_lag,
+                'pinned_users': sum(1 for expires in self._recent_writes.values() if expires > now),
+                'primary_reads': self.primary_reads,
+                'pinned_reads': self.pinned_reads,
+                'fallbacks': self.fallbacks,
+                'replicas': [{
+                    'name': replica.name,
+                    'healthy': replica.healthy,
+                    'lag_s': replica.lag,
+                    'in_use': replica.in_use,
+                    'reads': replica.reads,
+                    'failures': replica.failures,
+                    'pool': replica.pool.stats(),
+                } for replica in self.replicas],
+            }
@@ -0,0 +1,172 @@
+import asyncio
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class _IdentityToolkitBase:
+    def __init__(self, base_url, api_key, connect_timeout=3.05, read_timeout=10.0,
+                 retries=2, backoff=0.2, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_trial = False
+        self.requests = 0
+        self.retried = 0
+        self.short_circuited = 0
+
+    @staticmethod
+    def _sign_in_payload(email, password):
+        return {'email': email, 'password': password, 'returnSecureToken': True}
+
+    def _backoff_delay(self, attempt):
+        # Backoff exponencial com jitter para não sincronizar os retries dos workers.
+        return self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+    def _before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._clock() - self._opened_at < self.reset_timeout or self._half_open_trial:
+                self.short_circuited += 1
+                raise CircuitOpen('Serviço de autenticação indisponível, tente novamente em instantes.')
+            # Meio-aberto: deixa passar uma única chamada de teste.
+            self._half_open_trial = True
+
+    def _after_call(self, success):
+        with self._lock:
+            self._half_open_trial = False
+            if success:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = self._clock()
+
+    def _abandon_call(self):
+        # Cancelada (cliente desconectou): não conta como falha, mas libera a chamada de teste.
+        with self._lock:
+            self._half_open_trial = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'circuit': 'open' if self._opened_at is not None else 'closed',
+                'consecutive_failures': self._failures,
+                'requests': self.requests,
+                'retried': self.retried,
+                'short_circuited': self.short_circuited,
+            }
+
+
+class IdentityToolkitClient(_IdentityToolkitBase):
+    """Cliente do Identity Toolkit com sessão keep-alive, timeouts, retries e circuit breaker."""
+
+    def __init__(self, base_url, api_key, pool_size=10, sleep=time.sleep, **kwargs):
+        super().__init__(base_url, api_key, **kwargs)
+        self._sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def sign_in_with_password(self, email, password):
+        return self._post('/accounts:signInWithPassword', self._sign_in_payload(email, password))
+
+    def _post(self, path, payload):
+        self._before_call()
+        # Qualquer saída precisa fechar a chamada: senão a de teste do meio-aberto fica presa.
+        try:
+            response = self._attempts(self.base_url + path, payload)
+        except Exception:
+            self._after_call(success=False)
+            raise
+        except BaseException:
+            self._abandon_call()
+            raise
+        self._after_call(success=response.status_code < 500)
+        return response
+
+    def _attempts(self, url, payload):
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                self._sleep(self._backoff_delay(attempt))
+            try:
+                self.requests += 1
+                response = self.session.post(url, params={'key': self.api_key}, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                continue
+            if response.status_code >= 500 and attempt < self.retries:
+                continue
+            return response
+        raise error
+
+
+class AsyncIdentityToolkitClient(_IdentityToolkitBase):
+    """Mesma política do IdentityToolkitClient sobre um httpx.AsyncClient (modo ASGI)."""
+
+    def __init__(self, base_url, api_key, pool_size=10, **kwargs):
+        import httpx
+
+        super().__init__(base_url, api_key, **kwargs)
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    async def sign_in_with_password(self, email, password):
+        return await self._post('/accounts:signInWithPassword', self._sign_in_payload(email, password))
+
+    async def _post(self, path, payload):
+        self._before_call()
+        try:
+            response = await self._attempts(self.base_url + path, payload)
+        except Exception:
+            self._after_call(success=False)
+            raise
+        except BaseException:
+            self._abandon_call()
+            raise
+        self._after_call(success=response.status_code < 500)
+        return response
+
+    async def _attempts(self, url, payload):
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self._backoff_delay(attempt))
+            try:
+                self.requests += 1
+                response = await self.client.post(url, params={'key': self.api_key}, json=payload)
+            except (self._httpx.TransportError, self._httpx.TimeoutException) as e:
+                error = e
+                continue
+            if response.status_code >= 500 and attempt < self.retries:
+                continue
+            return response
+        raise error
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,196 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from psycopg2 import extensions
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    """Conjunto de métricas exportado no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}' for labels, value in items]
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        # Só o balde em que o valor cai é incrementado; a acumulação fica para o render.
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames + ("le",), labels + (le,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class CallbackMetric:
+    """Valores lidos no momento da coleta (ex.: stats() dos caches), sem custo no request."""
+
+    def __init__(self, name, help, type, labelnames, collect):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+
+    def samples(self):
+        return [f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}' for labels, value in self._collect()]
+
+
+class _Timer:
+    __slots__ = ('_histogram', '_labels', '_start')
+
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labels)
+
+
+STATEMENT_RE = re.compile(r'^\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE|TABLE)\s+"?(\w+))?', re.IGNORECASE | re.DOTALL)
+
+
+def statement_label(query, context=None):
+    """Rótulo de baixa cardinalidade para um SQL: verbo + primeira tabela.
+
+    Objetos de psycopg2.sql são montados com o cursor ou a conexão em `context`.
+    """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif context is not None and hasattr(query, 'as_string'):
+        query = query.as_string(context)
+    elif not isinstance(query, str):
+        query = str(query)
+    match = STATEMENT_RE.match(query)
+    if not match:
+        return 'other'
+    verb = match.group(1).upper()
+    return f'{verb} {match.group(2)}' if match.group(2) else verb
+
+
+def timed_connection_factory(histogram):
+    """connection_factory do psycopg2 que mede cada execute() no histograma, por statement."""
+    labels = {}
+    cursor_classes = {}
+
+    def timed_cursor_class(base):
+        cls = cursor_classes.get(base)
+        if cls is None:
+            class TimedCursor(base):
+                def execute(self, query, vars=None):
+                    # Só str/bytes vão para o cache: sql.Composed e sql.SQL não são hasheáveis.
+                    if isinstance(query, (str, bytes)):
+                        label = labels.get(query)
+                        if label is None:
+                            label = statement_label(query)
+                            if len(labels) < 1000:
+                                labels[query] = label
+                    else:
+                        label = statement_label(query, self)
+                    start = time.perf_counter()
+                    try:
+                        return super().execute(query, vars)
+                    finally:
+                        histogram.observe(time.perf_counter() - start, label)
+
+            cls = cursor_classes[base] = TimedCursor
+        return cls
+
+    class TimedConnection(extensions.connection):
+        def cursor(self, *args, **kwargs):
+            kwargs['cursor_factory'] = timed_cursor_class(
+                kwargs.get('cursor_factory') or self.cursor_factory or extensions.cursor
+            )
+            return super().cursor(*args, **kwargs)
+
+    return TimedConnection
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,25 @@
+-- NOTIFY para o snapshot do catálogo, caches de título e ETags do histórico.
+
+CREATE OR REPLACE FUNCTION fn_notify_sys_volumes() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('sys_volumes_changed', COALESCE(NEW.vol_co_volume, OLD.vol_co_volume)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notify_sys_volumes ON sys_volumes;
+CREATE TRIGGER trg_notify_sys_volumes
+    AFTER INSERT OR UPDATE OR DELETE ON sys_volumes
+    FOR EACH ROW EXECUTE FUNCTION fn_notify_sys_volumes();
+
+CREATE OR REPLACE FUNCTION fn_notify_sys_volumes_reproducao() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('sys_volumes_reproducao_changed', COALESCE(NEW.usu_co_usuario, OLD.usu_co_usuario)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notify_sys_volumes_reproducao ON sys_volumes_reproducao;
+CREATE TRIGGER trg_notify_sys_volumes_reproducao
+    AFTER INSERT OR UPDATE OR DELETE ON sys_volumes_reproducao
+    FOR EACH ROW EXECUTE FUNCTION fn_notify_sys_volumes_reproducao();
@@ -0,0 +1,14 @@
+-- Busca textual (tsvector) e por trigramas em sys_volumes.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE sys_volumes ADD COLUMN IF NOT EXISTS vol_tsv tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('portuguese'::regconfig, coalesce(vol_no_volume, '')), 'A') ||
+    setweight(to_tsvector('portuguese'::regconfig, coalesce(vol_tx_elenco, '')), 'B') ||
+    setweight(to_tsvector('portuguese'::regconfig, coalesce(vol_tx_diretor, '')), 'B') ||
+    setweight(to_tsvector('portuguese'::regconfig, coalesce(vol_tx_small_descricao, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_sys_volumes_tsv ON sys_volumes USING GIN (vol_tsv);
+CREATE INDEX IF NOT EXISTS ix_sys_volumes_nome_trgm ON sys_volumes USING GIN (vol_no_volume gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_sys_volumes_genero_trgm ON sys_volumes USING GIN (vol_tp_genero gin_trgm_ops);
@@ -0,0 +1,5 @@
+-- "Quais listas contêm o título X" e listas ativas por usuário.
+
+CREATE INDEX IF NOT EXISTS ix_sys_lista_reproducao_volumes ON sys_lista_reproducao USING GIN (vol_co_volume);
+CREATE INDEX IF NOT EXISTS ix_sys_lista_reproducao_usuario ON sys_lista_reproducao (usu_co_usuario)
+    WHERE lrep_in_status = 'A';
@@ -0,0 +1,5 @@
+-- Índice de cobertura do "continuar assistindo": só títulos em andamento, mais recentes primeiro.
+CREATE INDEX IF NOT EXISTS ix_sys_volumes_progresso_continuar
+    ON sys_volumes_progresso (usu_co_usuario, volp_dt_atualizacao DESC)
+    INCLUDE (vol_co_volume, volp_ep_temp, volp_nu_posicao, volp_nu_duracao)
+    WHERE volp_in_status = 'A';
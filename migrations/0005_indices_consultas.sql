@@ -0,0 +1,23 @@
+-- migrate:no-transaction
+-- Índices para os filtros das rotas. CONCURRENTLY não bloqueia escritas nas tabelas
+-- grandes; por isso cada comando roda fora de transação.
+
+-- /historico: WHERE usu_co_usuario = ? AND volr_co_reproducao < ? ORDER BY volr_co_reproducao DESC LIMIT n.
+-- Com o INCLUDE a página inteira sai do índice (index-only scan).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sys_volumes_reproducao_usuario
+    ON sys_volumes_reproducao (usu_co_usuario, volr_co_reproducao DESC)
+    INCLUDE (volr_no_titulo, volr_tp_volume, volr_ep_temp);
+
+-- /catalogo (ids ativos) e /busca sem filtros: volumes ativos em ordem de código.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sys_volumes_ativos
+    ON sys_volumes (vol_co_volume)
+    WHERE vol_in_status = 'A';
+
+-- /busca por classificação ou tipo, já na ordem de vol_co_volume da paginação.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sys_volumes_classificacao_ativos
+    ON sys_volumes (vol_nu_classificacao, vol_co_volume)
+    WHERE vol_in_status = 'A';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sys_volumes_tipo_ativos
+    ON sys_volumes (vol_tp_volume, vol_co_volume)
+    WHERE vol_in_status = 'A';
@@ -0,0 +1,12 @@
+-- Contagens de reprodução para trending e top títulos (tabelas criadas pelos modelos).
+
+-- Janela do trending e limpeza das horas antigas: só as horas recentes, sem tocar o heap.
+CREATE INDEX IF NOT EXISTS ix_sys_volumes_contagem_hora_dt
+    ON sys_volumes_contagem_hora (volh_dt_hora)
+    INCLUDE (vol_co_volume, volh_nu_reproducoes);
+
+-- Totais do histórico que já existia; daqui em diante o app soma as novas reproduções.
+-- As horas não têm como ser reconstruídas: sys_volumes_reproducao não guarda a data.
+INSERT INTO sys_volumes_contagem (vol_co_volume, volc_nu_reproducoes)
+SELECT volr_co_volume, count(*) FROM sys_volumes_reproducao GROUP BY volr_co_volume
+ON CONFLICT (vol_co_volume) DO NOTHING;
@@ -0,0 +1,12 @@
+-- Cargas em massa (flask catalogo importar) ligam app.carga_em_massa na
+-- transação e mandam um único NOTIFY '*' no fim, em vez de um por linha.
+
+CREATE OR REPLACE FUNCTION fn_notify_sys_volumes() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('app.carga_em_massa', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('sys_volumes_changed', COALESCE(NEW.vol_co_volume, OLD.vol_co_volume)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
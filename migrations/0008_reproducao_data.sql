@@ -0,0 +1,5 @@
+-- Data de cada reprodução: a chave das partições mensais da 0010. Com DEFAULT
+-- não volátil o Postgres não reescreve a tabela; as linhas que já existiam
+-- ficam com a data desta migração.
+ALTER TABLE sys_volumes_reproducao
+    ADD COLUMN IF NOT EXISTS volr_dt_reproducao timestamptz NOT NULL DEFAULT now();
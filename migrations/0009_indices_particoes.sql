@@ -0,0 +1,10 @@
+-- migrate:no-transaction
+-- Os índices que a tabela particionada exige, criados antes e sem bloquear
+-- escritas: o ATTACH PARTITION da 0010 reaproveita em vez de recriar.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS sys_volumes_reproducao_legado_pkey
+    ON sys_volumes_reproducao (volr_co_reproducao, volr_dt_reproducao);
+
+-- /historico em ordem de data: cada partição responde com um index-only scan.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sys_volumes_reproducao_legado_usuario
+    ON sys_volumes_reproducao (usu_co_usuario, volr_dt_reproducao DESC, volr_co_reproducao DESC)
+    INCLUDE (volr_no_titulo, volr_tp_volume, volr_ep_temp);
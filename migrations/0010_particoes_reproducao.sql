@@ -0,0 +1,66 @@
+-- sys_volumes_reproducao passa a ser particionada por mês (UTC) de
+-- volr_dt_reproducao. A tabela atual vira a partição sys_volumes_reproducao_legado,
+-- sem copiar linhas, cobrindo tudo até o fim do mês corrente; os meses seguintes
+-- são criados aqui e mantidos pelo app (playback_partitions.ensure).
+
+DO $$
+DECLARE
+    sequencia text := pg_get_serial_sequence('sys_volumes_reproducao', 'volr_co_reproducao');
+    mes timestamp := date_trunc('month', now() AT TIME ZONE 'UTC');
+    ultimo timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months';
+    pk text;
+    fks text[];
+    fk text;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'sys_volumes_reproducao'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    SELECT conname INTO pk FROM pg_constraint WHERE conrelid = 'sys_volumes_reproducao'::regclass AND contype = 'p';
+    SELECT array_agg(pg_get_constraintdef(oid)) INTO fks
+    FROM pg_constraint WHERE conrelid = 'sys_volumes_reproducao'::regclass AND contype = 'f';
+
+    -- O trigger de NOTIFY passa para a tabela pai, que o replica em cada partição.
+    DROP TRIGGER IF EXISTS trg_notify_sys_volumes_reproducao ON sys_volumes_reproducao;
+    DROP INDEX IF EXISTS ix_sys_volumes_reproducao_usuario;
+    IF pk IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE sys_volumes_reproducao DROP CONSTRAINT %I', pk);
+    END IF;
+    ALTER TABLE sys_volumes_reproducao
+        ADD CONSTRAINT sys_volumes_reproducao_legado_pkey PRIMARY KEY USING INDEX sys_volumes_reproducao_legado_pkey;
+    ALTER TABLE sys_volumes_reproducao RENAME TO sys_volumes_reproducao_legado;
+
+    CREATE TABLE sys_volumes_reproducao (LIKE sys_volumes_reproducao_legado INCLUDING DEFAULTS)
+        PARTITION BY RANGE (volr_dt_reproducao);
+    ALTER TABLE sys_volumes_reproducao ADD PRIMARY KEY (volr_co_reproducao, volr_dt_reproducao);
+    CREATE INDEX ix_sys_volumes_reproducao_usuario
+        ON sys_volumes_reproducao (usu_co_usuario, volr_dt_reproducao DESC, volr_co_reproducao DESC)
+        INCLUDE (volr_no_titulo, volr_tp_volume, volr_ep_temp);
+    IF sequencia IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY sys_volumes_reproducao.volr_co_reproducao', sequencia);
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM sys_volumes_reproducao_legado) THEN
+        mes := mes + interval '1 month';
+        EXECUTE format('ALTER TABLE sys_volumes_reproducao ATTACH PARTITION sys_volumes_reproducao_legado '
+                       'FOR VALUES FROM (MINVALUE) TO (%L)', mes AT TIME ZONE 'UTC');
+    ELSE
+        DROP TABLE sys_volumes_reproducao_legado;
+    END IF;
+
+    FOREACH fk IN ARRAY coalesce(fks, '{}') LOOP
+        EXECUTE 'ALTER TABLE sys_volumes_reproducao ADD ' || fk;
+    END LOOP;
+
+    WHILE mes <= ultimo LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF sys_volumes_reproducao FOR VALUES FROM (%L) TO (%L)',
+                       'sys_volumes_reproducao_p' || to_char(mes, 'YYYY_MM'),
+                       mes AT TIME ZONE 'UTC', (mes + interval '1 month') AT TIME ZONE 'UTC');
+        mes := mes + interval '1 month';
+    END LOOP;
+
+    CREATE TRIGGER trg_notify_sys_volumes_reproducao
+        AFTER INSERT OR UPDATE OR DELETE ON sys_volumes_reproducao
+        FOR EACH ROW EXECUTE FUNCTION fn_notify_sys_volumes_reproducao();
+END;
+$$;
@@ -0,0 +1,90 @@
+import select
+import threading
+import time
+
+from psycopg2 import extensions
+
+
+class NotifyListener:
+    """Thread que escuta canais LISTEN/NOTIFY numa conexão dedicada, fora do pool."""
+
+    def __init__(self, connect, poll_interval=5.0, retry_interval=5.0):
+        self._connect = connect
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._handlers = {}
+        self._reconnect_handlers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.notifications = 0
+        self.reconnects = 0
+        self.connected = False
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._handlers.setdefault(channel, []).append(callback)
+
+    def on_reconnect(self, callback):
+        # Chamado a cada conexão, inclusive a primeira: o que foi guardado antes dela (ou
+        # enquanto desconectado) não recebeu notificações, e quem assina deve descartá-lo.
+        self._reconnect_handlers.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='pg-notify-listener', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        first = True
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cur = conn.cursor()
+                for channel in list(self._handlers):
+                    cur.execute(f'LISTEN "{channel}"')
+                self.connected = True
+                if not first:
+                    self.reconnects += 1
+                first = False
+                for callback in self._reconnect_handlers:
+                    callback()
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self.notifications += 1
+                        for callback in self._handlers.get(notify.channel, []):
+                            try:
+                                callback(notify.payload)
+                            except Exception:
+                                pass
+            except Exception:
+                self.connected = False
+                first = False
+                self._stop.wait(self.retry_interval)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def stats(self):
+        return {
+            'connected': self.connected,
+            'notifications': self.notifications,
+            'reconnects': self.reconnects,
+        }
@@ -0,0 +1,292 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+# Erros do próprio lote (FK, dado inválido, mês sem partição): repetir não resolve.
+LOTE_INVALIDO = (psycopg2.IntegrityError, psycopg2.DataError)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class KnownIds:
+    """Ids válidos em memória: todos os volumes e os usuários já vistos por este processo."""
+
+    def __init__(self, load_volumes, check_user, refresh_interval=60.0, max_users=100000, clock=time.monotonic):
+        self._load_volumes = load_volumes
+        self._check_user = check_user
+        self.refresh_interval = refresh_interval
+        self.max_users = max_users
+        self._clock = clock
+        self._volumes = None
+        self._loaded_at = None
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def volume(self, vol_co_volume):
+        volumes = self._volumes
+        if volumes is None or self._clock() - self._loaded_at >= self.refresh_interval:
+            volumes = self.refresh()
+        info = volumes.get(vol_co_volume)
+        if info is None and self._clock() - self._loaded_at >= 1.0:
+            # Título cadastrado depois do último carregamento.
+            info = self.refresh().get(vol_co_volume)
+        return info
+
+    def refresh(self):
+        volumes = {row[0]: (row[1], row[2]) for row in self._load_volumes()}
+        self._volumes = volumes
+        self._loaded_at = self._clock()
+        return volumes
+
+    def invalidate(self):
+        self._loaded_at = float('-inf')
+
+    def has_user(self, usu_co_usuario):
+        with self._lock:
+            if usu_co_usuario in self._users:
+                self._users.move_to_end(usu_co_usuario)
+                return True
+        if not self._check_user(usu_co_usuario):
+            return False
+        with self._lock:
+            self._users[usu_co_usuario] = True
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return True
+
+
+class PlaybackIngestor:
+    """Fila limitada de reproduções gravada em lote por uma thread, com spool em disco."""
+
+    INSERT_SQL = """
+        INSERT INTO sys_volumes_reproducao (volr_no_titulo, usu_co_usuario, volr_co_volume, volr_tp_volume, volr_ep_temp,
+                                            volr_dt_reproducao)
+        VALUES %s
+    """
+
+    def __init__(self, get_db, spool_dir, max_queue=10000, flush_size=500, flush_interval=1.0, fsync=False,
+                 max_attempts=5):
+        self._get_db = get_db
+        self.spool_dir = spool_dir
+        self.max_queue = max_queue
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._spool = None
+        self._segment = 0
+        self._pending = []
+        self._pending_events = 0
+        self._attempts = {}
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is not None:
+                return
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._recover()
+            self._open_segment()
+            self._thread = threading.Thread(target=self._run, name='playback-ingest', daemon=True)
+            self._thread.start()
+
+    def submit(self, usu_co_usuario, vol_co_volume, titulo, tipo, ep_temp=None):
+        # A data é a do aceite: um evento regravado depois cai no mesmo mês (partição) de origem.
+        event = [titulo, usu_co_usuario, vol_co_volume, tipo, ep_temp, datetime.now(timezone.utc).isoformat()]
+        line = json.dumps(event, ensure_ascii=False) + '\n'
+        with self._cond:
+            # Segmentos ainda não gravados contam: com o banco fora, a fila não cresce sem limite.
+            if len(self._queue) + self._pending_events >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull('Fila de reproduções cheia, tente novamente em instantes.')
+            # Grava no spool antes de aceitar: um crash depois do 202 não perde o evento.
+            self._spool.write(line)
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+            self._queue.append(event)
+            self.accepted += 1
+            if len(self._queue) >= self.flush_size:
+                self._cond.notify()
+
+    def flush(self):
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._cond:
+            if self._queue:
+                events = list(self._queue)
+                self._queue.clear()
+                self._spool.close()
+                segment = self._spool.name
+                self._pending.append((segment, events))
+                self._pending_events += len(events)
+                self._open_segment()
+            pending = list(self._pending)
+
+        for segment, events in pending:
+            start = time.monotonic()
+            try:
+                self._insert(events)
+                gravados = len(events)
+            except LOTE_INVALIDO:
+                self.failures += 1
+                self._attempts[segment] = self._attempts.get(segment, 0) + 1
+                if self._attempts[segment] < self.max_attempts:
+                    return False
+                try:
+                    gravados = self._insert_or_dead_letter(segment, events)
+                except Exception:
+                    return False
+            except Exception:
+                self.failures += 1
+                return False
+            os.remove(segment)
+            with self._cond:
+                self._pending.remove((segment, events))
+                self._pending_events -= len(events)
+            self._attempts.pop(segment, None)
+            self.flushed += gravados
+            self.batches += 1
+            self.last_flush_ms = (time.monotonic() - start) * 1000
+        return True
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        with self._cond:
+            if self._spool is not None and not self._queue:
+                self._spool.close()
+                os.remove(self._spool.name)
+                self._spool = None
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queued': len(self._queue),
+                'pending_segments': len(self._pending),
+                'pending_events': self._pending_events,
+                'max_queue': self.max_queue,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'flushed': self.flushed,
+                'batches': self.batches,
+                'failures': self.failures,
+                'dead_lettered': self.dead_lettered,
+                'last_flush_ms': self.last_flush_ms,
+            }
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                if len(self._queue) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+            if not self.flush():
+                self._stop.wait(self.flush_interval)
+
+    def _insert(self, events):
+        with self._get_db() as conn:
+            cur = conn.cursor()
+            execute_values(cur, self.INSERT_SQL, events, page_size=self.flush_size)
+            conn.commit()
+            cur.close()
+
+    def _insert_or_dead_letter(self, segment, events):
+        """Grava evento a evento; os que falham vão para {segmento}.dead e saem da fila."""
+        rejeitados = []
+        with self._get_db() as conn:
+            cur = conn.cursor()
+            for event in events:
+                cur.execute('SAVEPOINT evento')
+                try:
+                    execute_values(cur, self.INSERT_SQL, [event])
+                except LOTE_INVALIDO as e:
+                    cur.execute('ROLLBACK TO SAVEPOINT evento')
+                    rejeitados.append({'evento': event, 'erro': str(e).strip()})
+            conn.commit()
+            cur.close()
+        if rejeitados:
+            with open(os.path.splitext(segment)[0] + '.dead', 'a', encoding='utf-8') as f:
+                for rejeitado in rejeitados:
+                    f.write(json.dumps(rejeitado, ensure_ascii=False) + '\n')
+            self.dead_lettered += len(rejeitados)
+        return len(events) - len(rejeitados)
+
+    def _open_segment(self):
+        self._spool = open(self._segment_path(), 'a', encoding='utf-8')
+
+    def _segment_path(self):
+        self._segment += 1
+        return os.path.join(self.spool_dir, f'reproducao-{os.getpid()}-{int(time.time() * 1000)}-{self._segment}.spool')
+
+    def _recover(self):
+        # Segmentos deixados por um processo anterior: regrava tudo (entrega pelo menos uma vez).
+        for segment in sorted(glob.glob(os.path.join(self.spool_dir, 'reproducao-*.spool'))):
+            pid = int(os.path.basename(segment).split('-')[1])
+            if pid != os.getpid() and _process_alive(pid):
+                continue
+            # Rename atômico para um nome com o pid deste worker: os outros workers que
+            # sobem ao mesmo tempo passam a vê-lo como de um processo vivo e não o regravam.
+            claimed = self._segment_path()
+            try:
+                os.rename(segment, claimed)
+            except FileNotFoundError:
+                continue
+            segment = claimed
+            # Segmentos gravados antes de o evento levar a data: a última escrita é a melhor aproximação.
+            modificado_em = datetime.fromtimestamp(os.path.getmtime(segment), timezone.utc).isoformat()
+            events = []
+            with open(segment, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Última linha truncada por um crash no meio da escrita.
+                        continue
+                    if len(event) == 5:
+                        event.append(modificado_em)
+                    events.append(event)
+            if events:
+                self._pending.append((segment, events))
+                self._pending_events += len(events)
+            else:
+                os.remove(segment)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,216 @@
+"""Partições mensais de sys_volumes_reproducao e arquivamento das antigas.
+
+A tabela é particionada por intervalo em volr_dt_reproducao (migrations/0010),
+um mês UTC por partição. ensure() mantém criadas as partições do mês atual e
+dos próximos meses; archive() grava cada partição fora da retenção num CSV
+comprimido (o mesmo formato do COPY, com cabeçalho: volta com COPY ... FROM)
+e só então a remove da tabela.
+"""
+import gzip
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+TABELA = 'sys_volumes_reproducao'
+
+PARTICOES_SQL = """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = %s::regclass
+"""
+
+_LIMITES = re.compile(r"FROM \((MINVALUE|'[^']+')\) TO \((MAXVALUE|'[^']+')\)")
+
+
+class PartitionError(Exception):
+    pass
+
+
+class Partition:
+    __slots__ = ('name', 'lower', 'upper')
+
+    def __init__(self, name, lower, upper):
+        self.name = name
+        self.lower = lower
+        self.upper = upper
+
+
+def month_start(moment):
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month, table=TABELA):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def _bound(value):
+    if value in ('MINVALUE', 'MAXVALUE'):
+        return None
+    return datetime.fromisoformat(value.strip("'")).astimezone(timezone.utc)
+
+
+def list_partitions(cur, table=TABELA):
+    """Partições em ordem de intervalo; lower/upper None são MINVALUE/MAXVALUE."""
+    # Os limites saem como texto no fuso da sessão: em UTC o parse não depende do servidor.
+    cur.execute("SET LOCAL TimeZone = 'UTC'")
+    cur.execute(PARTICOES_SQL, (table,))
+    partitions = []
+    for name, expr in cur.fetchall():
+        match = _LIMITES.search(expr or '')
+        if match is None:
+            raise PartitionError(f'Partição {name} fora do esquema mensal: {expr}.')
+        partitions.append(Partition(name, _bound(match.group(1)), _bound(match.group(2))))
+    minimo = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(partitions, key=lambda p: p.lower or minimo)
+
+
+def ensure(conn, meses_futuros=3, table=TABELA, now=None):
+    """Cria as partições que faltam do mês atual até meses_futuros à frente; devolve os nomes criados."""
+    atual = month_start(now or datetime.now(timezone.utc))
+    ultimo = add_months(atual, meses_futuros)
+    cur = conn.cursor()
+    try:
+        # Vários processos chamam ensure ao subir: um cria, os outros encontram pronto.
+        cur.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', (table,))
+        partitions = list_partitions(cur, table)
+        if any(p.upper is None for p in partitions):
+            raise PartitionError(f'{table} tem partição até MAXVALUE; não há como criar meses novos.')
+        cobertura = max((p.upper for p in partitions), default=None)
+        mes = atual if cobertura is None or cobertura < atual else cobertura
+        criadas = []
+        while mes <= ultimo:
+            nome = partition_name(mes, table)
+            cur.execute(f'CREATE TABLE {nome} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)',
+                        (mes, add_months(mes, 1)))
+            criadas.append(nome)
+            mes = add_months(mes, 1)
+        conn.commit()
+        return criadas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def archive(conn, diretorio, retencao_meses, table=TABELA, now=None, lock_timeout='5s'):
+    """Arquiva e remove as partições que terminam antes do início da retenção.
+
+    Cada partição é gravada em {diretorio}/{nome}.csv.gz (arquivo temporário,
+    fsync e rename) e removida na mesma transação; se algo falhar no meio, a
+    partição continua na tabela e a próxima execução refaz o arquivo.
+    """
+    if retencao_meses < 1:
+        raise PartitionError('A retenção deve ser de pelo menos um mês.')
+    corte = add_months(month_start(now or datetime.now(timezone.utc)), -retencao_meses)
+    os.makedirs(diretorio, exist_ok=True)
+    cur = conn.cursor()
+    try:
+        antigas = [p for p in list_partitions(cur, table) if p.upper is not None and p.upper <= corte]
+        conn.commit()
+    finally:
+        cur.close()
+
+    arquivadas = []
+    for partition in antigas:
+        path = os.path.join(diretorio, f'{partition.name}.csv.gz')
+        tmp = path + '.tmp'
+        start = time.perf_counter()
+        cur = conn.cursor()
+        try:
+            # DETACH pede lock exclusivo na tabela pai: com lock_timeout a limpeza
+            # desiste e fica para a próxima vez em vez de enfileirar as leituras.
+            cur.execute('SET LOCAL lock_timeout = %s', (lock_timeout,))
+            cur.execute(f'LOCK TABLE {partition.name} IN SHARE MODE')
+            with gzip.open(tmp, 'wb') as f:
+                cur.copy_expert(f'COPY {partition.name} TO STDOUT WITH (FORMAT csv, HEADER)', f, size=65536)
+                linhas = cur.rowcount
+            with open(tmp, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            cur.execute(f'ALTER TABLE {table} DETACH PARTITION {partition.name}')
+            cur.execute(f'DROP TABLE {partition.name}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        finally:
+            cur.close()
+        arquivadas.append({
+            'particao': partition.name,
+            'ate': partition.upper.isoformat(),
+            'linhas': linhas,
+            'arquivo': path,
+            'bytes': os.path.getsize(path),
+            'duracao_ms': round((time.perf_counter() - start) * 1000, 1),
+        })
+    return arquivadas
+
+
+class PartitionMaintainer:
+    """Roda ensure() ao iniciar e a cada interval segundos numa thread de fundo."""
+
+    def __init__(self, get_db, meses_futuros=3, interval=6 * 3600.0):
+        self._get_db = get_db
+        self.meses_futuros = meses_futuros
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.failures = 0
+        self.created = []
+        self.last_run = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='playback-partitions', daemon=True)
+            self._thread.start()
+
+    def run_once(self):
+        try:
+            with self._get_db() as conn:
+                criadas = ensure(conn, self.meses_futuros)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            return False
+        self.runs += 1
+        self.created.extend(criadas)
+        self.last_run = datetime.now(timezone.utc).isoformat()
+        self.last_error = None
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self.run_once()
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def stats(self):
+        return {
+            'meses_futuros': self.meses_futuros,
+            'runs': self.runs,
+            'failures': self.failures,
+            'created': self.created[-12:],
+            'last_run': self.last_run,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,227 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from psycopg2.extras import execute_values
+
+from playback_ingest import QueueFull
+
+# Um único registro por (usuário, volume). Lotes atrasados não sobrescrevem
+# uma posição mais nova gravada por outro processo.
+UPSERT_SQL = """
+    INSERT INTO sys_volumes_progresso AS p
+        (usu_co_usuario, vol_co_volume, volp_ep_temp, volp_nu_posicao, volp_nu_duracao, volp_in_status, volp_dt_atualizacao)
+    VALUES %s
+    ON CONFLICT (usu_co_usuario, vol_co_volume) DO UPDATE SET
+        volp_ep_temp = EXCLUDED.volp_ep_temp,
+        volp_nu_posicao = EXCLUDED.volp_nu_posicao,
+        volp_nu_duracao = coalesce(EXCLUDED.volp_nu_duracao, p.volp_nu_duracao),
+        volp_in_status = EXCLUDED.volp_in_status,
+        volp_dt_atualizacao = EXCLUDED.volp_dt_atualizacao
+    WHERE p.volp_dt_atualizacao <= EXCLUDED.volp_dt_atualizacao
+"""
+
+CONTINUAR_SQL = """
+    SELECT p.vol_co_volume, p.volp_ep_temp, p.volp_nu_posicao, p.volp_nu_duracao, p.volp_dt_atualizacao,
+           v.vol_no_volume, v.vol_tp_volume
+    FROM (
+        SELECT vol_co_volume, volp_ep_temp, volp_nu_posicao, volp_nu_duracao, volp_dt_atualizacao
+        FROM sys_volumes_progresso
+        WHERE usu_co_usuario = %s AND volp_in_status = 'A'
+        ORDER BY volp_dt_atualizacao DESC
+        LIMIT %s
+    ) p
+    JOIN sys_volumes v ON v.vol_co_volume = p.vol_co_volume AND v.vol_in_status = 'A'
+    ORDER BY p.volp_dt_atualizacao DESC
+"""
+
+CONTINUAR_LIMITE_PADRAO = 20
+CONTINUAR_LIMITE_MAX = 100
+
+
+class ProgressError(Exception):
+    pass
+
+
+def parse_ep_temp(value):
+    if value is None:
+        return None
+    if not isinstance(value, str) or not 0 < len(value) <= 5:
+        raise ProgressError('O episódio/temporada deve ter entre 1 e 5 caracteres.')
+    return value
+
+
+def parse_progresso(data):
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ProgressError('O corpo da requisição deve ser um objeto JSON.')
+    if 'user_id' not in data or 'titulo_id' not in data or 'posicao' not in data:
+        raise ProgressError('ID do usuário, ID do título e posição são obrigatórios!')
+    for campo in ('user_id', 'titulo_id', 'posicao', 'duracao'):
+        value = data.get(campo)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 0):
+            raise ProgressError(f'O campo {campo} deve ser um inteiro não negativo.')
+    return {
+        'user_id': data['user_id'],
+        'titulo_id': data['titulo_id'],
+        'posicao': data['posicao'],
+        'duracao': data.get('duracao'),
+        'ep_temp': parse_ep_temp(data.get('ep_temp')),
+        'concluido': bool(data.get('concluido')),
+    }
+
+
+class ProgressCoalescer:
+    """Agrupa os heartbeats de progresso em memória e grava só o último de cada (usuário, volume).
+
+    Com um heartbeat a cada poucos segundos por espectador, o banco recebe no
+    máximo uma linha por título assistindo a cada flush_interval. O que ainda
+    não foi gravado se perde num crash: no máximo flush_interval de progresso.
+    """
+
+    def __init__(self, get_db, max_pending=50000, flush_interval=5.0, on_flush=None, clock=time.time):
+        self._get_db = get_db
+        self._on_flush = on_flush
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._by_user = {}
+        self._size = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.received = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='playback-progress', daemon=True)
+            self._thread.start()
+
+    def submit(self, usu_co_usuario, vol_co_volume, titulo, tipo, posicao, duracao=None, ep_temp=None,
+               concluido=False):
+        event = {
+            'vol_co_volume': vol_co_volume,
+            'vol_no_volume': titulo,
+            'vol_tp_volume': tipo,
+            'volp_ep_temp': ep_temp,
+            'volp_nu_posicao': posicao,
+            'volp_nu_duracao': duracao,
+            'volp_in_status': 'C' if concluido else 'A',
+            'volp_dt_atualizacao': datetime.fromtimestamp(self._clock(), timezone.utc),
+        }
+        with self._lock:
+            pending = self._by_user.get(usu_co_usuario)
+            if pending is not None and vol_co_volume in pending:
+                self.coalesced += 1
+            elif self._size >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull('Muitos progressos pendentes, tente novamente em instantes.')
+            else:
+                if pending is None:
+                    pending = self._by_user[usu_co_usuario] = {}
+                self._size += 1
+            pending[vol_co_volume] = event
+            self.received += 1
+
+    def pending(self, usu_co_usuario):
+        """Progressos deste usuário ainda não gravados, para sobrepor ao que veio do banco."""
+        with self._lock:
+            return list(self._by_user.get(usu_co_usuario, {}).values())
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._by_user, self._size = self._by_user, {}, 0
+            if not batch:
+                return True
+            rows = [(usu, vol, e['volp_ep_temp'], e['volp_nu_posicao'], e['volp_nu_duracao'], e['volp_in_status'],
+                     e['volp_dt_atualizacao'])
+                    for usu, events in batch.items() for vol, e in events.items()]
+            start = time.monotonic()
+            try:
+                with self._get_db() as conn:
+                    cur = conn.cursor()
+                    execute_values(cur, UPSERT_SQL, rows, page_size=1000)
+                    conn.commit()
+                    cur.close()
+            except Exception:
+                self.failures += 1
+                self._restore(batch)
+                return False
+            self.written += len(rows)
+            self.batches += 1
+            self.last_flush_ms = (time.monotonic() - start) * 1000
+            if self._on_flush is not None:
+                self._on_flush(list(batch))
+            return True
+
+    def _restore(self, batch):
+        # Devolve o lote que falhou sem sobrescrever heartbeats mais novos.
+        with self._lock:
+            for usu, events in batch.items():
+                pending = self._by_user.setdefault(usu, {})
+                for vol, event in events.items():
+                    if vol not in pending:
+                        pending[vol] = event
+                        self._size += 1
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._size,
+                'max_pending': self.max_pending,
+                'received': self.received,
+                'coalesced': self.coalesced,
+                'rejected': self.rejected,
+                'written': self.written,
+                'batches': self.batches,
+                'failures': self.failures,
+                'last_flush_ms': self.last_flush_ms,
+            }
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def merge_continuar(rows, pending, limite):
+    """Junta as linhas do banco com os heartbeats pendentes; o mais recente de cada volume vence."""
+    itens = {row['vol_co_volume']: row for row in rows}
+    for event in pending:
+        atual = itens.get(event['vol_co_volume'])
+        if atual is None or atual['volp_dt_atualizacao'] <= event['volp_dt_atualizacao']:
+            itens[event['vol_co_volume']] = event
+    ativos = [item for item in itens.values() if item.get('volp_in_status', 'A') == 'A']
+    ativos.sort(key=lambda item: item['volp_dt_atualizacao'], reverse=True)
+    return ativos[:limite]
+
+
+def serialize_continuar(item):
+    return {
+        'codigo': item['vol_co_volume'],
+        'titulo': item['vol_no_volume'],
+        'tipo': 'Filme' if item['vol_tp_volume'] == 'F' else 'Série',
+        'episodio_temporada': item['volp_ep_temp'] if item['vol_tp_volume'] == 'S' else None,
+        'posicao': item['volp_nu_posicao'],
+        'duracao': item['volp_nu_duracao'],
+        'atualizado_em': item['volp_dt_atualizacao'].isoformat(),
+    }
@@ -0,0 +1,144 @@
+LISTA_MAX_VOLUMES = 500
+
+# Lista com os títulos na ordem do array, em uma única consulta. O LEFT JOIN
+# LATERAL garante uma linha mesmo para listas vazias.
+LISTA_HIDRATADA_SQL = """
+    SELECT l.lrep_co_lista, l.lrep_no_lista, t.posicao, t.vol_co_volume,
+           v.vol_no_volume, v.vol_tx_small_descricao, v.vol_tp_volume, v.vol_in_status
+    FROM sys_lista_reproducao l
+    LEFT JOIN LATERAL unnest(l.vol_co_volume) WITH ORDINALITY AS t(vol_co_volume, posicao) ON true
+    LEFT JOIN sys_volumes v ON v.vol_co_volume = t.vol_co_volume
+    WHERE l.lrep_co_lista = %(lista)s AND l.usu_co_usuario = %(usuario)s AND l.lrep_in_status = 'A'
+    ORDER BY t.posicao
+"""
+
+LISTAS_USUARIO_SQL = """
+    SELECT lrep_co_lista, lrep_no_lista, coalesce(cardinality(vol_co_volume), 0) AS quantidade
+    FROM sys_lista_reproducao
+    WHERE usu_co_usuario = %(usuario)s AND lrep_in_status = 'A'
+    ORDER BY lrep_co_lista
+"""
+
+# "Quais listas contêm o título X": o @> usa o índice GIN do array.
+LISTAS_CONTENDO_SQL = """
+    SELECT lrep_co_lista, lrep_no_lista, coalesce(cardinality(vol_co_volume), 0) AS quantidade
+    FROM sys_lista_reproducao
+    WHERE usu_co_usuario = %(usuario)s AND lrep_in_status = 'A' AND vol_co_volume @> ARRAY[%(contem)s]::integer[]
+    ORDER BY lrep_co_lista
+"""
+
+_LISTA_ATIVA = "lrep_co_lista = %(lista)s AND usu_co_usuario = %(usuario)s AND lrep_in_status = 'A'"
+
+_NOVOS = """ARRAY(
+        SELECT t.v
+        FROM unnest(%(codigos)s::integer[]) WITH ORDINALITY AS t(v, o)
+        JOIN sys_volumes s ON s.vol_co_volume = t.v AND s.vol_in_status = 'A'
+        WHERE t.v <> ALL(coalesce(l.vol_co_volume, '{}'))
+        ORDER BY t.o
+    )"""
+
+# Os novos títulos vão para o fim, na ordem pedida, ignorando os que já estão
+# na lista e os inexistentes ou inativos. Um único UPDATE para o lote todo; se
+# a lista passaria de LISTA_MAX_VOLUMES, nenhuma linha é alterada.
+ADICIONAR_SQL = f"""
+    UPDATE sys_lista_reproducao l
+    SET vol_co_volume = coalesce(l.vol_co_volume, '{{}}') || {_NOVOS}
+    WHERE {_LISTA_ATIVA}
+      AND coalesce(cardinality(l.vol_co_volume), 0) + cardinality({_NOVOS}) <= {LISTA_MAX_VOLUMES}
+    RETURNING l.vol_co_volume
+"""
+
+REMOVER_SQL = f"""
+    UPDATE sys_lista_reproducao
+    SET vol_co_volume = array_remove(vol_co_volume, %(codigo)s)
+    WHERE {_LISTA_ATIVA}
+    RETURNING vol_co_volume
+"""
+
+REMOVER_LOTE_SQL = f"""
+    UPDATE sys_lista_reproducao
+    SET vol_co_volume = ARRAY(
+        SELECT t.v
+        FROM unnest(vol_co_volume) WITH ORDINALITY AS t(v, o)
+        WHERE t.v <> ALL(%(codigos)s::integer[])
+        ORDER BY t.o
+    )
+    WHERE {_LISTA_ATIVA}
+    RETURNING vol_co_volume
+"""
+
+# Só aplica a nova ordem se ela tiver exatamente os mesmos títulos da lista. Os
+# códigos chegam sem repetição; repetições de uma lista criada com ids duplicados
+# são comparadas como um título só e deixam de existir na nova ordem.
+REORDENAR_SQL = f"""
+    UPDATE sys_lista_reproducao
+    SET vol_co_volume = %(codigos)s::integer[]
+    WHERE {_LISTA_ATIVA}
+      AND vol_co_volume @> %(codigos)s::integer[] AND vol_co_volume <@ %(codigos)s::integer[]
+    RETURNING vol_co_volume
+"""
+
+LISTA_EXISTE_SQL = f"SELECT 1 FROM sys_lista_reproducao WHERE {_LISTA_ATIVA}"
+
+
+class PlaylistError(Exception):
+    pass
+
+
+def conflito(method):
+    """Mensagem do 409 quando o UPDATE não altera uma lista que existe."""
+    if method == 'POST':
+        return f'A lista pode ter no máximo {LISTA_MAX_VOLUMES} volumes.'
+    return 'A nova ordem deve conter exatamente os mesmos volumes da lista.'
+
+
+def _corpo(data):
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise PlaylistError('O corpo da requisição deve ser um objeto JSON.')
+    return data
+
+
+def parse_usuario(value):
+    if value is None or isinstance(value, bool):
+        raise PlaylistError('O ID do usuário é obrigatório.')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise PlaylistError('O ID do usuário deve ser um número inteiro.')
+
+
+def parse_codigos(data):
+    """Valida `codigos_volumes`: inteiros, sem repetição, na ordem recebida."""
+    codigos = _corpo(data).get('codigos_volumes')
+    if not isinstance(codigos, list) or not codigos:
+        raise PlaylistError('Envie os códigos dos volumes em uma lista não vazia.')
+    if len(codigos) > LISTA_MAX_VOLUMES:
+        raise PlaylistError(f'A lista pode ter no máximo {LISTA_MAX_VOLUMES} volumes.')
+    if any(isinstance(codigo, bool) or not isinstance(codigo, int) for codigo in codigos):
+        raise PlaylistError('Os códigos dos volumes devem ser números inteiros.')
+    return list(dict.fromkeys(codigos))
+
+
+def parse_alteracao(data):
+    data = _corpo(data)
+    return parse_usuario(data.get('user_id')), parse_codigos(data)
+
+
+def serialize_lista(rows):
+    primeira = rows[0]
+    itens = [{
+        'posicao': row['posicao'],
+        'codigo': row['vol_co_volume'],
+        'titulo': row['vol_no_volume'],
+        'descricao': row['vol_tx_small_descricao'],
+        'tipo': row['vol_tp_volume'],
+        # Títulos removidos ou inativados continuam na lista, só não estão disponíveis.
+        'disponivel': row['vol_in_status'] == 'A',
+    } for row in rows if row['posicao'] is not None]
+    return {'lrep_co_lista': primeira['lrep_co_lista'], 'nome': primeira['lrep_no_lista'], 'itens': itens}
+
+
+def serialize_resumo(row):
+    return {'lrep_co_lista': row['lrep_co_lista'], 'nome': row['lrep_no_lista'], 'quantidade': row['quantidade']}
@@ -0,0 +1,312 @@
+"""Recomendações "porque você assistiu X" por coocorrência item a item.
+
+O job (`flask recomendacoes`) lê os pares (usuário, volume) de
+sys_volumes_reproducao, monta a matriz esparsa usuário × volume e calcula a
+similaridade de cosseno entre volumes em blocos, com produtos de matrizes
+esparsas. Só os K vizinhos de cada volume são gravados, num .npy que o app
+abre com mmap: a consulta lê uma linha de tamanho fixo, sem ir ao banco, e as
+páginas são compartilhadas entre os workers.
+
+numpy e scipy só são importados no job e na primeira consulta, fora do startup
+do app.
+"""
+import json
+import os
+import threading
+import time
+from array import array
+
+RECOMENDACOES_K = 50
+RECOMENDACOES_LIMITE_PADRAO = 10
+RECOMENDACOES_LIMITE_MAX = 50
+
+PARES_SQL = "SELECT usu_co_usuario, volr_co_volume FROM sys_volumes_reproducao"
+MARCA_SQL = "SELECT coalesce(max(volr_co_reproducao), 0), count(*) FROM sys_volumes_reproducao"
+
+# Sementes do usuário: títulos distintos das reproduções mais recentes.
+SEMENTES_SQL = """
+    SELECT volr_co_volume, volr_no_titulo
+    FROM sys_volumes_reproducao
+    WHERE usu_co_usuario = %s
+    ORDER BY volr_dt_reproducao DESC, volr_co_reproducao DESC
+    LIMIT %s
+"""
+
+HIDRATAR_SQL = """
+    SELECT vol_co_volume, vol_no_volume, vol_tx_small_descricao, vol_tp_volume
+    FROM sys_volumes
+    WHERE vol_co_volume = ANY(%s) AND vol_in_status = 'A'
+"""
+
+
+class RecommendationsUnavailable(Exception):
+    pass
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RecommendationsUnavailable('Recomendações indisponíveis: numpy não instalado (pip install -r requirements.txt).')
+    return numpy
+
+
+def _sparse():
+    _numpy()
+    try:
+        from scipy import sparse
+    except ImportError:
+        raise RecommendationsUnavailable('numpy e scipy são necessários para calcular as recomendações '
+                                         '(pip install -r requirements.txt).')
+    return sparse
+
+
+def dtype(k):
+    np = _numpy()
+    return np.dtype([('volume', '<i4'), ('vizinhos', '<i4', (k,)), ('scores', '<f4', (k,))])
+
+
+def load_pairs(conn, itersize=100000):
+    """Pares (usuários, volumes) como arrays int32, e a marca (último id, total) da leitura."""
+    np = _numpy()
+    cur = conn.cursor()
+    cur.execute(MARCA_SQL)
+    marca = tuple(cur.fetchone())
+    cur.close()
+
+    usuarios, volumes = array('i'), array('i')
+    cur = conn.cursor(name='recomendacoes_pares')
+    cur.itersize = itersize
+    cur.execute(PARES_SQL)
+    while True:
+        rows = cur.fetchmany(itersize)
+        if not rows:
+            break
+        for usuario, volume in rows:
+            usuarios.append(usuario)
+            volumes.append(volume)
+    cur.close()
+    conn.commit()
+    return np.frombuffer(usuarios, dtype=np.int32), np.frombuffer(volumes, dtype=np.int32), marca
+
+
+def build_neighbors(usuarios, volumes, k=RECOMENDACOES_K, min_coocorrencias=2, max_por_usuario=2000,
+                    memoria_bloco=64 * 1024 * 1024):
+    """Top-k vizinhos de cada volume por cosseno entre as colunas binárias usuário × volume.
+
+    Reassistir não conta duas vezes. Pares vistos juntos por menos de
+    min_coocorrencias usuários são ruído e ficam de fora, assim como contas
+    com mais de max_por_usuario títulos distintos (robôs, contas de teste):
+    o custo de cada usuário é quadrático no tamanho do histórico. A matriz
+    volume × volume nunca existe inteira: cada bloco de linhas é calculado,
+    reduzido ao top-k e descartado, com pico aproximado de memoria_bloco.
+    """
+    np, sparse = _numpy(), _sparse()
+    tabela = np.zeros(0, dtype=dtype(k))
+    if len(volumes) == 0:
+        return tabela
+
+    ids, coluna = np.unique(volumes, return_inverse=True)
+    _, linha = np.unique(usuarios, return_inverse=True)
+    m = len(ids)
+    x = sparse.csr_matrix((np.ones(len(linha), dtype=np.float32), (linha, coluna)), shape=(linha.max() + 1, m))
+    x.data[:] = 1
+    por_usuario = np.diff(x.indptr)
+    if por_usuario.max() > max_por_usuario:
+        x = sparse.diags((por_usuario <= max_por_usuario).astype(np.float32)) @ x
+        x.eliminate_zeros()
+    xt = x.T.tocsr()
+    vistos = np.asarray(x.sum(axis=0), dtype=np.float32).ravel()
+    norma = np.divide(1, np.sqrt(vistos), out=np.zeros_like(vistos), where=vistos > 0)
+
+    tabela = np.zeros(m, dtype=dtype(k))
+    tabela['volume'] = ids
+    tabela['vizinhos'] = -1
+    kk = min(k, m - 1)
+    if kk == 0:
+        return tabela
+    # Bloco denso de contagens, mais as cópias do argpartition (índices int64).
+    bloco = max(1, memoria_bloco // (m * 16))
+    for a in range(0, m, bloco):
+        b = min(m, a + bloco)
+        c = (xt[a:b] @ x).toarray()
+        c[np.arange(b - a), np.arange(a, b)] = 0
+        c[c < min_coocorrencias] = 0
+        c *= norma[a:b, None]
+        c *= norma[None, :]
+        top = np.argpartition(-c, kk - 1, axis=1)[:, :kk]
+        scores = np.take_along_axis(c, top, axis=1)
+        ordem = np.argsort(-scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, ordem, axis=1)
+        scores = np.take_along_axis(scores, ordem, axis=1)
+        tabela['vizinhos'][a:b, :kk] = np.where(scores > 0, ids[top], -1)
+        tabela['scores'][a:b, :kk] = np.where(scores > 0, np.minimum(scores, 1), 0)
+    return tabela
+
+
+def save(path, tabela, meta):
+    """Publica a tabela de forma atômica: leitores com o arquivo antigo aberto não são afetados."""
+    np = _numpy()
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, tabela)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, path + '.json')
+
+
+def load_meta(path):
+    try:
+        with open(path + '.json', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_job(connect, path, k=RECOMENDACOES_K, min_coocorrencias=2, forcar=False):
+    """Recalcula e publica os vizinhos; não faz nada se não houve reprodução nova desde a última execução."""
+    inicio = time.perf_counter()
+    conn = connect()
+    try:
+        anterior = load_meta(path)
+        if not forcar and anterior is not None and anterior.get('k') == k:
+            cur = conn.cursor()
+            cur.execute(MARCA_SQL)
+            if list(cur.fetchone()) == anterior.get('marca'):
+                cur.close()
+                return None
+            cur.close()
+        usuarios, volumes, marca = load_pairs(conn)
+    finally:
+        conn.close()
+    leitura_ms = (time.perf_counter() - inicio) * 1000
+    tabela = build_neighbors(usuarios, volumes, k, min_coocorrencias)
+    meta = {
+        'k': k,
+        'marca': list(marca),
+        'pares': len(volumes),
+        'volumes': len(tabela),
+        'leitura_ms': round(leitura_ms, 1),
+        'calculo_ms': round((time.perf_counter() - inicio) * 1000 - leitura_ms, 1),
+        'gerado_em': time.time(),
+    }
+    save(path, tabela, meta)
+    return meta
+
+
+class Recommendations:
+    """Vizinhos pré-calculados via mmap; reabre o arquivo quando o job publica um novo."""
+
+    def __init__(self, path, check_interval=30.0, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tabela = None
+        self._volumes = None
+        self._assinatura = None
+        self._checked_at = None
+        self.lookups = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _current(self):
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    self._reload()
+        return self._tabela, self._volumes
+
+    def _reload(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        assinatura = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if assinatura == self._assinatura:
+            return
+        np = _numpy()
+        tabela = np.load(self.path, mmap_mode='r')
+        # Só a coluna de ids vai para a memória do processo (4 bytes por título), para a busca binária.
+        self._tabela, self._volumes, self._assinatura = tabela, np.ascontiguousarray(tabela['volume']), assinatura
+        self.reloads += 1
+
+    def available(self):
+        try:
+            return self._current()[0] is not None
+        except RecommendationsUnavailable:
+            return False
+
+    def neighbors(self, vol_co_volume):
+        """[(volume, score), ...] em ordem decrescente de similaridade."""
+        np = _numpy()
+        tabela, volumes = self._current()
+        if tabela is None:
+            raise RecommendationsUnavailable('Recomendações ainda não foram calculadas.')
+        self.lookups += 1
+        i = int(np.searchsorted(volumes, vol_co_volume))
+        if i == len(volumes) or volumes[i] != vol_co_volume:
+            self.misses += 1
+            return []
+        linha = tabela[i]
+        return [(v, s) for v, s in zip(linha['vizinhos'].tolist(), linha['scores'].tolist()) if v >= 0]
+
+    def stats(self):
+        try:
+            tabela, _ = self._current()
+        except RecommendationsUnavailable:
+            tabela = None
+        return {
+            'disponivel': tabela is not None,
+            'path': self.path,
+            'volumes': len(tabela) if tabela is not None else 0,
+            'k': tabela.dtype['vizinhos'].shape[0] if tabela is not None else None,
+            'lookups': self.lookups,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'job': load_meta(self.path),
+        }
+
+
+def seeds(rows, quantidade):
+    """Volumes distintos, do mais recente ao mais antigo, das linhas de SEMENTES_SQL."""
+    sementes = {}
+    for volume, titulo in rows:
+        if volume not in sementes:
+            sementes[volume] = titulo
+            if len(sementes) == quantidade:
+                break
+    return sementes
+
+
+def group(sementes, vizinhos, disponiveis, limite, vistos=()):
+    """Um grupo por semente; cada título aparece uma vez, no grupo da semente mais recente."""
+    usados = set(vistos) | set(sementes)
+    grupos = []
+    for semente in sementes:
+        titulos = []
+        for volume, score in vizinhos.get(semente, ()):
+            if volume in usados or volume not in disponiveis:
+                continue
+            usados.add(volume)
+            titulos.append((volume, score))
+            if len(titulos) == limite:
+                break
+        if titulos:
+            grupos.append((semente, titulos))
+    return grupos
+
+
+def serialize_titulo(row, score):
+    return {
+        'codigo': row['vol_co_volume'],
+        'titulo': row['vol_no_volume'],
+        'descricao': row['vol_tx_small_descricao'],
+        'tipo': 'Filme' if row['vol_tp_volume'] == 'F' else 'Série',
+        'score': round(score, 4),
+    }
@@ -0,0 +1,209 @@
+import gzip
+import hashlib
+import json
+import secrets
+import threading
+from array import array
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODING_SUFFIX = {'br': '-br', 'gzip': '-gzip'}
+
+
+def dumps(obj):
+    """Serializa para bytes JSON; usa orjson quando instalado."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def content_etag(body):
+    return '"c' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class VersionMap:
+    """Contadores de versão por chave, incrementados pelos NOTIFY do banco.
+
+    Chaves são distribuídas em `slots` contadores fixos: uma colisão só custa
+    um 200 a mais, nunca um 304 indevido. A época é aleatória por processo e
+    muda em reset(), então ETags emitidas antes de um restart ou de uma
+    reconexão do listener deixam de casar.
+    """
+
+    def __init__(self, prefix, slots=65536):
+        self.prefix = prefix
+        self._versions = array('Q', bytes(8 * slots))
+        self.epoch = secrets.randbits(32)
+
+    def bump(self, key):
+        self._versions[hash(key) % len(self._versions)] += 1
+
+    def reset(self):
+        self.epoch = secrets.randbits(32)
+
+    def version(self, key):
+        return self._versions[hash(key) % len(self._versions)]
+
+    def etag(self, key, *variant):
+        tag = f'{self.prefix}{self.epoch:x}.{self.version(key):x}.{key}'
+        if variant:
+            tag += '.' + hashlib.blake2b(repr(variant).encode('utf-8'), digest_size=6).hexdigest()
+        return f'"{tag}"'
+
+
+class EncodedBody:
+    """Corpo JSON pronto para envio; as versões comprimidas são geradas uma única vez."""
+
+    __slots__ = ('body', 'etag', 'headers', '_variants', '_lock')
+
+    def __init__(self, body, etag, headers=None):
+        self.body = body
+        self.etag = etag
+        self.headers = headers or {}
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding):
+        data = self._variants.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._variants.get(encoding)
+                if data is None:
+                    if encoding == 'br':
+                        data = brotli.compress(self.body, quality=5)
+                    else:
+                        data = gzip.compress(self.body, compresslevel=6, mtime=0)
+                    self._variants[encoding] = data
+        return data
+
+
+class ResponseCache:
+    """LRU de EncodedBody por ETag, limitado por bytes.
+
+    Cada entrada conta como o dobro do corpo: o original mais a variante
+    comprimida que normalmente acompanha.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag):
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return entry
+
+    def set(self, entry):
+        cost = 2 * len(entry.body)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(entry.etag, None)
+            if old is not None:
+                self._bytes -= 2 * len(old.body)
+            self._entries[entry.etag] = entry
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= 2 * len(old.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match casa com a ETag em qualquer uma das codificações."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    base = etag.strip('"')
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for suffix in ENCODING_SUFFIX.values():
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)]
+                break
+        if candidate == base:
+            return True
+    return False
+
+
+def negotiate(accept_encoding):
+    accept_encoding = (accept_encoding or '').lower()
+    offered = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    if brotli is not None and offered.get('br', 0) > 0:
+        return 'br'
+    if offered.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def not_modified(etag, headers=None):
+    headers = dict(headers or {})
+    headers['Cache-Control'] = 'private, no-cache'
+    headers['Vary'] = 'Accept-Encoding'
+    headers['ETag'] = etag
+    return 304, b'', headers
+
+
+def conditional(entry, if_none_match, accept_encoding, min_size=1024):
+    """Resolve (status, corpo, headers) para uma EncodedBody, independente do framework."""
+    headers = dict(entry.headers)
+    headers['Cache-Control'] = 'private, no-cache'
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate(accept_encoding) if len(entry.body) >= min_size else None
+    etag = entry.etag
+    if encoding is not None:
+        etag = etag[:-1] + ENCODING_SUFFIX[encoding] + '"'
+    headers['ETag'] = etag
+    if etag_matches(if_none_match, entry.etag):
+        return 304, b'', headers
+    if encoding is None:
+        return 200, entry.body, headers
+    headers['Content-Encoding'] = encoding
+    return 200, entry.variant(encoding), headers
@@ -0,0 +1,307 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from psycopg2.extras import execute_values
+
+from responses import EncodedBody, content_etag, dumps
+
+TRENDING_LIMITE_PADRAO = 20
+TRENDING_LIMITE_MAX = 50
+
+# Somas, não valores: cada processo grava só o que contou desde o último flush.
+UPSERT_HORA_SQL = """
+    INSERT INTO sys_volumes_contagem_hora AS c (vol_co_volume, volh_dt_hora, volh_nu_reproducoes)
+    VALUES %s
+    ON CONFLICT (vol_co_volume, volh_dt_hora) DO UPDATE SET
+        volh_nu_reproducoes = c.volh_nu_reproducoes + EXCLUDED.volh_nu_reproducoes
+"""
+
+UPSERT_TOTAL_SQL = """
+    INSERT INTO sys_volumes_contagem AS c (vol_co_volume, volc_nu_reproducoes)
+    VALUES %s
+    ON CONFLICT (vol_co_volume) DO UPDATE SET
+        volc_nu_reproducoes = c.volc_nu_reproducoes + EXCLUDED.volc_nu_reproducoes
+"""
+
+LIMPAR_HORAS_SQL = "DELETE FROM sys_volumes_contagem_hora WHERE volh_dt_hora < now() - %s * interval '1 hour'"
+
+_RANKING_COLUNAS = """
+    v.vol_no_volume, v.vol_tx_small_descricao, v.vol_tp_genero, v.vol_tp_volume,
+    row_number() OVER (ORDER BY r.score DESC, r.vol_co_volume) AS posicao,
+    row_number() OVER (PARTITION BY v.vol_tp_genero ORDER BY r.score DESC, r.vol_co_volume) AS posicao_genero
+"""
+
+# Cada hora pesa exp(-idade / tau): com tau = meia-vida / ln 2, uma reprodução
+# de meia-vida atrás vale metade de uma de agora. Lê só as horas da janela,
+# então o custo não depende do tamanho do histórico.
+TRENDING_SQL = f"""
+    WITH r AS (
+        SELECT vol_co_volume, sum(volh_nu_reproducoes) AS reproducoes,
+               sum(volh_nu_reproducoes * exp(-extract(epoch FROM now() - volh_dt_hora)::float8 / %(tau)s)) AS score
+        FROM sys_volumes_contagem_hora
+        WHERE volh_dt_hora >= now() - %(janela)s * interval '1 hour'
+        GROUP BY vol_co_volume
+    )
+    SELECT * FROM (
+        SELECT r.vol_co_volume, r.reproducoes, r.score, {_RANKING_COLUNAS}
+        FROM r JOIN sys_volumes v ON v.vol_co_volume = r.vol_co_volume AND v.vol_in_status = 'A'
+    ) t
+    WHERE posicao <= %(limite)s OR posicao_genero <= %(limite)s
+    ORDER BY posicao
+"""
+
+TOP_SQL = f"""
+    WITH r AS (
+        SELECT vol_co_volume, volc_nu_reproducoes AS reproducoes, volc_nu_reproducoes AS score
+        FROM sys_volumes_contagem
+    )
+    SELECT * FROM (
+        SELECT r.vol_co_volume, r.reproducoes, r.score, {_RANKING_COLUNAS}
+        FROM r JOIN sys_volumes v ON v.vol_co_volume = r.vol_co_volume AND v.vol_in_status = 'A'
+    ) t
+    WHERE posicao <= %(limite)s OR posicao_genero <= %(limite)s
+    ORDER BY posicao
+"""
+
+GENEROS_SQL = """
+    SELECT v.vol_tp_genero, sum(h.volh_nu_reproducoes) AS reproducoes
+    FROM sys_volumes_contagem_hora h
+    JOIN sys_volumes v ON v.vol_co_volume = h.vol_co_volume
+    WHERE h.volh_dt_hora >= now() - %(janela)s * interval '1 hour'
+    GROUP BY v.vol_tp_genero
+    ORDER BY reproducoes DESC
+"""
+
+
+def hour_bucket(timestamp):
+    return datetime.fromtimestamp(timestamp - timestamp % 3600, timezone.utc)
+
+
+class PlaybackRollup:
+    """Conta reproduções por (volume, hora) em memória e soma ao banco a cada flush_interval.
+
+    Um flush é um único upsert por tabela, qualquer que seja o volume de
+    reproduções. Num crash perde-se no máximo flush_interval de contagens.
+    """
+
+    def __init__(self, get_db, flush_interval=10.0, retencao_horas=168, clock=time.time):
+        self._get_db = get_db
+        self.flush_interval = flush_interval
+        self.retencao_horas = retencao_horas
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counts = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._cleaned_at = None
+
+        self.received = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='playback-rollup', daemon=True)
+            self._thread.start()
+
+    def add(self, vol_co_volume, n=1):
+        bucket = hour_bucket(self._clock())
+        with self._lock:
+            self._counts[vol_co_volume, bucket] += n
+            self.received += n
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return True
+            # A limpeza das horas fora da retenção vai junto com um flush, no máximo uma vez por hora.
+            now = self._clock()
+            limpar = self._cleaned_at is None or now - self._cleaned_at >= 3600
+            totais = Counter()
+            for (vol, _), n in counts.items():
+                totais[vol] += n
+            start = time.monotonic()
+            try:
+                with self._get_db() as conn:
+                    cur = conn.cursor()
+                    # Linhas em ordem: workers somando nos mesmos títulos populares não entram em deadlock.
+                    execute_values(cur, UPSERT_HORA_SQL, [(vol, hora, n) for (vol, hora), n in sorted(counts.items())],
+                                   page_size=1000)
+                    execute_values(cur, UPSERT_TOTAL_SQL, sorted(totais.items()), page_size=1000)
+                    if limpar:
+                        cur.execute(LIMPAR_HORAS_SQL, (self.retencao_horas,))
+                    conn.commit()
+                    cur.close()
+            except Exception:
+                self.failures += 1
+                with self._lock:
+                    self._counts.update(counts)
+                return False
+            if limpar:
+                self._cleaned_at = now
+            self.written += sum(counts.values())
+            self.batches += 1
+            self.last_flush_ms = (time.monotonic() - start) * 1000
+            return True
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': sum(self._counts.values()),
+                'buckets': len(self._counts),
+                'received': self.received,
+                'written': self.written,
+                'batches': self.batches,
+                'failures': self.failures,
+                'last_flush_ms': self.last_flush_ms,
+            }
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def serialize_ranking(row):
+    return {
+        'codigo': row['vol_co_volume'],
+        'titulo': row['vol_no_volume'],
+        'descricao': row['vol_tx_small_descricao'],
+        'genero': row['vol_tp_genero'],
+        'tipo': 'Filme' if row['vol_tp_volume'] == 'F' else 'Série',
+        'reproducoes': int(row['reproducoes']),
+        'score': round(float(row['score']), 4),
+    }
+
+
+class Ranking:
+    """Geração imutável de trending e top; os corpos JSON são montados uma vez por (lista, gênero, limite)."""
+
+    __slots__ = ('generation', 'listas', 'generos', 'gerado_em', 'load_ms', '_bodies', '_lock')
+
+    def __init__(self, generation, trending, top, generos, gerado_em, load_ms=0.0):
+        self.generation = generation
+        self.listas = {'trending': self._index(trending), 'top': self._index(top)}
+        self.generos = [{'genero': genero, 'reproducoes': int(reproducoes)} for genero, reproducoes in generos]
+        self.gerado_em = gerado_em
+        self.load_ms = load_ms
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(rows):
+        geral, por_genero = [], {}
+        for row in rows:
+            item = serialize_ranking(row)
+            if row['posicao'] <= TRENDING_LIMITE_MAX:
+                geral.append(item)
+            if row['posicao_genero'] <= TRENDING_LIMITE_MAX:
+                por_genero.setdefault((row['vol_tp_genero'] or '').lower(), []).append(item)
+        return {None: geral, **por_genero}
+
+    def body(self, lista, genero=None, limite=TRENDING_LIMITE_PADRAO):
+        genero = genero.lower() if genero else None
+        titulos = self.listas[lista].get(genero)
+        if titulos is None:
+            # Gênero desconhecido: uma única entrada vazia, para o cache não crescer com o que vier na URL.
+            genero, titulos = False, []
+        key = (lista, genero, limite)
+        entry = self._bodies.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._bodies.get(key)
+                if entry is None:
+                    corpo = {'gerado_em': self.gerado_em, 'titulos': titulos[:limite]}
+                    if lista == 'trending':
+                        corpo['generos'] = self.generos
+                    data = dumps(corpo)
+                    entry = self._bodies[key] = EncodedBody(data, content_etag(data))
+        return entry
+
+
+class Rankings:
+    """Trending e top títulos recalculados a partir das tabelas de contagem a cada refresh_interval."""
+
+    def __init__(self, load, refresh_interval=60.0, clock=time.monotonic):
+        self._load = load
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._ranking = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def ready(self):
+        return self._ranking is not None
+
+    def current(self):
+        """Ranking atual; o primeiro pedido carrega de forma síncrona."""
+        ranking = self._ranking
+        if ranking is None:
+            ranking = self.refresh()
+        self.start()
+        return ranking
+
+    def refresh(self):
+        with self._refresh_lock:
+            start = self._clock()
+            try:
+                trending, top, generos = self._load(TRENDING_LIMITE_MAX)
+            except Exception:
+                self.failures += 1
+                raise
+            generation = self._ranking.generation + 1 if self._ranking is not None else 1
+            ranking = Ranking(generation, trending, top, generos, datetime.now(timezone.utc).isoformat(),
+                              (self._clock() - start) * 1000)
+            self._ranking = ranking
+            self.refreshes += 1
+            return ranking
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='rankings-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                pass
+
+    def stats(self):
+        ranking = self._ranking
+        return {
+            'generation': ranking.generation if ranking is not None else 0,
+            'gerado_em': ranking.gerado_em if ranking is not None else None,
+            'load_ms': ranking.load_ms if ranking is not None else None,
+            'trending': len(ranking.listas['trending'][None]) if ranking is not None else 0,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+        }
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+NO_TRANSACTION = '-- migrate:no-transaction'
+# Chave do advisory lock: dois deploys simultâneos não aplicam a mesma migração.
+LOCK_KEY = 4815162342
+
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        checksum VARCHAR(64) NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+_FILE_NAME = re.compile(r'^(\d{4})_(\w+)\.sql$')
+_CONCURRENT_INDEX = re.compile(r'CREATE\s+INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)', re.IGNORECASE)
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    __slots__ = ('version', 'name', 'sql', 'checksum', 'transactional')
+
+    def __init__(self, version, name, sql):
+        self.version = version
+        self.name = name
+        self.sql = sql
+        self.checksum = hashlib.sha256(sql.encode('utf-8')).hexdigest()
+        self.transactional = not sql.lstrip().startswith(NO_TRANSACTION)
+
+    def statements(self):
+        # Só para arquivos sem transação, que não podem ter corpos $$ ... $$.
+        for statement in re.split(r';\s*(?:\n|$)', self.sql):
+            lines = [line for line in statement.splitlines() if line.strip() and not line.strip().startswith('--')]
+            if lines:
+                yield '\n'.join(lines)
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    migrations = []
+    for file_name in sorted(os.listdir(directory)):
+        match = _FILE_NAME.match(file_name)
+        if not match:
+            continue
+        with open(os.path.join(directory, file_name), encoding='utf-8') as f:
+            migrations.append(Migration(int(match.group(1)), match.group(2), f.read()))
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise MigrationError('Há duas migrações com o mesmo número de versão.')
+    return migrations
+
+
+def applied_migrations(cur):
+    cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return {}
+    cur.execute('SELECT version, checksum, applied_at FROM schema_migrations')
+    return {version: (checksum, applied_at) for version, checksum, applied_at in cur.fetchall()}
+
+
+def migrate(connect, directory=MIGRATIONS_DIR):
+    """Aplica, em ordem, as migrações ainda não registradas em schema_migrations; devolve as aplicadas."""
+    migrations = load_migrations(directory)
+    conn = connect()
+    conn.autocommit = True
+    cur = conn.cursor()
+    applied = []
+    try:
+        cur.execute('SELECT pg_advisory_lock(%s)', (LOCK_KEY,))
+        cur.execute(SCHEMA_MIGRATIONS_DDL)
+        done = applied_migrations(cur)
+        for migration in migrations:
+            if migration.version in done:
+                if done[migration.version][0] != migration.checksum:
+                    raise MigrationError(
+                        f'A migração {migration.version:04d}_{migration.name} foi alterada depois de aplicada; '
+                        'crie uma nova versão em vez de editar a antiga.')
+                continue
+            if migration.transactional:
+                conn.autocommit = False
+                try:
+                    cur.execute(migration.sql)
+                    _record(cur, migration)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.autocommit = True
+            else:
+                for statement in migration.statements():
+                    _drop_invalid_index(cur, statement)
+                    cur.execute(statement)
+                _record(cur, migration)
+            applied.append(migration)
+    finally:
+        try:
+            cur.execute('SELECT pg_advisory_unlock(%s)', (LOCK_KEY,))
+        finally:
+            cur.close()
+            conn.close()
+    return applied
+
+
+def status(connect, directory=MIGRATIONS_DIR):
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        done = applied_migrations(cur)
+        cur.close()
+    finally:
+        conn.close()
+    return [(migration.version, migration.name, done.get(migration.version, (None, None))[1])
+            for migration in load_migrations(directory)]
+
+
+def _record(cur, migration):
+    cur.execute('INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)',
+                (migration.version, migration.name, migration.checksum))
+
+
+def _drop_invalid_index(cur, statement):
+    # Um CREATE INDEX CONCURRENTLY interrompido deixa o índice inválido, e o
+    # IF NOT EXISTS o pularia na nova tentativa.
+    match = _CONCURRENT_INDEX.search(statement)
+    if not match:
+        return
+    cur.execute("""
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace AND NOT i.indisvalid
+    """, (match.group(1),))
+    if cur.fetchone():
+        cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}')
@@ -0,0 +1,91 @@
+BUSCA_LIMITE_PADRAO = 20
+BUSCA_LIMITE_MAX = 100
+
+
+class SearchError(Exception):
+    pass
+
+
+def _texto(data, campo):
+    value = data.get(campo)
+    if value is None:
+        return None
+    # vol_nu_classificacao é texto ('16'), mas clientes mandam o número.
+    if campo == 'classificacao' and isinstance(value, int) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        raise SearchError(f'O campo {campo} deve ser um texto.')
+    return value.strip() or None
+
+
+def parse_search_params(data):
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise SearchError('O corpo da busca deve ser um objeto JSON.')
+    q = _texto(data, 'q') or ''
+    if len(q) > 200:
+        raise SearchError('O texto da busca deve ter no máximo 200 caracteres.')
+
+    try:
+        limite = int(data.get('limite', BUSCA_LIMITE_PADRAO))
+        pagina = int(data.get('pagina', 0))
+    except (TypeError, ValueError):
+        raise SearchError('Os campos limite e pagina devem ser números inteiros.')
+    if limite < 1 or limite > BUSCA_LIMITE_MAX:
+        raise SearchError(f'O limite deve estar entre 1 e {BUSCA_LIMITE_MAX}.')
+    if pagina < 0:
+        raise SearchError('A página deve ser maior ou igual a zero.')
+
+    return {
+        'q': q or None,
+        'genero': _texto(data, 'genero'),
+        'classificacao': _texto(data, 'classificacao'),
+        'tipo': _texto(data, 'tipo'),
+        'limite': limite,
+        'offset': pagina * limite,
+    }
+
+
+def search_key(params):
+    """Chave das leituras coalescidas: buscas com os mesmos filtros normalizados são a mesma consulta."""
+    return repr(sorted(params.items()))
+
+
+def build_search_query(params):
+    """Monta o SELECT da busca; todos os filtros usam os índices de migrations/0002_busca.sql e 0005."""
+    conditions = ["vol_in_status = 'A'"]
+    order = 'vol_co_volume'
+    select_rank = ''
+
+    if params['q']:
+        # Texto completo com stemming em português, ou semelhança de trigramas no título
+        # (tolerância a erros de digitação).
+        conditions.append(
+            "(vol_tsv @@ websearch_to_tsquery('portuguese', %(q)s) OR %(q)s <%% vol_no_volume)"
+        )
+        select_rank = (
+            ", ts_rank_cd(vol_tsv, websearch_to_tsquery('portuguese', %(q)s))"
+            " + word_similarity(%(q)s, vol_no_volume) AS rank"
+        )
+        order = 'rank DESC, vol_co_volume'
+    if params['genero']:
+        conditions.append('vol_tp_genero ILIKE %(genero_like)s')
+    if params['classificacao']:
+        conditions.append('vol_nu_classificacao = %(classificacao)s')
+    if params['tipo']:
+        conditions.append('vol_tp_volume = %(tipo)s')
+
+    query = (
+        f"SELECT vol_co_volume, vol_no_volume, vol_tx_small_descricao{select_rank} "
+        f"FROM sys_volumes WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {order} LIMIT %(limite)s OFFSET %(offset)s"
+    )
+    sql_params = dict(params)
+    if params['genero']:
+        sql_params['genero_like'] = '%' + escape_like(params['genero']) + '%'
+    return query, sql_params
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
@@ -0,0 +1,303 @@
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Colunas carregadas de sys_volumes, nesta ordem.
+COLUMNS = (
+    'vol_co_volume', 'vol_no_volume', 'vol_tx_small_descricao', 'vol_tx_elenco',
+    'vol_tx_diretor', 'vol_tp_genero', 'vol_nu_classificacao', 'vol_tp_volume', 'vol_in_status'
+)
+ID, NOME, DESCRICAO, ELENCO, DIRETOR, GENERO, CLASSIFICACAO, TIPO, STATUS = range(len(COLUMNS))
+
+
+def normalize(text):
+    if not text:
+        return ''
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return text.lower()
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(normalize(text)) if len(t) > 1]
+
+
+def row_tokens(row):
+    title = set(tokenize(row[NOME]))
+    tokens = set(title)
+    for column in (DESCRICAO, ELENCO, DIRETOR):
+        tokens.update(tokenize(row[column]))
+    return tokens, title
+
+
+class IndexSnapshot:
+    """Geração imutável do índice; uma busca usa sempre uma única geração."""
+
+    __slots__ = ('generation', 'rows', 'positions', 'postings', 'title_postings',
+                 'active', 'genero', 'classificacao', 'tipo', 'holes', 'build_ms', '_new_bits')
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.rows = []
+        self.positions = {}
+        self.postings = {}
+        self.title_postings = {}
+        self.active = 0
+        self.genero = {}
+        self.classificacao = {}
+        self.tipo = {}
+        self.holes = 0
+        self.build_ms = 0.0
+        self._new_bits = {}
+
+    def copy(self, generation):
+        other = IndexSnapshot(generation)
+        other.rows = list(self.rows)
+        other.positions = dict(self.positions)
+        other.postings = dict(self.postings)
+        other.title_postings = dict(self.title_postings)
+        other.active = self.active
+        other.genero = dict(self.genero)
+        other.classificacao = dict(self.classificacao)
+        other.tipo = dict(self.tipo)
+        other.holes = self.holes
+        return other
+
+    def add(self, row, touched):
+        # Posições só crescem: os arrays de postings continuam ordenados.
+        pos = len(self.rows)
+        self.rows.append(row)
+        self.positions[row[ID]] = pos
+        tokens, title = row_tokens(row)
+        for token in tokens:
+            self._append(self.postings, token, pos, touched)
+        for token in title:
+            self._append(self.title_postings, token, pos, touched)
+        # Os bitsets são montados de uma vez em seal(); OR bit a bit aqui seria quadrático.
+        for name, column in (('genero', GENERO), ('classificacao', CLASSIFICACAO), ('tipo', TIPO)):
+            self._new_bits.setdefault((name, row[column] or ''), []).append(pos)
+        self._new_bits.setdefault(('active', None), []).append(pos)
+
+    def seal(self):
+        size = len(self.rows)
+        for (name, key), positions in self._new_bits.items():
+            bits = _bits_from_positions(positions, size)
+            if name == 'active':
+                self.active |= bits
+            else:
+                mapping = getattr(self, name)
+                mapping[key] = mapping.get(key, 0) | bits
+        self._new_bits = {}
+
+    def remove(self, vol_co_volume):
+        pos = self.positions.pop(vol_co_volume, None)
+        if pos is not None:
+            self.active &= ~(1 << pos)
+            self.holes += 1
+
+    @staticmethod
+    def _append(postings, token, pos, touched):
+        key = (id(postings), token)
+        if key not in touched:
+            postings[token] = array('i', postings.get(token, ()))
+            touched.add(key)
+        postings[token].append(pos)
+
+    def memory_bytes(self):
+        total = sys.getsizeof(self.rows) + sys.getsizeof(self.positions)
+        for postings in (self.postings, self.title_postings):
+            total += sys.getsizeof(postings)
+            total += sum(sys.getsizeof(token) + postings[token].itemsize * len(postings[token]) for token in postings)
+        for bitsets in (self.genero, self.classificacao, self.tipo):
+            total += sum(sys.getsizeof(bits) for bits in bitsets.values())
+        total += sys.getsizeof(self.active)
+        return total
+
+
+class SearchIndex:
+    """Índice invertido em memória sobre os títulos ativos de sys_volumes."""
+
+    def __init__(self, load_all, load_ids, refresh_interval=30.0, max_holes_ratio=0.25):
+        self._load_all = load_all
+        self._load_ids = load_ids
+        self.refresh_interval = refresh_interval
+        self.max_holes_ratio = max_holes_ratio
+        self._snapshot = None
+        self._dirty = set()
+        self._full_rebuild = True
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.refreshes = 0
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def ready(self):
+        return self._snapshot is not None
+
+    def mark_dirty(self, vol_co_volume):
+        with self._lock:
+            self._dirty.add(vol_co_volume)
+
+    def mark_stale(self):
+        with self._lock:
+            self._full_rebuild = True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='search-index-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                pass
+
+    def refresh(self):
+        with self._build_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                full = self._full_rebuild or self._snapshot is None
+                self._full_rebuild = False
+            try:
+                current = self._snapshot
+                if not full and current.holes + len(dirty) > self.max_holes_ratio * max(len(current.rows), 1):
+                    full = True
+                if full:
+                    self._snapshot = self._build(self._load_all())
+                elif dirty:
+                    self._snapshot = self._merge(current, self._load_ids(sorted(dirty)), dirty)
+                self.refreshes += 1
+            except Exception:
+                with self._lock:
+                    self._dirty |= dirty
+                    self._full_rebuild = self._full_rebuild or full
+                raise
+
+    def _build(self, rows):
+        start = time.monotonic()
+        generation = self._snapshot.generation + 1 if self._snapshot is not None else 1
+        snapshot = IndexSnapshot(generation)
+        touched = set()
+        for row in rows:
+            if row[STATUS] == 'A':
+                snapshot.add(_intern_row(row), touched)
+        snapshot.seal()
+        snapshot.build_ms = (time.monotonic() - start) * 1000
+        return snapshot
+
+    def _merge(self, current, rows, dirty):
+        start = time.monotonic()
+        snapshot = current.copy(current.generation + 1)
+        touched = set()
+        for vol_co_volume in dirty:
+            snapshot.remove(vol_co_volume)
+        for row in rows:
+            if row[STATUS] == 'A':
+                snapshot.add(_intern_row(row), touched)
+        snapshot.seal()
+        snapshot.build_ms = (time.monotonic() - start) * 1000
+        return snapshot
+
+    def search(self, params):
+        snapshot = self.snapshot()
+        allowed = snapshot.active
+        if params.get('genero'):
+            wanted = normalize(params['genero'])
+            allowed &= _union(bits for genero, bits in snapshot.genero.items() if wanted in normalize(genero))
+        if params.get('classificacao'):
+            allowed &= snapshot.classificacao.get(params['classificacao'], 0)
+        if params.get('tipo'):
+            allowed &= snapshot.tipo.get(params['tipo'], 0)
+
+        offset, limite = params['offset'], params['limite']
+        tokens = tokenize(params['q']) if params.get('q') else []
+
+        # Bits em ordem crescente de posição: '1' no índice i => posição i permitida.
+        bits = bin(allowed)[:1:-1]
+
+        if not tokens:
+            if params.get('q'):
+                return snapshot.generation, []
+            page = []
+            pos = bits.find('1')
+            i = 0
+            while pos != -1 and i < offset + limite:
+                if i >= offset:
+                    page.append(snapshot.rows[pos])
+                i += 1
+                pos = bits.find('1', pos + 1)
+            return snapshot.generation, page
+
+        lists = [snapshot.postings.get(token) for token in tokens]
+        if any(postings is None for postings in lists):
+            return snapshot.generation, []
+        lists.sort(key=len)
+        candidates = [
+            pos for pos in lists[0]
+            if pos < len(bits) and bits[pos] == '1' and all(_contains(other, pos) for other in lists[1:])
+        ]
+
+        def score(pos):
+            in_title = sum(1 for token in tokens if _contains(snapshot.title_postings.get(token, ()), pos))
+            return (-in_title, snapshot.rows[pos][ID])
+
+        candidates.sort(key=score)
+        return snapshot.generation, [snapshot.rows[pos] for pos in candidates[offset:offset + limite]]
+
+    def stats(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'generation': 0, 'rows': 0}
+        return {
+            'generation': snapshot.generation,
+            'rows': len(snapshot.positions),
+            'holes': snapshot.holes,
+            'tokens': len(snapshot.postings),
+            'build_ms': snapshot.build_ms,
+            'memory_bytes': snapshot.memory_bytes(),
+            'refreshes': self.refreshes,
+            'pending_changes': len(self._dirty),
+        }
+
+
+def _intern_row(row):
+    row = tuple(row)
+    return row[:GENERO] + tuple(sys.intern(v) if v is not None else None for v in row[GENERO:])
+
+
+def _contains(postings, pos):
+    i = bisect_left(postings, pos)
+    return i < len(postings) and postings[i] == pos
+
+
+def _union(bitsets):
+    result = 0
+    for bits in bitsets:
+        result |= bits
+    return result
+
+
+def _bits_from_positions(positions, size):
+    buf = bytearray((size + 7) // 8)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, 'little')
@@ -0,0 +1,137 @@
+"""Coalescência de leituras idênticas simultâneas (single-flight).
+
+A primeira requisição de uma chave executa a leitura; as que chegam enquanto
+ela está em andamento esperam e recebem o mesmo resultado, ou a mesma exceção.
+Nada fica guardado depois que a leitura termina: isso é papel dos caches. O
+resultado é compartilhado entre as requisições e não deve ser alterado.
+"""
+import asyncio
+import threading
+
+
+class SingleFlightTimeout(Exception):
+    pass
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Counts:
+    def __init__(self, timeout, counter):
+        self.timeout = timeout
+        self._counter = counter
+        self._counts_lock = threading.Lock()
+        self._counts = {}
+
+    def _count(self, route, result):
+        with self._counts_lock:
+            counts = self._counts.setdefault(route, {'executed': 0, 'coalesced': 0, 'timeouts': 0, 'errors': 0})
+            counts[result] += 1
+        if self._counter is not None:
+            self._counter.inc(route, result)
+
+    def stats(self):
+        with self._counts_lock:
+            routes = {route: dict(counts) for route, counts in self._counts.items()}
+        executed = sum(counts['executed'] for counts in routes.values())
+        coalesced = sum(counts['coalesced'] for counts in routes.values())
+        return {
+            'timeout': self.timeout,
+            'in_flight': self._in_flight(),
+            'executed': executed,
+            'coalesced': coalesced,
+            'coalesced_ratio': coalesced / (executed + coalesced) if executed + coalesced else 0.0,
+            'routes': routes,
+        }
+
+
+class SingleFlight(_Counts):
+    """Para servidores WSGI com threads: quem espera bloqueia até timeout segundos.
+
+    A leitura em si não é interrompida (o statement_timeout do banco cuida
+    disso); quem desiste recebe SingleFlightTimeout.
+    """
+
+    def __init__(self, timeout=5.0, counter=None):
+        super().__init__(timeout, counter)
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _in_flight(self):
+        return len(self._calls)
+
+    def do(self, route, key, fn):
+        key = (route, key)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._count(route, 'coalesced')
+            if not call.done.wait(self.timeout):
+                self._count(route, 'timeouts')
+                raise SingleFlightTimeout(f'Tempo esgotado aguardando leitura em andamento ({route}).')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            self._count(route, 'errors')
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        self._count(route, 'executed')
+        return call.result
+
+
+class AsyncSingleFlight(_Counts):
+    """Mesma ideia para o app ASGI; deve ser usada sempre no mesmo event loop.
+
+    A leitura roda numa task própria: se o cliente que a iniciou desconectar,
+    os demais continuam esperando por ela.
+    """
+
+    def __init__(self, timeout=5.0, counter=None):
+        super().__init__(timeout, counter)
+        self._tasks = {}
+
+    def _in_flight(self):
+        return len(self._tasks)
+
+    async def do(self, route, key, fn):
+        key = (route, key)
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finished(route, key, t))
+        else:
+            self._count(route, 'coalesced')
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            self._count(route, 'timeouts')
+            raise SingleFlightTimeout(f'Tempo esgotado aguardando leitura em andamento ({route}).')
+
+    def _finished(self, route, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if task.cancelled() or task.exception() is not None:
+            self._count(route, 'errors')
+        else:
+            self._count(route, 'executed')
@@ -0,0 +1,189 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from firebase_admin import auth
+from asgi import app as quart_app
+from app import title_cache
+
+@pytest.fixture
+def client():
+    title_cache.clear()
+    return quart_app.test_client()
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_asgi_index(client):
+    response = run(client.get('/'))
+    assert response.status_code == 200
+    assert run(response.get_data(as_text=True)) == 'API rodando'
+
+def test_asgi_detalhes_cached_after_miss(client, mocker):
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    fetch = mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=[{
+        'vol_no_volume': 'Titulo 1',
+        'vol_tx_sinopse': 'Sinopse',
+        'vol_tx_elenco': 'Elenco',
+        'vol_tx_diretor': 'Diretor',
+        'vol_av_avaliacao': '5 estrelas',
+        'vol_tp_genero': 'Ação',
+        'vol_nu_classificacao': '18+'
+    }]))
+
+    for _ in range(2):
+        response = run(client.get('/detalhes/1', headers={'Authorization': 'Bearer valid_token'}))
+        assert response.status_code == 200
+        assert run(response.get_json())['titulo'] == 'Titulo 1'
+    assert fetch.await_count == 1
+
+def test_asgi_detalhes_not_found(client, mocker):
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=[]))
+
+    response = run(client.get('/detalhes/999', headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 404
+    assert run(response.get_json()) == {'message': 'Título não encontrado ou inativo.'}
+
+def test_asgi_invalid_token(client, mocker):
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(side_effect=auth.InvalidIdTokenError('x')))
+
+    response = run(client.get('/detalhes/1', headers={'Authorization': 'Bearer invalid_token'}))
+    assert response.status_code == 401
+    assert run(response.get_json()) == {'message': 'Token de autenticação inválido.'}
+
+def test_asgi_missing_token(client):
+    response = run(client.get('/detalhes/1'))
+    assert response.status_code == 401
+
+def test_asgi_verify_uses_cache_before_thread(mocker):
+    import asgi
+    mocker.patch.object(asgi.wsgi.token_cache, 'lookup', return_value={'uid': 'u1'})
+    verify = mocker.patch.object(asgi.wsgi.token_cache, 'verify')
+    assert run(asgi.verify_firebase_token('Bearer abc')) == 'u1'
+    verify.assert_not_called()
+
+def test_asgi_historico_cursor(client, mocker):
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    rows = [{'volr_co_reproducao': 10 - i, 'volr_dt_reproducao': datetime(2026, 5, 3 - i, tzinfo=timezone.utc),
+             'volr_no_titulo': f'T{i}', 'volr_tp_volume': 'F', 'volr_ep_temp': None} for i in range(3)]
+    mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=rows))
+
+    response = run(client.get('/historico/1?limite=2', headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 200
+    assert len(run(response.get_json())) == 2
+    assert 'X-Proximo-Cursor' in response.headers
+
+def test_asgi_busca_invalid_params(client, mocker):
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+
+    response = run(client.post('/busca', json={'limite': 0}, headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 400
+
+def test_asgi_metrics_endpoint(client):
+    run(client.get('/'))
+    response = run(client.get('/metrics'))
+    assert response.status_code == 200
+    assert 'api_http_requests_total{route="/",method="GET",status="200"}' in run(response.get_data(as_text=True))
+
+def test_asgi_ler_lista_reproducao(client, mocker):
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=[
+        {'lrep_co_lista': 5, 'lrep_no_lista': 'Favoritos', 'posicao': 1, 'vol_co_volume': 101, 'vol_no_volume': 'Titulo 101',
+         'vol_tx_small_descricao': 'Desc', 'vol_tp_volume': 'F', 'vol_in_status': 'A'},
+    ]))
+
+    response = run(client.get('/lista_reproducao/5?user_id=1', headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 200
+    assert run(response.get_json())['itens'][0]['titulo'] == 'Titulo 101'
+
+def test_asgi_recomendacoes_indisponiveis(client, mocker, tmp_path):
+    import app as app_module
+    from recommendations import Recommendations
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=[(10, 'Titulo 10')]))
+    mocker.patch.object(app_module, 'recomendacoes', Recommendations(str(tmp_path / 'nada.npy')))
+
+    response = run(client.get('/recomendacoes/1', headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 503
+
+def test_asgi_recomendacoes_lookup_off_event_loop(client, mocker):
+    import threading
+    import app as app_module
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    threads = []
+    def neighbors(codigo):
+        threads.append(threading.current_thread())
+        return []
+    mocker.patch.object(app_module.recomendacoes, 'neighbors', side_effect=neighbors)
+
+    response = run(client.get('/recomendacoes/titulo/10', headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 200
+    assert threads and threads[0] is not threading.main_thread()
+
+def test_asgi_sync_pool_timeout_returns_503(client, mocker):
+    import app as app_module
+    from db_pool import PoolTimeout
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    mocker.patch.object(app_module, 'REPRODUCAO_MODO', 'async')
+    mocker.patch.object(app_module.known_ids, 'volume', side_effect=PoolTimeout('Pool esgotado'))
+
+    response = run(client.post('/reproducao', json={'user_id': 1, 'titulo_id': 3},
+                               headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 503
+
+def test_asgi_detalhes_miss_reads_primary(client, mocker):
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    fetch = mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=[]))
+
+    run(client.get('/detalhes/5', headers={'Authorization': 'Bearer valid_token'}))
+    assert fetch.await_args.kwargs['primary'] is True
+
+def test_asgi_versioned_historico_reads_primary(client, mocker):
+    import asgi
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    mocker.patch.object(asgi.wsgi.catalog_listener, 'connected', True)
+    fetch = mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=[]))
+
+    run(client.get('/historico/9?limite=5', headers={'Authorization': 'Bearer valid_token'}))
+    assert fetch.await_args.kwargs['primary'] is True
+
+def test_asgi_catalogo_invalidated_mid_request_stays_off_psycopg2(client, mocker):
+    import asgi
+    from catalog_sampler import CatalogSampler
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    mocker.patch.object(asgi.wsgi, 'current_catalog', return_value=None)
+    load_ids = mocker.Mock(side_effect=AssertionError('psycopg2 no event loop'))
+    sampler = CatalogSampler(load_ids)
+    sampler.refresh([1, 2])
+    needs_refresh = sampler.needs_refresh
+    def invalidated_after_check():
+        # NOTIFY chegando logo depois da verificação.
+        result = needs_refresh()
+        sampler.invalidate()
+        return result
+    mocker.patch.object(sampler, 'needs_refresh', side_effect=invalidated_after_check)
+    mocker.patch.object(asgi.wsgi, 'catalog_sampler', sampler)
+    mocker.patch('asgi.fetch', new=mocker.AsyncMock(return_value=[
+        {'vol_co_volume': i, 'vol_no_volume': f'T{i}', 'vol_tx_small_descricao': ''} for i in (1, 2)]))
+
+    response = run(client.get('/catalogo', headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 200
+    assert len(run(response.get_json())) == 2
+    load_ids.assert_not_called()
+
+def test_asgi_reproducao_counts_for_trending(client, mocker):
+    import asgi
+    mocker.patch('asgi.verify_firebase_token', new=mocker.AsyncMock(return_value='user_id_123'))
+    mocker.patch.object(asgi.wsgi, 'REPRODUCAO_MODO', 'async')
+    mocker.patch.object(asgi.wsgi.known_ids, 'volume', return_value=('Titulo', 'F'))
+    mocker.patch.object(asgi.wsgi.known_ids, 'has_user', return_value=True)
+    mocker.patch.object(asgi.wsgi.playback_ingestor, 'start')
+    mocker.patch.object(asgi.wsgi.playback_ingestor, 'submit')
+    mocker.patch.object(asgi.wsgi.reproducao_particoes, 'start')
+    mocker.patch.object(asgi.wsgi.play_rollup, 'start')
+    before = asgi.wsgi.play_rollup.stats()['received']
+
+    response = run(client.post('/reproducao', json={'user_id': 1, 'titulo_id': 3},
+                               headers={'Authorization': 'Bearer valid_token'}))
+    assert response.status_code == 202
+    assert asgi.wsgi.play_rollup.stats()['received'] == before + 1
@@ -0,0 +1,42 @@
+import pytest
+import requests
+from firebase_admin import auth
+from bench.run import percentile, summarize, compare
+from bench.stubs import bench_token, verify_id_token, start_identity_toolkit_stub
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+def test_summarize_reports_ms_and_rps():
+    summary = summarize([0.001, 0.002, 0.003, 0.004], {200: 4}, 0, 2.0)
+    assert summary['rps'] == 2.0
+    assert summary['p50_ms'] == 2.0
+    assert summary['max_ms'] == 4.0
+    assert summary['status'] == {'200': 4}
+
+def test_compare_flags_regressions_over_tolerance():
+    baseline = {'routes': {'detalhes': {'requests': 100, 'p95_ms': 10.0, 'rps': 1000.0}}}
+    ok = {'routes': {'detalhes': {'requests': 100, 'p95_ms': 10.5, 'rps': 950.0}}}
+    slow = {'routes': {'detalhes': {'requests': 100, 'p95_ms': 12.0, 'rps': 800.0}}}
+    assert compare(ok, baseline, 0.10) == []
+    assert len(compare(slow, baseline, 0.10)) == 2
+
+def test_stub_token_verification():
+    assert verify_id_token(bench_token('42'))['uid'] == '42'
+    with pytest.raises(auth.InvalidIdTokenError):
+        verify_id_token('outro-token')
+
+def test_identity_toolkit_stub():
+    server, base_url = start_identity_toolkit_stub()
+    try:
+        r = requests.post(base_url + '/accounts:signInWithPassword', params={'key': 'k'},
+                          json={'email': 'a@b.com', 'password': 'x', 'returnSecureToken': True})
+        assert r.status_code == 200
+        assert r.json()['idToken'] == bench_token('a@b.com')
+    finally:
+        server.shutdown()
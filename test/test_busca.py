@@ -19,7 +19,8 @@ def test_buscar_titulos_success(client, mocker):
     ]
     cursor_mock.close = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
 
     data = {'genero': 'Ação', 'ano_lancamento': 2021, 'classificacao': '16'}
     response = client.post('/busca', headers={'Authorization': 'Bearer valid_token'}, json=data)
@@ -32,3 +33,64 @@ def test_buscar_titulos_unauthorized(client, mocker):
     response = client.post('/busca', headers={'Authorization': 'Bearer invalid_token'}, json={})
     assert response.status_code == 401
     assert response.json == {'message': 'Token inválido'}
+
+def test_buscar_titulos_texto_livre(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.fetchall.return_value = []
+    conn_mock.cursor.return_value = cursor_mock
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+
+    data = {'q': 'vingadores', 'genero': 'Ação', 'limite': 5, 'pagina': 2}
+    response = client.post('/busca', headers={'Authorization': 'Bearer valid_token'}, json=data)
+    assert response.status_code == 200
+    query, params = cursor_mock.execute.call_args[0]
+    assert 'websearch_to_tsquery' in query
+    assert params['q'] == 'vingadores'
+    assert params['genero_like'] == '%Ação%'
+    assert params['limite'] == 5
+    assert params['offset'] == 10
+
+def test_buscar_titulos_limite_invalido(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    response = client.post('/busca', headers={'Authorization': 'Bearer valid_token'}, json={'limite': 1000})
+    assert response.status_code == 400
+
+def test_buscar_titulos_modo_memoria(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.BUSCA_MODO', 'memoria')
+    mocker.patch('app.start_catalog_listener')
+    mocker.patch('app.busca_index.start')
+    mocker.patch('app.busca_index._load_all', return_value=[
+        (1, 'Os Vingadores', 'Heróis', 'Robert Downey', 'Joss Whedon', 'Ação', '12', 'F', 'A'),
+        (2, 'Comédia Romântica', 'Amor', 'Fulano', 'Beltrano', 'Comédia', '10', 'F', 'A')
+    ])
+    db_mock = mocker.patch('app.get_db')
+
+    response = client.post('/busca', headers={'Authorization': 'Bearer valid_token'}, json={'q': 'vingadores', 'genero': 'acao'})
+    assert response.status_code == 200
+    assert response.json == [{'titulo': 'Os Vingadores', 'descricao': 'Heróis'}]
+    assert response.headers['X-Indice-Geracao'] == '1'
+    db_mock.assert_not_called()
+
+@pytest.mark.parametrize('data', [
+    {'q': 5},
+    {'genero': ['Ação']},
+    {'classificacao': True},
+    {'tipo': {'F': 1}},
+    ['vingadores'],
+])
+def test_buscar_titulos_rejeita_tipos_invalidos(client, mocker, data):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    db_mock = mocker.patch('app.get_db')
+
+    response = client.post('/busca', headers={'Authorization': 'Bearer valid_token'}, json=data)
+    assert response.status_code == 400
+    db_mock.assert_not_called()
+
+def test_parse_search_params_normaliza_classificacao():
+    from search import parse_search_params
+    params = parse_search_params({'classificacao': 16, 'genero': ' Ação ', 'tipo': ''})
+    assert (params['classificacao'], params['genero'], params['tipo']) == ('16', 'Ação', None)
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import pytest
+import catalog_io
+from app import Volume, on_sys_volumes_changed
+from catalog_io import CatalogImportError, CopySource, csv_line, fields_from_table, import_catalog, read_records, validate
+
+FIELDS = fields_from_table(Volume.__table__)
+
+def by_name(*names):
+    return [field for field in FIELDS if field.name in names]
+
+def test_fields_follow_model():
+    fields = {field.name: field for field in FIELDS}
+    assert fields['vol_co_volume'].integer and not fields['vol_co_volume'].nullable
+    assert fields['vol_no_volume'].length == 45 and not fields['vol_no_volume'].nullable
+    assert fields['vol_tx_sinopse'].length == 5000 and fields['vol_tx_sinopse'].nullable
+
+def test_validate_lengths_and_required():
+    fields = by_name('vol_co_volume', 'vol_no_volume', 'vol_in_status', 'vol_tp_genero')
+    assert validate({'vol_co_volume': '7', 'vol_no_volume': 'Filme'}, fields) == [7, 'Filme', 'A', None]
+    with pytest.raises(ValueError, match='excede 45'):
+        validate({'vol_co_volume': 7, 'vol_no_volume': 'x' * 46}, fields)
+    with pytest.raises(ValueError, match='obrigatório'):
+        validate({'vol_co_volume': 7}, fields)
+    for codigo in ('abc', True, 0):
+        with pytest.raises(ValueError):
+            validate({'vol_co_volume': codigo, 'vol_no_volume': 'Filme'}, fields)
+    with pytest.raises(ValueError, match='malformada'):
+        validate(None, fields)
+
+def test_csv_line_distinguishes_null_from_empty():
+    linha = csv_line([1, None, '', 'a "b", c'])
+    assert linha == '1,,"","a ""b"", c"\n'
+    assert next(csv.reader(io.StringIO(linha))) == ['1', '', '', 'a "b", c']
+
+def test_copy_source_reads_in_chunks():
+    rows = [[i, f'Título {i}'] for i in range(100)]
+    source = CopySource(iter(rows))
+    chunks = []
+    while True:
+        chunk = source.read(64)
+        if not chunk:
+            break
+        assert len(chunk) <= 64
+        chunks.append(chunk)
+    assert b''.join(chunks).decode('utf-8') == ''.join(csv_line(row) for row in rows)
+
+def test_read_records_csv_uses_header_columns():
+    f = io.StringIO('vol_co_volume,vol_no_volume,vol_tp_genero\n1,"A, B",\n2,C\n')
+    presentes, records = read_records(f, 'csv', FIELDS)
+    assert [field.name for field in presentes] == ['vol_co_volume', 'vol_no_volume', 'vol_tp_genero']
+    assert list(records) == [(2, {'vol_co_volume': '1', 'vol_no_volume': 'A, B'}), (3, None)]
+
+@pytest.mark.parametrize('header, message', [
+    ('vol_co_volume,vol_no_volume,extra', 'desconhecidas'),
+    ('vol_co_volume,vol_tp_genero', 'obrigatórias'),
+    ('vol_co_volume,vol_no_volume,vol_no_volume', 'repetidas'),
+])
+def test_read_records_csv_rejects_bad_header(header, message):
+    with pytest.raises(CatalogImportError, match=message):
+        read_records(io.StringIO(header + '\n'), 'csv', FIELDS)
+
+def test_read_records_ndjson():
+    f = io.StringIO('{"vol_co_volume": 1, "vol_no_volume": "A"}\n\nnão é json\n{"vol_co_volume": 2, "outro": 1}\n')
+    presentes, records = read_records(f, 'ndjson', FIELDS)
+    assert presentes == FIELDS
+    assert list(records) == [(1, {'vol_co_volume': 1, 'vol_no_volume': 'A'}), (3, None), (4, None)]
+
+def test_detect_format():
+    assert catalog_io.detect_format('catalogo.csv.gz') == 'csv'
+    assert catalog_io.detect_format('catalogo.jsonl') == 'ndjson'
+    with pytest.raises(CatalogImportError):
+        catalog_io.detect_format('catalogo.xlsx')
+
+def test_merge_sql_only_updates_file_columns():
+    sql = catalog_io.merge_sql(['vol_co_volume', 'vol_no_volume', 'vol_in_status'], ['vol_co_volume', 'vol_no_volume'])
+    assert 'vol_no_volume = EXCLUDED.vol_no_volume' in sql
+    assert 'vol_in_status = EXCLUDED' not in sql
+    assert 'DISTINCT ON (vol_co_volume)' in sql
+
+def test_import_catalog_streams_valid_rows(mocker):
+    conn = mocker.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchone.return_value = (1, 1)
+    copiado = []
+    cur.copy_expert.side_effect = lambda sql, source, size: copiado.append((sql, source.read()))
+    f = io.StringIO('vol_co_volume,vol_no_volume\n1,Novo\n2,\n3,Existente\n')
+
+    result = import_catalog(conn, f, 'csv', FIELDS)
+    assert (result.lidas, result.invalidas, result.inseridas, result.atualizadas) == (3, 1, 1, 1)
+    assert result.erros == [(3, 'vol_no_volume é obrigatório')]
+    sql, data = copiado[0]
+    assert '(linha, vol_co_volume, vol_no_volume, vol_in_status)' in sql
+    assert data == b'2,1,"Novo","A"\n4,3,"Existente","A"\n'
+    executed = [call.args[0] for call in cur.execute.call_args_list]
+    assert executed[0] == catalog_io.CARGA_EM_MASSA_SQL
+    assert executed[-1] == catalog_io.NOTIFY_CARGA_SQL
+    conn.commit.assert_called_once()
+
+def test_import_catalog_estrito_rolls_back(mocker):
+    conn = mocker.MagicMock()
+    conn.cursor.return_value.copy_expert.side_effect = lambda sql, source, size: source.read()
+    with pytest.raises(CatalogImportError, match='Linha 2'):
+        import_catalog(conn, io.StringIO('vol_co_volume,vol_no_volume\nx,A\n'), 'csv', FIELDS, estrito=True)
+    conn.rollback.assert_called_once()
+    conn.commit.assert_not_called()
+
+def test_export_ndjson(mocker):
+    conn = mocker.MagicMock()
+    conn.cursor.return_value.__iter__.return_value = iter([(1, 'A'), (2, 'B')])
+    out = io.StringIO()
+    assert catalog_io.export_catalog(conn, out, 'ndjson', ['vol_co_volume', 'vol_no_volume']) == 2
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {'vol_co_volume': 1, 'vol_no_volume': 'A'}, {'vol_co_volume': 2, 'vol_no_volume': 'B'}]
+
+def test_notify_carga_invalida_catalogo(mocker):
+    calls = mocker.MagicMock()
+    calls.attach_mock(mocker.patch('app.catalog_snapshot.invalidate'), 'snapshot')
+    calls.attach_mock(mocker.patch('app.title_cache.clear'), 'clear')
+    calls.attach_mock(mocker.patch('app.busca_index.mark_stale'), 'stale')
+    calls.attach_mock(mocker.patch('app.catalog_versions.reset'), 'reset')
+    on_sys_volumes_changed('*')
+    # A época nova só depois de todas as invalidações.
+    assert [call[0] for call in calls.mock_calls] == ['snapshot', 'clear', 'stale', 'reset']
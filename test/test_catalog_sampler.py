@@ -0,0 +1,38 @@
+from catalog_sampler import CatalogSampler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_sampler_returns_distinct_active_ids():
+    sampler = CatalogSampler(lambda: range(1, 101))
+    ids = sampler.sample(10)
+    assert len(ids) == 10
+    assert len(set(ids)) == 10
+    assert all(1 <= i <= 100 for i in ids)
+
+def test_sampler_seeded_pages_are_stable_and_disjoint():
+    sampler = CatalogSampler(lambda: range(1, 26))
+    pages = [sampler.sample(10, seed='u1:a', page=p) for p in range(3)]
+    assert pages == [sampler.sample(10, seed='u1:a', page=p) for p in range(3)]
+    assert sorted(pages[0] + pages[1] + pages[2]) == list(range(1, 26))
+    assert sampler.sample(10, seed='u1:a', page=3) == []
+
+def test_sampler_refreshes_after_interval():
+    clock = FakeClock()
+    loads = []
+
+    def load():
+        loads.append(clock.now)
+        return [1, 2, 3]
+
+    sampler = CatalogSampler(load, refresh_interval=60, clock=clock)
+    sampler.sample(2)
+    clock.now = 30
+    sampler.sample(2)
+    clock.now = 61
+    sampler.sample(2)
+    assert loads == [0.0, 61]
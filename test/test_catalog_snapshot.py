@@ -0,0 +1,85 @@
+import pytest
+from app import app as flask_app, title_cache
+from catalog_snapshot import CatalogSnapshot, Snapshot
+
+def row(vol, nome, status='A', genero='Ação'):
+    return (vol, nome, f'Descrição {vol}', f'Sinopse {vol}', 'Elenco', 'Diretor', '5', genero, '14', 'F', status)
+
+ROWS = [row(1, 'Titulo 1'), row(2, 'Titulo 2', status='I'), row(3, 'Titulo 3')]
+
+@pytest.fixture
+def client():
+    title_cache.clear()
+    return flask_app.test_client()
+
+def test_snapshot_keeps_active_records_and_inactive_ids():
+    snapshot = Snapshot(1, ROWS, loaded_at=0.0)
+    assert list(snapshot.ids) == [1, 3]
+    assert snapshot.get(1).vol_no_volume == 'Titulo 1'
+    assert snapshot.get(1)['vol_tx_sinopse'] == 'Sinopse 1'
+    assert snapshot.get(2) is None
+    assert snapshot.inactive == {2}
+
+def test_snapshot_interns_repeated_strings():
+    snapshot = Snapshot(1, [row(1, 'A', genero=''.join(['Dra', 'ma'])), row(3, 'B', genero=''.join(['Dr', 'ama']))], 0.0)
+    assert snapshot.get(1).vol_tp_genero is snapshot.get(3).vol_tp_genero
+
+def test_invalidate_hides_snapshot_until_reload():
+    store = CatalogSnapshot(lambda: ROWS)
+    assert store.current() is None
+    store.refresh()
+    assert store.current().generation == 1
+    store.invalidate()
+    assert store.current() is None
+    store.refresh()
+    assert store.current().generation == 2
+    stats = store.stats()
+    assert stats['size'] == 2 and stats['inactive'] == 1 and not stats['stale']
+
+def test_invalidate_during_load_keeps_snapshot_stale():
+    store = CatalogSnapshot(lambda: (store.invalidate(), ROWS)[1])
+    store.refresh()
+    assert store.current() is None
+
+def test_failed_refresh_keeps_fallback():
+    def load():
+        raise RuntimeError('banco fora')
+    store = CatalogSnapshot(load)
+    with pytest.raises(RuntimeError):
+        store.refresh()
+    assert store.current() is None
+    assert store.stats()['failures'] == 1
+
+def test_detalhes_served_from_snapshot(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.current_catalog', return_value=Snapshot(1, ROWS, 0.0))
+    db_mock = mocker.patch('app.get_db')
+
+    response = client.get('/detalhes/1', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert response.json['sinopse'] == 'Sinopse 1'
+    assert client.get('/detalhes/2', headers={'Authorization': 'Bearer valid_token'}).status_code == 404
+    db_mock.assert_not_called()
+
+def test_detalhes_lote_from_snapshot_reports_inactive(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.current_catalog', return_value=Snapshot(1, ROWS, 0.0))
+    db_mock = mocker.patch('app.get_db')
+
+    response = client.post('/detalhes/lote', json={'ids': [1, 2, 9]}, headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert list(response.json['titulos']) == ['1']
+    assert response.json['inativos'] == [2]
+    assert response.json['nao_encontrados'] == [9]
+    db_mock.assert_not_called()
+
+def test_catalogo_served_from_snapshot(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.current_catalog', return_value=Snapshot(1, ROWS, 0.0))
+    mocker.patch('app.catalog_sampler.sample', return_value=[3, 1])
+    db_mock = mocker.patch('app.get_db')
+
+    response = client.get('/catalogo', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert [item['titulo'] for item in response.json] == ['Titulo 3', 'Titulo 1']
+    db_mock.assert_not_called()
@@ -0,0 +1,105 @@
+import threading
+import pytest
+from psycopg2 import extensions
+from db_pool import ConnectionPool, PoolTimeout
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+@pytest.fixture
+def pool():
+    created = []
+
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    pool = ConnectionPool(connect, minconn=1, maxconn=2, timeout=0.05)
+    pool.created = created
+    yield pool
+    pool.close()
+
+def test_pool_reuses_connections(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(pool.created) == 1
+    assert pool.stats()['acquisitions'] == 2
+
+def test_pool_times_out_when_exhausted(pool):
+    a = pool.getconn()
+    b = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.stats()['in_use'] == 2
+    assert pool.stats()['timeouts'] == 1
+    pool.putconn(a)
+    pool.putconn(b)
+    assert pool.stats()['in_use'] == 0
+
+def test_pool_waiter_gets_released_connection(pool):
+    pool.timeout = 2
+    a = pool.getconn()
+    b = pool.getconn()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    pool.putconn(a)
+    waiter.join()
+    assert got == [a]
+    pool.putconn(b)
+    pool.putconn(got[0])
+
+def test_pool_replaces_closed_connection(pool):
+    with pool.connection() as conn:
+        conn.close()
+    with pool.connection() as other:
+        pass
+    assert other is not conn
+    assert pool.stats()['discarded'] == 1
+
+class FakeCursor:
+    itersize = 1
+
+    def execute(self, query, params=None):
+        pass
+
+    def __iter__(self):
+        return iter([{'volr_co_reproducao': i} for i in range(3)])
+
+    def close(self):
+        pass
+
+class CursorConnection(FakeConnection):
+    def cursor(self, *args, **kwargs):
+        return FakeCursor()
+
+def test_aborted_export_returns_connection(mocker):
+    pool = ConnectionPool(CursorConnection, minconn=0, maxconn=2, timeout=0.05)
+    mocker.patch('app.read_db', side_effect=lambda user=None: pool.connection())
+    mocker.patch('app.serialize_historico', side_effect=lambda item: item)
+    import app
+
+    # O Flask fecha o gerador quando o cliente desconecta no meio do download.
+    for _ in range(3):
+        export = app.exportar_historico(1)
+        next(export)
+        export.close()
+    assert pool.stats()['in_use'] == 0
+    with pool.connection():
+        pass
+    pool.close()
@@ -0,0 +1,203 @@
+import os
+import pytest
+from contextlib import contextmanager
+import app as app_module
+from app import app as flask_app
+from db_pool import ConnectionPool, PoolTimeout
+from db_router import DbRouter, Replica, parse_hosts
+
+class FakeConn:
+    def __init__(self, name):
+        self.name = name
+        self.closed = 0
+
+class FakePool:
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+        self.returned = []
+
+    def getconn(self, timeout=None):
+        if self.error is not None:
+            raise self.error
+        return FakeConn(self.name)
+
+    def putconn(self, conn, discard=False):
+        self.returned.append(conn)
+
+    def stats(self):
+        return {}
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def primary():
+    @contextmanager
+    def connection():
+        yield FakeConn('primario')
+    return connection
+
+def router(*pools, **kwargs):
+    replicas = [Replica(pool.name, pool) for pool in pools]
+    r = DbRouter(primary(), replicas, check_interval=3600, **kwargs)
+    r._thread = object()  # sem health check em background nos testes
+    return r
+
+def read_name(r, user=None):
+    with r.read(user) as conn:
+        return conn.name
+
+def test_parse_hosts():
+    assert parse_hosts('db1:5433, /tmp/pg2:5434,db3') == [('db1', '5433'), ('/tmp/pg2', '5434'), ('db3', None)]
+    assert parse_hosts(None) == []
+
+def test_without_replicas_uses_primary():
+    assert read_name(router()) == 'primario'
+
+def test_round_robin_between_replicas():
+    r = router(FakePool('r1'), FakePool('r2'))
+    assert [read_name(r) for _ in range(4)] == ['r1', 'r2', 'r1', 'r2']
+    assert all(replica.in_use == 0 for replica in r.replicas)
+
+def test_least_busy_prefers_idle_replica():
+    r = router(FakePool('r1'), FakePool('r2'), strategy='least_busy')
+    busy = r.choose()
+    assert busy.name == 'r1'
+    assert [read_name(r) for _ in range(3)] == ['r2', 'r2', 'r2']
+    r.release(busy)
+
+def test_read_your_writes_window():
+    clock = Clock()
+    r = router(FakePool('r1'), ryw_window=5.0, clock=clock)
+    r.mark_write(7)
+    assert read_name(r, '7') == 'primario'
+    assert read_name(r, 8) == 'r1'
+    clock.now += 6
+    assert read_name(r, 7) == 'r1'
+    assert r.stats()['pinned_reads'] == 1
+
+def test_connection_failure_falls_back_and_marks_unhealthy():
+    r = router(FakePool('r1', error=RuntimeError('down')), FakePool('r2'))
+    assert read_name(r) == 'primario'
+    assert not r.replicas[0].healthy
+    assert [read_name(r) for _ in range(2)] == ['r2', 'r2']
+
+def test_busy_replica_falls_back_but_stays_healthy():
+    r = router(FakePool('r1', error=PoolTimeout('cheio')))
+    assert read_name(r) == 'primario'
+    assert r.replicas[0].healthy and r.replicas[0].in_use == 0
+    assert r.stats()['fallbacks'] == 1
+
+def test_health_check_restores_replica(mocker):
+    pool = mocker.MagicMock()
+    pool.connection.return_value.__enter__.return_value.cursor.return_value.fetchone.return_value = (0.5,)
+    r = router(pool, max_lag=1.0)
+    r.replicas[0].healthy = False
+    r.check()
+    assert r.replicas[0].healthy and r.replicas[0].lag == 0.5
+    pool.connection.return_value.__enter__.return_value.cursor.return_value.fetchone.return_value = (30.0,)
+    r.check()
+    assert not r.replicas[0].healthy
+
+def test_historico_reads_primary_after_reproducao(mocker):
+    replica_conn = mocker.MagicMock(closed=0)
+    replica_conn.cursor.return_value.fetchall.return_value = []
+    replica_pool = mocker.MagicMock()
+    replica_pool.getconn.return_value = replica_conn
+    r = DbRouter(lambda: app_module.get_db(), [Replica('r1', replica_pool)])
+    r._thread = object()
+    mocker.patch.object(app_module, 'db_router', r)
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    conn_mock = mocker.MagicMock()
+    conn_mock.cursor.return_value.fetchone.side_effect = [(1,), (1,)]
+    conn_mock.cursor.return_value.fetchall.return_value = []
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+    client = flask_app.test_client()
+    headers = {'Authorization': 'Bearer valid_token'}
+
+    assert client.post('/reproducao', json={'user_id': 1, 'titulo_id': 1}, headers=headers).status_code == 201
+    db_mock.reset_mock()
+    assert client.get('/historico/1?limite=5', headers=headers).status_code == 200
+    db_mock.assert_called_once()
+    replica_pool.getconn.assert_not_called()
+
+    db_mock.reset_mock()
+    assert client.get('/historico/2?limite=5', headers=headers).status_code == 200
+    db_mock.assert_not_called()
+    replica_pool.putconn.assert_called_once_with(replica_conn)
+
+@pytest.mark.skipif(not (os.getenv('TEST_DATABASE_URL') and os.getenv('TEST_REPLICA_URL')),
+                    reason='TEST_DATABASE_URL e TEST_REPLICA_URL não definidos')
+def test_routes_to_real_replica():
+    import psycopg2
+    primary_pool = ConnectionPool(lambda: psycopg2.connect(os.environ['TEST_DATABASE_URL']), minconn=0)
+    replica_pool = ConnectionPool(lambda: psycopg2.connect(os.environ['TEST_REPLICA_URL']), minconn=0)
+    r = DbRouter(primary_pool.connection, [Replica('replica', replica_pool)], check_interval=3600)
+    r._thread = object()
+    r.check()
+    assert r.replicas[0].healthy
+
+    def in_recovery(user=None):
+        with r.read(user) as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT pg_is_in_recovery()')
+            return cur.fetchone()[0]
+
+    assert in_recovery() is True
+    r.mark_write(1)
+    assert in_recovery(1) is False
+    primary_pool.close()
+    replica_pool.close()
+
+def test_aborted_generator_releases_replica():
+    pool = FakePool('r1')
+    r = router(pool)
+
+    def stream():
+        with r.read() as conn:
+            yield conn.name
+            yield conn.name
+
+    gen = stream()
+    assert next(gen) == 'r1'
+    gen.close()
+    assert len(pool.returned) == 1
+    assert r.replicas[0].in_use == 0
+
+def test_detalhes_miss_fills_cache_from_primary(mocker):
+    replica_pool = mocker.MagicMock()
+    r = DbRouter(lambda: app_module.get_db(), [Replica('r1', replica_pool)])
+    r._thread = object()
+    mocker.patch.object(app_module, 'db_router', r)
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    app_module.title_cache.clear()
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value.cursor.return_value.fetchone.return_value = {
+        'vol_no_volume': 'Titulo', 'vol_tx_sinopse': None, 'vol_tx_elenco': None, 'vol_tx_diretor': None,
+        'vol_av_avaliacao': None, 'vol_tp_genero': None, 'vol_nu_classificacao': None}
+
+    response = flask_app.test_client().get('/detalhes/3', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    db_mock.assert_called_once()
+    replica_pool.getconn.assert_not_called()
+
+def test_versioned_historico_reads_primary(mocker):
+    replica_pool = mocker.MagicMock()
+    r = DbRouter(lambda: app_module.get_db(), [Replica('r1', replica_pool)])
+    r._thread = object()
+    mocker.patch.object(app_module, 'db_router', r)
+    mocker.patch.object(app_module.catalog_listener, 'connected', True)
+    mocker.patch('app.start_catalog_listener')
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value.cursor.return_value.fetchall.return_value = []
+
+    response = flask_app.test_client().get('/historico/8?limite=5', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    db_mock.assert_called_once()
+    replica_pool.getconn.assert_not_called()
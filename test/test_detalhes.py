@@ -1,8 +1,9 @@
 import pytest
-from app import app as flask_app
+from app import app as flask_app, title_cache
 
 @pytest.fixture
 def app():
+    title_cache.clear()
     yield flask_app
 
 @pytest.fixture
@@ -24,7 +25,8 @@ def test_detalhes_titulo_success(client, mocker):
     }
     cursor_mock.close = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
 
     response = client.get('/detalhes/1', headers={'Authorization': 'Bearer valid_token'})
     assert response.status_code == 200
@@ -37,8 +39,36 @@ def test_detalhes_titulo_not_found(client, mocker):
     cursor_mock.fetchone.return_value = None
     cursor_mock.close = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
 
     response = client.get('/detalhes/999', headers={'Authorization': 'Bearer valid_token'})
     assert response.status_code == 404
     assert response.json == {'message': 'Título não encontrado ou inativo.'}
+
+def test_detalhes_titulo_served_from_cache(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.fetchone.return_value = {
+        'vol_no_volume': 'Titulo 1',
+        'vol_tx_sinopse': 'Sinopse detalhada',
+        'vol_tx_elenco': 'Elenco principal',
+        'vol_tx_diretor': 'Diretor',
+        'vol_av_avaliacao': '5',
+        'vol_tp_genero': 'Ação',
+        'vol_nu_classificacao': '18'
+    }
+    conn_mock.cursor.return_value = cursor_mock
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+
+    first = client.get('/detalhes/1', headers={'Authorization': 'Bearer valid_token'})
+    second = client.get('/detalhes/1', headers={'Authorization': 'Bearer valid_token'})
+    assert second.status_code == 200
+    assert second.json == first.json
+    assert db_mock.call_count == 1
+
+    title_cache.invalidate(1)
+    client.get('/detalhes/1', headers={'Authorization': 'Bearer valid_token'})
+    assert db_mock.call_count == 2
@@ -0,0 +1,55 @@
+import pytest
+from app import app as flask_app, title_cache
+
+@pytest.fixture
+def app():
+    title_cache.clear()
+    yield flask_app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def volume(codigo, status='A'):
+    return {
+        'vol_co_volume': codigo,
+        'vol_in_status': status,
+        'vol_no_volume': f'Titulo {codigo}',
+        'vol_tx_sinopse': 'Sinopse',
+        'vol_tx_elenco': 'Elenco',
+        'vol_tx_diretor': 'Diretor',
+        'vol_av_avaliacao': '5',
+        'vol_tp_genero': 'Ação',
+        'vol_nu_classificacao': '16'
+    }
+
+def test_detalhes_lote_success(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.fetchall.return_value = [volume(1), volume(2, status='I')]
+    conn_mock.cursor.return_value = cursor_mock
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+
+    response = client.post('/detalhes/lote', headers={'Authorization': 'Bearer valid_token'}, json={'ids': [1, 2, 3]})
+    assert response.status_code == 200
+    assert response.json['titulos']['1']['titulo'] == 'Titulo 1'
+    assert response.json['inativos'] == [2]
+    assert response.json['nao_encontrados'] == [3]
+    assert cursor_mock.execute.call_args[0][1] == ([1, 2, 3],)
+
+def test_detalhes_lote_uses_title_cache(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    title_cache.set(1, b'{"titulo":"Em cache"}')
+    db_mock = mocker.patch('app.get_db')
+
+    response = client.post('/detalhes/lote', headers={'Authorization': 'Bearer valid_token'}, json={'ids': [1]})
+    assert response.status_code == 200
+    assert response.json == {'titulos': {'1': {'titulo': 'Em cache'}}, 'nao_encontrados': [], 'inativos': []}
+    db_mock.assert_not_called()
+
+def test_detalhes_lote_invalid_ids(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    response = client.post('/detalhes/lote', headers={'Authorization': 'Bearer valid_token'}, json={'ids': ['a']})
+    assert response.status_code == 400
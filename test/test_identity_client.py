@@ -0,0 +1,91 @@
+import pytest
+import requests
+from identity_client import IdentityToolkitClient, CircuitOpen
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_client(clock, **kwargs):
+    return IdentityToolkitClient('http://localhost:9099/v1', 'chave', clock=clock, sleep=lambda s: None, **kwargs)
+
+def test_client_retries_connection_errors(mocker):
+    ok = mocker.MagicMock(status_code=200)
+    post = mocker.patch('requests.Session.post', side_effect=[requests.ConnectionError(), ok])
+    client = make_client(FakeClock(), retries=2)
+    assert client.sign_in_with_password('a@b.com', '123') is ok
+    assert post.call_count == 2
+    assert post.call_args.kwargs['timeout'] == client.timeout
+    assert post.call_args[0][0] == 'http://localhost:9099/v1/accounts:signInWithPassword'
+
+def test_client_does_not_retry_client_errors(mocker):
+    post = mocker.patch('requests.Session.post', return_value=mocker.MagicMock(status_code=400))
+    client = make_client(FakeClock(), retries=2)
+    assert client.sign_in_with_password('a@b.com', '123').status_code == 400
+    assert post.call_count == 1
+
+def test_circuit_opens_and_half_opens(mocker):
+    clock = FakeClock()
+    post = mocker.patch('requests.Session.post', side_effect=requests.Timeout())
+    client = make_client(clock, retries=0, failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        with pytest.raises(requests.Timeout):
+            client.sign_in_with_password('a@b.com', '123')
+    with pytest.raises(CircuitOpen):
+        client.sign_in_with_password('a@b.com', '123')
+    assert post.call_count == 2
+
+    clock.now = 31
+    post.side_effect = None
+    post.return_value = mocker.MagicMock(status_code=200)
+    client.sign_in_with_password('a@b.com', '123')
+    assert client.stats()['circuit'] == 'closed'
+
+def open_circuit(client, mocker):
+    post = mocker.patch('requests.Session.post', side_effect=requests.Timeout())
+    with pytest.raises(requests.Timeout):
+        client.sign_in_with_password('a@b.com', '123')
+    return post
+
+def test_unexpected_error_in_half_open_trial_reopens_circuit(mocker):
+    clock = FakeClock()
+    client = make_client(clock, retries=0, failure_threshold=1, reset_timeout=30)
+    post = open_circuit(client, mocker)
+
+    clock.now = 31
+    post.side_effect = requests.exceptions.ChunkedEncodingError()
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.sign_in_with_password('a@b.com', '123')
+    assert client.stats()['circuit'] == 'open'
+
+    clock.now = 62
+    post.side_effect = None
+    post.return_value = mocker.MagicMock(status_code=200)
+    client.sign_in_with_password('a@b.com', '123')
+    assert client.stats()['circuit'] == 'closed'
+
+def test_async_cancelled_half_open_trial_is_released(mocker):
+    import asyncio
+    from identity_client import AsyncIdentityToolkitClient
+    clock = FakeClock()
+    client = AsyncIdentityToolkitClient('http://localhost:9099/v1', 'chave', clock=clock, retries=0,
+                                        failure_threshold=1, reset_timeout=30)
+    post = mocker.patch.object(client.client, 'post', side_effect=client._httpx.ConnectError('recusada'))
+
+    async def main():
+        with pytest.raises(client._httpx.ConnectError):
+            await client.sign_in_with_password('a@b.com', '123')
+        clock.now = 31
+        post.side_effect = asyncio.CancelledError()
+        with pytest.raises(asyncio.CancelledError):
+            await client.sign_in_with_password('a@b.com', '123')
+        post.side_effect = None
+        post.return_value = mocker.MagicMock(status_code=200)
+        await client.sign_in_with_password('a@b.com', '123')
+        await client.aclose()
+
+    asyncio.run(main())
+    assert client.stats()['circuit'] == 'closed'
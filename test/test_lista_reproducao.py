@@ -1,4 +1,6 @@
+import os
 import pytest
+import playlists
 from app import app as flask_app
 
 @pytest.fixture
@@ -11,13 +13,13 @@ def client(app):
 
 def test_criar_lista_reproducao_success(client, mocker):
     mocker.patch('app.verify_firebase_token', return_value='user_id_123')
-    mocker.patch('app.connect_to_db')
     conn_mock = mocker.MagicMock()
     cursor_mock = mocker.MagicMock()
     cursor_mock.fetchone.return_value = None  # Simula ausência de resultado na verificação prévia
     cursor_mock.close = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
 
     data = {'user_id': 1, 'nome_lista': 'Lista Favoritos', 'codigos_volumes': [100, 101]}
     response = client.post('/lista_reproducao', headers={'Authorization': 'Bearer valid_token'}, json=data)
@@ -28,3 +30,133 @@ def test_criar_lista_reproducao_missing_data(client):
     response = client.post('/lista_reproducao', json={})
     assert response.status_code == 400
     assert response.json == {'message': 'Token, ID do usuário, nome da lista e códigos dos volumes são obrigatórios!'}
+
+def mock_db(mocker, fetchone=None, fetchall=None):
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.fetchone.return_value = fetchone
+    cursor_mock.fetchall.return_value = fetchall
+    conn_mock.cursor.return_value = cursor_mock
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+    return cursor_mock
+
+def test_ler_lista_reproducao_hidratada(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    rows = [
+        {'lrep_co_lista': 5, 'lrep_no_lista': 'Favoritos', 'posicao': 1, 'vol_co_volume': 101, 'vol_no_volume': 'Titulo 101',
+         'vol_tx_small_descricao': 'Desc', 'vol_tp_volume': 'F', 'vol_in_status': 'A'},
+        {'lrep_co_lista': 5, 'lrep_no_lista': 'Favoritos', 'posicao': 2, 'vol_co_volume': 100, 'vol_no_volume': None,
+         'vol_tx_small_descricao': None, 'vol_tp_volume': None, 'vol_in_status': None},
+    ]
+    cursor_mock = mock_db(mocker, fetchall=rows)
+
+    response = client.get('/lista_reproducao/5?user_id=1', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert response.json['nome'] == 'Favoritos'
+    assert [item['codigo'] for item in response.json['itens']] == [101, 100]
+    assert [item['disponivel'] for item in response.json['itens']] == [True, False]
+    assert cursor_mock.execute.call_count == 1
+
+def test_ler_lista_reproducao_vazia(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mock_db(mocker, fetchall=[{'lrep_co_lista': 5, 'lrep_no_lista': 'Vazia', 'posicao': None, 'vol_co_volume': None,
+                               'vol_no_volume': None, 'vol_tx_small_descricao': None, 'vol_tp_volume': None,
+                               'vol_in_status': None}])
+
+    response = client.get('/lista_reproducao/5?user_id=1', headers={'Authorization': 'Bearer valid_token'})
+    assert response.json == {'lrep_co_lista': 5, 'nome': 'Vazia', 'itens': []}
+
+def test_ler_lista_reproducao_not_found(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mock_db(mocker, fetchall=[])
+
+    response = client.get('/lista_reproducao/5?user_id=1', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 404
+
+def test_listas_contendo_titulo_usa_contem(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    cursor_mock = mock_db(mocker, fetchall=[{'lrep_co_lista': 5, 'lrep_no_lista': 'Favoritos', 'quantidade': 3}])
+
+    response = client.get('/listas_reproducao/1?contem=100', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert response.json == [{'lrep_co_lista': 5, 'nome': 'Favoritos', 'quantidade': 3}]
+    query, params = cursor_mock.execute.call_args[0]
+    assert '@>' in query
+    assert params == {'usuario': 1, 'contem': 100}
+
+def test_adicionar_volumes_em_lote(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    cursor_mock = mock_db(mocker, fetchone=([100, 101, 102],))
+
+    response = client.post('/lista_reproducao/5/volumes', json={'user_id': 1, 'codigos_volumes': [101, 102, 101]},
+                           headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert response.json == {'lrep_co_lista': 5, 'codigos_volumes': [100, 101, 102]}
+    query, params = cursor_mock.execute.call_args[0]
+    assert query.strip().startswith('UPDATE') and params['codigos'] == [101, 102]
+    assert cursor_mock.execute.call_count == 1
+
+def test_remover_um_volume_usa_array_remove(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    cursor_mock = mock_db(mocker, fetchone=([100],))
+
+    response = client.delete('/lista_reproducao/5/volumes', json={'user_id': 1, 'codigos_volumes': [101]},
+                             headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert 'array_remove' in cursor_mock.execute.call_args[0][0]
+
+def test_alterar_lista_not_found(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mock_db(mocker, fetchone=None)
+
+    response = client.delete('/lista_reproducao/5/volumes', json={'user_id': 1, 'codigos_volumes': [101, 102]},
+                             headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 404
+
+def test_reordenar_rejeita_conteudo_diferente(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    cursor_mock = mock_db(mocker)
+    cursor_mock.fetchone.side_effect = [None, (1,)]
+
+    response = client.put('/lista_reproducao/5/volumes', json={'user_id': 1, 'codigos_volumes': [102, 100]},
+                          headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 409
+
+@pytest.mark.skipif(not os.getenv('TEST_DATABASE_URL'), reason='TEST_DATABASE_URL não definido')
+def test_reordenar_lista_criada_com_repeticoes():
+    import psycopg2
+    conn = psycopg2.connect(os.environ['TEST_DATABASE_URL'])
+    try:
+        cur = conn.cursor()
+        cur.execute("""CREATE TEMP TABLE sys_lista_reproducao (lrep_co_lista integer, usu_co_usuario integer,
+                       lrep_no_lista text, lrep_in_status char(1), vol_co_volume integer[])""")
+        cur.execute("INSERT INTO sys_lista_reproducao VALUES (5, 1, 'Lista', 'A', '{100,100,101}')")
+        params = {'lista': 5, 'usuario': 1}
+        cur.execute(playlists.REORDENAR_SQL, {**params, 'codigos': [101]})
+        assert cur.fetchall() == []
+        cur.execute(playlists.REORDENAR_SQL, {**params, 'codigos': [101, 100]})
+        assert cur.fetchall() == [([101, 100],)]
+    finally:
+        conn.close()
+
+def test_alterar_lista_codigos_invalidos(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    db_mock = mocker.patch('app.get_db')
+
+    for body in ({'user_id': 1, 'codigos_volumes': []}, {'user_id': 1, 'codigos_volumes': ['a']}, {'codigos_volumes': [1]},
+                 [1, 2], 'codigos'):
+        response = client.post('/lista_reproducao/5/volumes', json=body, headers={'Authorization': 'Bearer valid_token'})
+        assert response.status_code == 400
+    db_mock.assert_not_called()
+
+def test_adicionar_alem_do_maximo(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    cursor_mock = mock_db(mocker)
+    cursor_mock.fetchone.side_effect = [None, (1,)]
+
+    response = client.post('/lista_reproducao/5/volumes', json={'user_id': 1, 'codigos_volumes': [101]},
+                           headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 409
+    assert response.json == {'message': 'A lista pode ter no máximo 500 volumes.'}
+    assert '<= 500' in cursor_mock.execute.call_args_list[0][0][0]
@@ -19,7 +19,7 @@ def test_login_success(client, mocker):
     mock_response = mocker.MagicMock()
     mock_response.status_code = 200
     mock_response.json.return_value = {'idToken': 'token123'}
-    mocker.patch('requests.post', return_value=mock_response)
+    mocker.patch('requests.Session.post', return_value=mock_response)
 
     data = {'email': 'usuario@teste.com', 'senha': '123456'}
     response = client.post('/login', json=data)
@@ -30,7 +30,7 @@ def test_login_failure(client, mocker):
     mock_response = mocker.MagicMock()
     mock_response.status_code = 401
     mock_response.json.return_value = {'error': 'Credenciais inválidas'}
-    mocker.patch('requests.post', return_value=mock_response)
+    mocker.patch('requests.Session.post', return_value=mock_response)
 
     data = {'email': 'usuario@teste.com', 'senha': '123456'}
     response = client.post('/login', json=data)
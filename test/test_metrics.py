@@ -0,0 +1,63 @@
+import os
+import psycopg2
+import pytest
+from psycopg2 import sql
+from app import app as flask_app
+from metrics import Registry, Counter, Histogram, statement_label, timed_connection_factory
+
+@pytest.fixture
+def client():
+    return flask_app.test_client()
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    h = registry.register(Histogram('lat', 'Latência.', ('route',), buckets=(0.1, 1.0)))
+    h.observe(0.05, '/a')
+    h.observe(0.5, '/a')
+    h.observe(3, '/a')
+    text = registry.render()
+    assert '# TYPE lat histogram' in text
+    assert 'lat_bucket{route="/a",le="0.1"} 1' in text
+    assert 'lat_bucket{route="/a",le="1.0"} 2' in text
+    assert 'lat_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'lat_count{route="/a"} 3' in text
+
+def test_counter_escapes_labels():
+    registry = Registry()
+    c = registry.register(Counter('req', 'Requisições.', ('route',)))
+    c.inc('/x"y')
+    c.inc('/x"y', amount=2)
+    assert 'req{route="/x\\"y"} 3' in registry.render()
+
+def test_statement_label():
+    assert statement_label("SELECT vol_co_volume FROM sys_volumes WHERE x = 1") == 'SELECT sys_volumes'
+    assert statement_label("\n  INSERT INTO sys_volumes_reproducao (a) VALUES (1)") == 'INSERT sys_volumes_reproducao'
+    assert statement_label(b"SELECT 1") == 'SELECT'
+    composed = sql.SQL(' ').join([sql.SQL('SELECT 1 FROM'), sql.SQL('sys_volumes')])
+    assert statement_label(composed, context=object()) == 'SELECT sys_volumes'
+
+@pytest.mark.skipif(not os.getenv('TEST_DATABASE_URL'), reason='TEST_DATABASE_URL não definido')
+def test_timed_cursor_accepts_composed_queries():
+    histogram = Histogram('stmt', 'Statements.', ('statement',))
+    conn = psycopg2.connect(os.environ['TEST_DATABASE_URL'], connection_factory=timed_connection_factory(histogram))
+    try:
+        cur = conn.cursor()
+        cur.execute(sql.SQL('SELECT count(*) FROM {}').format(sql.Identifier('pg_class')))
+        cur.execute(sql.SQL('SELECT 1'))
+        assert cur.fetchone() == (1,)
+    finally:
+        conn.close()
+    text = '\n'.join(histogram.samples())
+    assert 'statement="SELECT pg_class"' in text
+
+def test_metrics_endpoint_records_routes(client):
+    client.get('/')
+    client.get('/nao-existe')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert 'api_http_requests_total{route="/",method="GET",status="200"}' in text
+    assert 'api_http_requests_total{route="nao_mapeada",method="GET",status="404"}' in text
+    assert 'api_http_request_duration_seconds_count{route="/",method="GET"}' in text
+    assert 'api_cache_hit_ratio{cache="token"}' in text
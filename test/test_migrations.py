@@ -0,0 +1,185 @@
+import json
+import os
+import pytest
+import schema_migrations
+from schema_migrations import MigrationError, load_migrations
+
+def write(directory, name, sql):
+    (directory / name).write_text(sql, encoding='utf-8')
+
+def fake_connect(mocker, applied=None):
+    conn = mocker.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchone.return_value = (True,)
+    cur.fetchall.return_value = [(version, checksum, None) for version, checksum in (applied or {}).items()]
+    return conn, cur
+
+def test_load_migrations_in_version_order(tmp_path):
+    write(tmp_path, '0002_b.sql', '-- migrate:no-transaction\nCREATE INDEX CONCURRENTLY IF NOT EXISTS ix ON t (a);')
+    write(tmp_path, '0001_a.sql', 'CREATE TABLE t (a int);')
+    write(tmp_path, 'leia-me.txt', 'ignorado')
+    migrations = load_migrations(str(tmp_path))
+    assert [(m.version, m.name, m.transactional) for m in migrations] == [(1, 'a', True), (2, 'b', False)]
+
+def test_duplicate_version_is_rejected(tmp_path):
+    write(tmp_path, '0001_a.sql', 'SELECT 1;')
+    write(tmp_path, '0001_b.sql', 'SELECT 2;')
+    with pytest.raises(MigrationError):
+        load_migrations(str(tmp_path))
+
+def test_no_transaction_statements_skip_comments(tmp_path):
+    write(tmp_path, '0001_a.sql', '-- migrate:no-transaction\n-- comentário\nCREATE INDEX a ON t (x);\n\n'
+                                  '-- outro\nCREATE INDEX b ON t (y)\n    WHERE z;\n')
+    migration = load_migrations(str(tmp_path))[0]
+    assert list(migration.statements()) == ['CREATE INDEX a ON t (x)', 'CREATE INDEX b ON t (y)\n    WHERE z']
+
+def test_repo_migrations_load():
+    migrations = load_migrations()
+    assert [m.version for m in migrations] == list(range(1, len(migrations) + 1))
+    concorrentes = [m for m in migrations if not m.transactional]
+    assert concorrentes and all('CONCURRENTLY' in s for m in concorrentes for s in m.statements())
+
+def test_migrate_applies_only_pending(mocker, tmp_path):
+    write(tmp_path, '0001_a.sql', 'CREATE TABLE t (a int);')
+    write(tmp_path, '0002_b.sql', 'CREATE TABLE u (a int);')
+    primeira = load_migrations(str(tmp_path))[0]
+    conn, cur = fake_connect(mocker, {1: primeira.checksum})
+
+    applied = schema_migrations.migrate(lambda: conn, str(tmp_path))
+
+    assert [m.version for m in applied] == [2]
+    executed = [call.args[0] for call in cur.execute.call_args_list]
+    assert 'CREATE TABLE u (a int);' in executed
+    assert 'CREATE TABLE t (a int);' not in executed
+    conn.commit.assert_called_once()
+    conn.close.assert_called_once()
+
+def test_migrate_rejects_edited_migration(mocker, tmp_path):
+    write(tmp_path, '0001_a.sql', 'CREATE TABLE t (a int);')
+    conn, cur = fake_connect(mocker, {1: 'outro-checksum'})
+    with pytest.raises(MigrationError):
+        schema_migrations.migrate(lambda: conn, str(tmp_path))
+    cur.execute.assert_any_call('SELECT pg_advisory_unlock(%s)', (schema_migrations.LOCK_KEY,))
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+@pytest.fixture
+def scratch_db():
+    """Schema descartável com as tabelas, as migrações e dados suficientes para o planner preferir índices."""
+    url = os.getenv('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip('TEST_DATABASE_URL não definido')
+    import psycopg2
+    from sqlalchemy import create_engine
+    from app import Base
+
+    admin = psycopg2.connect(url)
+    admin.autocommit = True
+    cur = admin.cursor()
+    cur.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    if not cur.fetchone():
+        admin.close()
+        pytest.skip('pg_trgm não disponível neste servidor')
+    cur.execute('DROP SCHEMA IF EXISTS teste_migracoes CASCADE')
+    cur.execute('CREATE SCHEMA teste_migracoes')
+
+    def connect():
+        return psycopg2.connect(url, options='-c search_path=teste_migracoes')
+
+    engine = create_engine('postgresql+psycopg2://', creator=connect)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    schema_migrations.migrate(connect)
+
+    conn = connect()
+    conn.autocommit = True
+    seed = conn.cursor()
+    seed.execute("""
+        INSERT INTO sys_volumes (vol_co_volume, vol_no_volume, vol_in_status, vol_tp_volume, vol_nu_classificacao)
+        SELECT i, 'Titulo ' || i, CASE WHEN i % 10 = 0 THEN 'I' ELSE 'A' END,
+               CASE WHEN i % 50 = 0 THEN 'F' ELSE 'S' END, (i % 100)::text
+        FROM generate_series(1, 20000) i
+    """)
+    seed.execute("""
+        INSERT INTO sys_volumes_reproducao (volr_co_reproducao, volr_no_titulo, usu_co_usuario, volr_co_volume, volr_tp_volume,
+                                            volr_dt_reproducao)
+        SELECT i, 'Titulo', i % 2000, i % 20000 + 1, 'F', date_trunc('month', now()) + (i % 80) * interval '1 day'
+        FROM generate_series(1, 100000) i
+    """)
+    seed.execute("""
+        INSERT INTO sys_volumes_progresso (usu_co_usuario, vol_co_volume, volp_nu_posicao, volp_in_status, volp_dt_atualizacao)
+        SELECT i % 2000, i, 60, CASE WHEN i % 3 = 0 THEN 'C' ELSE 'A' END, now() - i * interval '1 minute'
+        FROM generate_series(1, 20000) i
+    """)
+    seed.execute("""
+        INSERT INTO sys_lista_reproducao (lrep_co_lista, usu_co_usuario, vol_co_volume, lrep_no_lista, lrep_in_status)
+        SELECT i, i % 2000, ARRAY[i % 20000 + 1, (i * 7) % 20000 + 1], 'Lista', 'A' FROM generate_series(1, 20000) i
+    """)
+    seed.execute('ANALYZE')
+    seed.close()
+
+    def explain(query, params):
+        cur = conn.cursor()
+        cur.execute('EXPLAIN (FORMAT JSON) ' + query, params)
+        plan = cur.fetchone()[0]
+        cur.close()
+        return list(plan_nodes((plan if isinstance(plan, list) else json.loads(plan))[0]['Plan']))
+
+    yield explain
+    conn.close()
+    cur.execute('DROP SCHEMA teste_migracoes CASCADE')
+    admin.close()
+
+def index_names(nodes):
+    return {node.get('Index Name') for node in nodes} - {None}
+
+def assert_no_seq_scan(nodes):
+    assert not [node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan']
+
+def test_explain_historico(scratch_db):
+    from app import HISTORICO_SQL, historico_params
+    nodes = scratch_db(HISTORICO_SQL + 'LIMIT %(limite)s', {**historico_params(7, None), 'limite': 21})
+    assert_no_seq_scan(nodes)
+    # Append em ordem de partição (não MergeAppend nem Sort): o LIMIT para na partição mais nova que bastar.
+    assert [node['Node Type'] for node in nodes][:2] == ['Limit', 'Append']
+    assert not [node for node in nodes if node['Node Type'] in ('Sort', 'Merge Append')]
+
+def test_explain_historico_cursor_prunes_newer_partitions(scratch_db):
+    from app import HISTORICO_SQL, historico_params
+    from datetime import datetime, timezone
+    from playback_partitions import month_start
+    atual = month_start(datetime.now(timezone.utc))
+    nodes = scratch_db(HISTORICO_SQL + 'LIMIT %(limite)s', {**historico_params(7, (atual, 90000)), 'limite': 21})
+    assert_no_seq_scan(nodes)
+    relations = {node.get('Relation Name') for node in nodes} - {None}
+    assert relations == {f'sys_volumes_reproducao_p{atual:%Y_%m}'}
+
+@pytest.mark.parametrize('filtros, indice', [
+    ({'classificacao': '16'}, 'ix_sys_volumes_classificacao_ativos'),
+    ({'tipo': 'F'}, 'ix_sys_volumes_tipo_ativos'),
+])
+def test_explain_busca_filtros(scratch_db, filtros, indice):
+    # Filtros seletivos (1%/2% do catálogo): sem o índice composto o planner percorreria os ativos em ordem.
+    from search import build_search_query
+    params = {'q': None, 'genero': None, 'classificacao': None, 'tipo': None, 'limite': 20, 'offset': 0, **filtros}
+    nodes = scratch_db(*build_search_query(params))
+    assert_no_seq_scan(nodes)
+    assert indice in index_names(nodes)
+
+def test_explain_detalhes(scratch_db):
+    nodes = scratch_db("SELECT vol_no_volume FROM sys_volumes WHERE vol_co_volume = %s AND vol_in_status = 'A'", (42,))
+    assert_no_seq_scan(nodes)
+
+def test_explain_continuar(scratch_db):
+    from playback_progress import CONTINUAR_SQL
+    nodes = scratch_db(CONTINUAR_SQL, (7, 20))
+    assert_no_seq_scan(nodes)
+    assert 'ix_sys_volumes_progresso_continuar' in index_names(nodes)
+
+def test_explain_listas_contendo(scratch_db):
+    from playlists import LISTAS_CONTENDO_SQL
+    nodes = scratch_db(LISTAS_CONTENDO_SQL, {'usuario': 7, 'contem': 8})
+    assert_no_seq_scan(nodes)
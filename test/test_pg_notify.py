@@ -0,0 +1,15 @@
+from pg_notify import NotifyListener
+
+def test_first_connect_runs_reconnect_handlers(mocker):
+    listener = NotifyListener(mocker.MagicMock())
+    listener.subscribe('sys_volumes_changed', lambda payload: None)
+    cleared = []
+    def clear():
+        # Corpos guardados antes do primeiro LISTEN nunca receberiam invalidação.
+        cleared.append(listener.connected)
+        listener.stop()
+    listener.on_reconnect(clear)
+
+    listener._run()
+    assert cleared == [True]
+    assert listener.stats()['reconnects'] == 0
@@ -0,0 +1,113 @@
+import json
+import os
+from datetime import datetime
+import psycopg2
+import pytest
+from playback_ingest import PlaybackIngestor, QueueFull
+
+class FakeDb:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        if self.fail:
+            raise RuntimeError('banco indisponível')
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def test_ingestor_flushes_batches(tmp_path, mocker):
+    db = FakeDb()
+    execute_values = mocker.patch('playback_ingest.execute_values')
+    mocker.patch.object(FakeDb, 'cursor', create=True)
+    mocker.patch.object(FakeDb, 'commit', create=True)
+    ingestor = PlaybackIngestor(db, str(tmp_path), flush_size=10, flush_interval=60)
+    ingestor._open_segment()
+    ingestor.submit(1, 2, 'Titulo', 'F')
+    ingestor.submit(1, 3, 'Outro', 'S')
+    assert ingestor.flush()
+    events = execute_values.call_args[0][2]
+    assert [event[:5] for event in events] == [['Titulo', 1, 2, 'F', None], ['Outro', 1, 3, 'S', None]]
+    assert all(datetime.fromisoformat(event[5]).tzinfo is not None for event in events)
+    assert ingestor.stats()['flushed'] == 2
+    assert len(list(tmp_path.iterdir())) == 1
+
+def test_ingestor_backpressure(tmp_path):
+    ingestor = PlaybackIngestor(FakeDb(), str(tmp_path), max_queue=1)
+    ingestor._open_segment()
+    ingestor.submit(1, 2, 'Titulo', 'F')
+    with pytest.raises(QueueFull):
+        ingestor.submit(1, 3, 'Outro', 'F')
+    assert ingestor.stats()['rejected'] == 1
+
+def test_ingestor_recovers_spool_after_crash(tmp_path, mocker):
+    crashed = PlaybackIngestor(FakeDb(fail=True), str(tmp_path))
+    crashed._open_segment()
+    crashed.submit(1, 2, 'Titulo', 'F')
+    assert not crashed.flush()
+    aceito = crashed._pending[0][1]
+
+    execute_values = mocker.patch('playback_ingest.execute_values')
+    mocker.patch.object(FakeDb, 'cursor', create=True)
+    mocker.patch.object(FakeDb, 'commit', create=True)
+    restarted = PlaybackIngestor(FakeDb(), str(tmp_path))
+    restarted._recover()
+    restarted._open_segment()
+    assert restarted.flush()
+    # Regravado com a data do aceite, não a do replay.
+    assert execute_values.call_args[0][2] == aceito
+
+def test_ingestor_recover_claims_segment_once(tmp_path, mocker):
+    segment = tmp_path / 'reproducao-999999999-1-1.spool'
+    segment.write_text(json.dumps(['Titulo', 1, 2, 'F', None]) + '\n', encoding='utf-8')
+    worker = os.getpid()
+    mocker.patch('playback_ingest._process_alive', side_effect=lambda pid: pid == worker)
+
+    first = PlaybackIngestor(FakeDb(), str(tmp_path))
+    first._recover()
+    # Outro worker subindo em seguida: o segmento agora é de um processo vivo.
+    mocker.patch('os.getpid', return_value=worker + 1)
+    second = PlaybackIngestor(FakeDb(), str(tmp_path))
+    second._recover()
+    (claimed, events), = first._pending
+    assert not segment.exists()
+    assert os.path.basename(claimed).split('-')[1] == str(worker)
+    # Segmento de antes da data no evento: recebe a data da última escrita no arquivo.
+    assert len(events[0]) == 6
+    assert second._pending == []
+
+def test_ingestor_backpressure_counts_unflushed_segments(tmp_path):
+    ingestor = PlaybackIngestor(FakeDb(fail=True), str(tmp_path), max_queue=2)
+    ingestor._open_segment()
+    ingestor.submit(1, 2, 'Titulo', 'F')
+    ingestor.submit(1, 3, 'Outro', 'F')
+    assert not ingestor.flush()
+    assert ingestor.stats()['pending_events'] == 2
+    with pytest.raises(QueueFull):
+        ingestor.submit(1, 4, 'Mais um', 'F')
+
+def test_ingestor_dead_letters_rows_that_keep_failing(tmp_path, mocker):
+    def execute_values(cur, sql, events, page_size=None):
+        if len(events) > 1 or events[0][2] == 99:
+            raise psycopg2.IntegrityError('violates foreign key constraint')
+    mocker.patch('playback_ingest.execute_values', side_effect=execute_values)
+    mocker.patch.object(FakeDb, 'cursor', create=True)
+    mocker.patch.object(FakeDb, 'commit', create=True)
+    ingestor = PlaybackIngestor(FakeDb(), str(tmp_path), max_attempts=2)
+    ingestor._open_segment()
+    ingestor.submit(1, 2, 'Titulo', 'F')
+    ingestor.submit(1, 99, 'Removido', 'F')
+
+    assert not ingestor.flush()
+    ingestor.submit(1, 3, 'Depois', 'F')
+    assert ingestor.flush()
+    stats = ingestor.stats()
+    assert (stats['flushed'], stats['dead_lettered'], stats['pending_events']) == (2, 1, 0)
+    dead, = tmp_path.glob('*.dead')
+    rejeitado = json.loads(dead.read_text(encoding='utf-8'))
+    assert rejeitado['evento'][:5] == ['Removido', 1, 99, 'F', None]
@@ -0,0 +1,106 @@
+import gzip
+import pytest
+from datetime import datetime, timezone
+import app as app_module
+from app import app as flask_app, decode_cursor, encode_cursor
+from playback_partitions import PartitionError, PartitionMaintainer, add_months, archive, ensure, month_start
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+def bound(lower, upper):
+    return f"FOR VALUES FROM ({lower}) TO ({upper})"
+
+def fake_conn(mocker, partitions):
+    conn = mocker.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchall.return_value = partitions
+    return conn, cur
+
+def executed(cur):
+    return [call.args[0] for call in cur.execute.call_args_list]
+
+def test_month_helpers():
+    assert month_start(datetime.fromisoformat('2026-03-31T23:30:00-03:00')) == utc(2026, 4, 1)
+    assert add_months(utc(2026, 11, 1), 3) == utc(2027, 2, 1)
+    assert add_months(utc(2026, 1, 1), -1) == utc(2025, 12, 1)
+
+def test_ensure_creates_missing_months_after_legacy(mocker):
+    conn, cur = fake_conn(mocker, [
+        ('sys_volumes_reproducao_legado', bound('MINVALUE', "'2026-11-01 00:00:00+00'")),
+        ('sys_volumes_reproducao_p2026_11', bound("'2026-11-01 00:00:00+00'", "'2026-12-01 00:00:00+00'")),
+    ])
+    criadas = ensure(conn, meses_futuros=2, now=utc(2026, 10, 18))
+    assert criadas == ['sys_volumes_reproducao_p2026_12']
+    create = [call for call in cur.execute.call_args_list if call.args[0].startswith('CREATE TABLE')]
+    assert create[0].args[1] == (utc(2026, 12, 1), utc(2027, 1, 1))
+    conn.commit.assert_called_once()
+
+def test_ensure_starts_at_current_month_after_gap(mocker):
+    conn, cur = fake_conn(mocker, [('sys_volumes_reproducao_p2026_01', bound("'2026-01-01 00:00:00+00'", "'2026-02-01 00:00:00+00'"))])
+    assert ensure(conn, meses_futuros=1, now=utc(2026, 10, 18)) == [
+        'sys_volumes_reproducao_p2026_10', 'sys_volumes_reproducao_p2026_11']
+
+def test_ensure_rejects_maxvalue(mocker):
+    conn, _ = fake_conn(mocker, [('x', bound('MINVALUE', 'MAXVALUE'))])
+    with pytest.raises(PartitionError):
+        ensure(conn, now=utc(2026, 10, 18))
+    conn.rollback.assert_called_once()
+
+def test_archive_writes_gzip_then_drops(mocker, tmp_path):
+    conn, cur = fake_conn(mocker, [
+        ('sys_volumes_reproducao_legado', bound('MINVALUE', "'2024-09-01 00:00:00+00'")),
+        ('sys_volumes_reproducao_p2024_09', bound("'2024-09-01 00:00:00+00'", "'2024-10-01 00:00:00+00'")),
+        ('sys_volumes_reproducao_p2024_10', bound("'2024-10-01 00:00:00+00'", "'2024-11-01 00:00:00+00'")),
+    ])
+    cur.copy_expert.side_effect = lambda sql, f, size: f.write(b'volr_co_reproducao\n1\n2\n')
+    cur.rowcount = 2
+
+    arquivadas = archive(conn, str(tmp_path), 24, now=utc(2026, 10, 18))
+    assert [a['particao'] for a in arquivadas] == ['sys_volumes_reproducao_legado', 'sys_volumes_reproducao_p2024_09']
+    with gzip.open(tmp_path / 'sys_volumes_reproducao_p2024_09.csv.gz', 'rb') as f:
+        assert f.read() == b'volr_co_reproducao\n1\n2\n'
+    assert 'ALTER TABLE sys_volumes_reproducao DETACH PARTITION sys_volumes_reproducao_p2024_09' in executed(cur)
+    assert 'DROP TABLE sys_volumes_reproducao_p2024_10' not in executed(cur)
+    assert not list(tmp_path.glob('*.tmp'))
+
+def test_archive_failure_keeps_partition(mocker, tmp_path):
+    conn, cur = fake_conn(mocker, [('sys_volumes_reproducao_p2024_01', bound("'2024-01-01 00:00:00+00'", "'2024-02-01 00:00:00+00'"))])
+    cur.copy_expert.side_effect = RuntimeError('disco cheio')
+    with pytest.raises(RuntimeError):
+        archive(conn, str(tmp_path), 12, now=utc(2026, 10, 18))
+    assert not [sql for sql in executed(cur) if sql.startswith('DROP')]
+    assert not list(tmp_path.iterdir())
+    conn.rollback.assert_called_once()
+
+def test_archive_requires_retention():
+    with pytest.raises(PartitionError):
+        archive(None, '/tmp', 0)
+
+def test_maintainer_counts_failures(mocker):
+    ensure = mocker.patch('playback_partitions.ensure', side_effect=[RuntimeError('sem banco'), ['p2026_11']])
+    maintainer = PartitionMaintainer(mocker.MagicMock(), meses_futuros=1)
+    assert not maintainer.run_once()
+    assert maintainer.run_once()
+    assert maintainer.stats() | {'last_run': None} == {
+        'meses_futuros': 1, 'runs': 1, 'failures': 1, 'created': ['p2026_11'], 'last_run': None, 'last_error': None}
+    assert ensure.call_count == 2
+
+def test_historico_cursor_roundtrip():
+    item = {'volr_co_reproducao': 42, 'volr_dt_reproducao': datetime(2026, 10, 18, 9, 30, 0, 123456, tzinfo=timezone.utc)}
+    assert decode_cursor(encode_cursor(item)) == (item['volr_dt_reproducao'], 42)
+    assert decode_cursor('aDE6MTA') is None  # 'h1:10', formato anterior à ordem por data
+
+def test_historico_cursor_params(mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    db_mock = mocker.patch('app.get_db')
+    cur = db_mock.return_value.__enter__.return_value.cursor.return_value
+    cur.fetchall.return_value = []
+    item = {'volr_co_reproducao': 7, 'volr_dt_reproducao': utc(2026, 9, 1)}
+
+    response = flask_app.test_client().get(f'/historico/5?limite=10&cursor={encode_cursor(item)}',
+                                           headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    sql, params = cur.execute.call_args.args
+    assert sql.startswith(app_module.HISTORICO_SQL)
+    assert params == {'usuario': 5, 'data': utc(2026, 9, 1), 'codigo': 7, 'limite': 11}
@@ -0,0 +1,128 @@
+import pytest
+from datetime import datetime, timezone
+from app import app as flask_app, progress_coalescer
+from playback_ingest import QueueFull
+from playback_progress import ProgressCoalescer, merge_continuar, parse_progresso, ProgressError
+
+class FakeDb:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        if self.fail:
+            raise RuntimeError('banco indisponível')
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+@pytest.fixture
+def client():
+    return flask_app.test_client()
+
+def test_coalescer_keeps_last_heartbeat_per_title(mocker):
+    execute_values = mocker.patch('playback_progress.execute_values')
+    coalescer = ProgressCoalescer(FakeDb(), clock=Clock())
+    coalescer.submit(1, 10, 'Titulo', 'F', 30)
+    coalescer.submit(1, 10, 'Titulo', 'F', 60)
+    coalescer.submit(1, 11, 'Serie', 'S', 5, ep_temp='T1E01')
+    assert coalescer.flush()
+    rows = execute_values.call_args[0][2]
+    assert sorted((row[1], row[3]) for row in rows) == [(10, 60), (11, 5)]
+    stats = coalescer.stats()
+    assert stats['received'] == 3 and stats['coalesced'] == 1 and stats['written'] == 2 and stats['pending'] == 0
+
+def test_coalescer_bounded(mocker):
+    coalescer = ProgressCoalescer(FakeDb(), max_pending=1)
+    coalescer.submit(1, 10, 'Titulo', 'F', 30)
+    coalescer.submit(1, 10, 'Titulo', 'F', 40)
+    with pytest.raises(QueueFull):
+        coalescer.submit(2, 10, 'Titulo', 'F', 30)
+
+def test_failed_flush_keeps_newer_heartbeats(mocker):
+    db = FakeDb(fail=True)
+    coalescer = ProgressCoalescer(db, clock=Clock())
+    coalescer.submit(1, 10, 'Titulo', 'F', 30)
+    coalescer.submit(1, 11, 'Outro', 'F', 30)
+    original = coalescer._restore
+
+    def restore_after_new_heartbeat(batch):
+        coalescer.submit(1, 10, 'Titulo', 'F', 90)
+        original(batch)
+    coalescer._restore = restore_after_new_heartbeat
+
+    assert not coalescer.flush()
+    pending = {event['vol_co_volume']: event['volp_nu_posicao'] for event in coalescer.pending(1)}
+    assert pending == {10: 90, 11: 30}
+    assert coalescer.stats()['pending'] == 2
+
+def test_merge_continuar_prefers_newer_and_drops_concluded():
+    old = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    new = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    rows = [{'vol_co_volume': 10, 'volp_nu_posicao': 30, 'volp_dt_atualizacao': old},
+            {'vol_co_volume': 11, 'volp_nu_posicao': 30, 'volp_dt_atualizacao': old}]
+    pending = [{'vol_co_volume': 10, 'volp_nu_posicao': 90, 'volp_in_status': 'A', 'volp_dt_atualizacao': new},
+               {'vol_co_volume': 11, 'volp_nu_posicao': 0, 'volp_in_status': 'C', 'volp_dt_atualizacao': new}]
+    itens = merge_continuar(rows, pending, 10)
+    assert [(item['vol_co_volume'], item['volp_nu_posicao']) for item in itens] == [(10, 90)]
+
+def test_parse_progresso_validates():
+    assert parse_progresso({'user_id': 1, 'titulo_id': 2, 'posicao': 3})['concluido'] is False
+    for data in ({'user_id': 1, 'titulo_id': 2}, {'user_id': 1, 'titulo_id': 2, 'posicao': -1},
+                 {'user_id': 1, 'titulo_id': 2, 'posicao': 3, 'ep_temp': 'T10E100'},
+                 ['user_id', 'titulo_id', 'posicao'], 'user_id titulo_id posicao', 7):
+        with pytest.raises(ProgressError):
+            parse_progresso(data)
+
+def test_progresso_endpoint_coalesces(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.known_ids.volume', return_value=('Titulo 1', 'S'))
+    mocker.patch('app.known_ids.has_user', return_value=True)
+    mocker.patch('app.progress_coalescer.start')
+    submit = mocker.patch('app.progress_coalescer.submit')
+
+    data = {'user_id': 1, 'titulo_id': 1, 'posicao': 120, 'ep_temp': 'T1E02'}
+    response = client.post('/progresso', headers={'Authorization': 'Bearer valid_token'}, json=data)
+    assert response.status_code == 204
+    submit.assert_called_once_with(1, 1, 'Titulo 1', 'S', 120, None, 'T1E02', False)
+
+def test_continuar_overlays_pending(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    old = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.fetchall.return_value = [{'vol_co_volume': 10, 'vol_no_volume': 'Serie', 'vol_tp_volume': 'S',
+                                          'volp_ep_temp': 'T1E01', 'volp_nu_posicao': 30, 'volp_nu_duracao': 1800,
+                                          'volp_dt_atualizacao': old}]
+    conn_mock.cursor.return_value = cursor_mock
+    mocker.patch('app.get_db').return_value.__enter__.return_value = conn_mock
+    mocker.patch.object(progress_coalescer, 'pending', return_value=[{
+        'vol_co_volume': 11, 'vol_no_volume': 'Filme', 'vol_tp_volume': 'F', 'volp_ep_temp': None,
+        'volp_nu_posicao': 5, 'volp_nu_duracao': None, 'volp_in_status': 'A',
+        'volp_dt_atualizacao': datetime(2024, 1, 2, tzinfo=timezone.utc)}])
+
+    response = client.get('/continuar/1?limite=5', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert [item['titulo'] for item in response.json] == ['Filme', 'Serie']
+    assert response.json[1]['episodio_temporada'] == 'T1E01'
+    assert cursor_mock.execute.call_args[0][1] == (1, 6)
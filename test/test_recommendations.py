@@ -0,0 +1,115 @@
+import os
+import pytest
+import app as app_module
+from app import app as flask_app
+from recommendations import Recommendations, RecommendationsUnavailable, group, seeds
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+from recommendations import build_neighbors, save
+
+# Usuários 1-3 assistem 10 e 20; 2-3 também 30; 4 só 40. O 1 reassiste 10.
+USUARIOS = [1, 1, 1, 2, 2, 2, 3, 3, 3, 4]
+VOLUMES = [10, 10, 20, 10, 20, 30, 10, 20, 30, 40]
+
+def volume_row(codigo):
+    return {'vol_co_volume': codigo, 'vol_no_volume': f'Titulo {codigo}', 'vol_tx_small_descricao': 'Descricao',
+            'vol_tp_volume': 'F'}
+
+@pytest.fixture
+def tabela():
+    return build_neighbors(np.array(USUARIOS, dtype=np.int32), np.array(VOLUMES, dtype=np.int32), k=3)
+
+@pytest.fixture
+def published(tabela, tmp_path, mocker):
+    path = str(tmp_path / 'recomendacoes.npy')
+    save(path, tabela, {'k': 3})
+    mocker.patch.object(app_module, 'recomendacoes', Recommendations(path, check_interval=0))
+    return path
+
+def test_build_neighbors_cosine_and_support(tabela):
+    assert list(tabela['volume']) == [10, 20, 30, 40]
+    vizinhos = dict(zip(tabela['volume'], tabela['vizinhos'].tolist()))
+    # 10 e 20: 3 usuários em comum, sqrt(3 * 3) -> 1.0; 30 só divide 2 usuários com cada um.
+    assert vizinhos[10] == [20, 30, -1]
+    assert vizinhos[30] == [10, 20, -1]
+    assert vizinhos[40] == [-1, -1, -1]
+    assert tabela['scores'][0][0] == pytest.approx(1.0)
+    assert tabela['scores'][0][1] == pytest.approx(2 / np.sqrt(6))
+
+def test_build_neighbors_blocks_match_single_pass():
+    rng = np.random.default_rng(7)
+    usuarios = rng.integers(0, 300, 5000).astype(np.int32)
+    volumes = (rng.zipf(1.5, 5000) % 200).astype(np.int32)
+    inteiro = build_neighbors(usuarios, volumes, k=10)
+    em_blocos = build_neighbors(usuarios, volumes, k=10, memoria_bloco=200 * 16 * 7)
+    assert np.array_equal(inteiro['vizinhos'], em_blocos['vizinhos'])
+    assert np.allclose(inteiro['scores'], em_blocos['scores'])
+
+def test_recommendations_mmap_and_reload(tabela, tmp_path):
+    path = str(tmp_path / 'recomendacoes.npy')
+    recomendacoes = Recommendations(path, check_interval=0)
+    with pytest.raises(RecommendationsUnavailable):
+        recomendacoes.neighbors(10)
+
+    save(path, tabela, {'k': 3})
+    assert [v for v, _ in recomendacoes.neighbors(10)] == [20, 30]
+    assert recomendacoes.neighbors(99) == []
+    assert recomendacoes.stats()['misses'] == 1
+
+    save(path, build_neighbors(np.array([1, 1], dtype=np.int32), np.array([10, 50], dtype=np.int32), k=3,
+                               min_coocorrencias=1), {'k': 3})
+    assert [v for v, _ in recomendacoes.neighbors(10)] == [50]
+    assert recomendacoes.stats()['reloads'] == 2
+
+def test_group_skips_seen_and_repeated():
+    sementes = seeds([(10, 'Dez'), (20, 'Vinte'), (10, 'Dez'), (30, 'Trinta')], 2)
+    assert sementes == {10: 'Dez', 20: 'Vinte'}
+    vizinhos = {10: [(20, 1.0), (30, 0.8), (40, 0.5)], 20: [(30, 0.9), (50, 0.4), (60, 0.3)]}
+    grupos = group(sementes, vizinhos, {30, 40, 50, 60}, limite=2, vistos=[40])
+    assert grupos == [(10, [(30, 0.8)]), (20, [(50, 0.4), (60, 0.3)])]
+
+def test_recomendacoes_usuario(published, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    db_mock = mocker.patch('app.read_db')
+    cur = db_mock.return_value.__enter__.return_value.cursor.return_value
+    cur.fetchall.side_effect = [[(20, 'Titulo 20')], [volume_row(10), volume_row(30)]]
+
+    response = flask_app.test_client().get('/recomendacoes/1', headers={'Authorization': 'Bearer valid_token'})
+
+    assert response.status_code == 200
+    assert response.json[0]['porque_assistiu'] == {'codigo': 20, 'titulo': 'Titulo 20'}
+    assert [t['codigo'] for t in response.json[0]['titulos']] == [10, 30]
+
+def test_recomendacoes_titulo_usa_snapshot(published, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.snapshot_volume_rows', return_value={30: volume_row(30)})
+    db_mock = mocker.patch('app.read_db')
+
+    response = flask_app.test_client().get('/recomendacoes/titulo/10?limite=5',
+                                           headers={'Authorization': 'Bearer valid_token'})
+
+    assert response.status_code == 200
+    assert [t['codigo'] for t in response.json] == [30]
+    db_mock.assert_not_called()
+
+def test_recomendacoes_indisponiveis(tmp_path, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch.object(app_module, 'recomendacoes', Recommendations(str(tmp_path / 'nada.npy')))
+
+    response = flask_app.test_client().get('/recomendacoes/titulo/10', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 503
+
+def test_recomendacoes_limite_invalido(mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    response = flask_app.test_client().get('/recomendacoes/1?limite=0', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 400
+
+def test_missing_numpy_is_unavailable(mocker, tmp_path):
+    mocker.patch.dict('sys.modules', {'numpy': None})
+    recomendacoes = Recommendations(str(tmp_path / 'vizinhos.npy'))
+    assert not recomendacoes.available()
+    assert not recomendacoes.stats()['disponivel']
+    with pytest.raises(RecommendationsUnavailable, match='pip install'):
+        recomendacoes.neighbors(1)
@@ -11,13 +11,13 @@ def client(app):
 
 def test_reproducao_success(client, mocker):
     mocker.patch('app.verify_firebase_token', return_value='user_id_123')
-    mocker.patch('app.connect_to_db')
     conn_mock = mocker.MagicMock()
     cursor_mock = mocker.MagicMock()
     cursor_mock.fetchone.side_effect = [(1,), (1,)]  # Simula que o usuário e título existem
     cursor_mock.close = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
 
     data = {'user_id': 1, 'titulo_id': 1}
     response = client.post('/reproducao', headers={'Authorization': 'Bearer valid_token'}, json=data)
@@ -28,3 +28,41 @@ def test_reproducao_missing_data(client):
     response = client.post('/reproducao', json={})
     assert response.status_code == 400
     assert response.json == {'message': 'ID do usuário e ID do título são obrigatórios!'}
+
+def test_reproducao_async_enqueues(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.REPRODUCAO_MODO', 'async')
+    mocker.patch('app.known_ids.volume', return_value=('Titulo 1', 'F'))
+    mocker.patch('app.known_ids.has_user', return_value=True)
+    mocker.patch('app.start_catalog_listener')
+    mocker.patch('app.playback_ingestor.start')
+    submit = mocker.patch('app.playback_ingestor.submit')
+
+    data = {'user_id': 1, 'titulo_id': 1}
+    response = client.post('/reproducao', headers={'Authorization': 'Bearer valid_token'}, json=data)
+    assert response.status_code == 202
+    submit.assert_called_once_with(1, 1, 'Titulo 1', 'F', None)
+
+    response = client.post('/reproducao', headers={'Authorization': 'Bearer valid_token'}, json={**data, 'ep_temp': 'T1E02'})
+    assert response.status_code == 202
+    assert submit.call_args[0][4] == 'T1E02'
+
+def test_reproducao_ep_temp_invalido(client):
+    data = {'user_id': 1, 'titulo_id': 1, 'ep_temp': 'T01E002'}
+    response = client.post('/reproducao', headers={'Authorization': 'Bearer valid_token'}, json=data)
+    assert response.status_code == 400
+
+def test_reproducao_async_queue_full(client, mocker):
+    from playback_ingest import QueueFull
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.REPRODUCAO_MODO', 'async')
+    mocker.patch('app.known_ids.volume', return_value=('Titulo 1', 'F'))
+    mocker.patch('app.known_ids.has_user', return_value=True)
+    mocker.patch('app.start_catalog_listener')
+    mocker.patch('app.playback_ingestor.start')
+    mocker.patch('app.playback_ingestor.submit', side_effect=QueueFull('Fila cheia'))
+
+    data = {'user_id': 1, 'titulo_id': 1}
+    response = client.post('/reproducao', headers={'Authorization': 'Bearer valid_token'}, json=data)
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
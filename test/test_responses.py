@@ -0,0 +1,139 @@
+import gzip
+import json
+import pytest
+import app as app_module
+from app import app as flask_app, title_cache, response_cache
+from responses import EncodedBody, VersionMap, conditional, content_etag, etag_matches, negotiate
+
+DETALHES = {
+    'vol_no_volume': 'Titulo 1',
+    'vol_tx_sinopse': 'Sinopse ' * 300,
+    'vol_tx_elenco': 'Elenco',
+    'vol_tx_diretor': 'Diretor',
+    'vol_av_avaliacao': '5',
+    'vol_tp_genero': 'Ação',
+    'vol_nu_classificacao': '18'
+}
+
+@pytest.fixture
+def client():
+    title_cache.clear()
+    response_cache.clear()
+    return flask_app.test_client()
+
+def mock_db(mocker, fetchone=None, fetchall=None):
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.fetchone.return_value = fetchone
+    cursor_mock.fetchall.return_value = fetchall
+    conn_mock.cursor.return_value = cursor_mock
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+    return db_mock
+
+def test_etag_matches_any_encoding_variant():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", "abc-gzip"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+def test_negotiate_respects_q_zero():
+    assert negotiate('gzip, deflate') == 'gzip'
+    assert negotiate('gzip;q=0') is None
+    assert negotiate('') is None
+
+def test_conditional_compresses_once():
+    entry = EncodedBody(b'{"a":"' + b'x' * 4000 + b'"}', '"e1"')
+    status, body, headers = conditional(entry, None, 'gzip', min_size=1024)
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'] == '"e1-gzip"'
+    assert gzip.decompress(body) == entry.body
+    assert conditional(entry, None, 'gzip', min_size=1024)[1] is body
+
+    status, body, headers = conditional(entry, '"e1-gzip"', 'gzip', min_size=1024)
+    assert status == 304 and body == b''
+
+def test_version_map_bump_and_reset_change_etag():
+    versions = VersionMap('d', slots=8)
+    first = versions.etag(1)
+    assert versions.etag(1) == first
+    versions.bump(1)
+    bumped = versions.etag(1)
+    assert bumped != first
+    versions.reset()
+    assert versions.etag(1) != bumped
+    assert versions.etag(1, None, 20) != versions.etag(1, 5, 20)
+
+def test_detalhes_content_etag_304(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mock_db(mocker, fetchone=DETALHES)
+    headers = {'Authorization': 'Bearer valid_token'}
+
+    first = client.get('/detalhes/1', headers=headers)
+    assert first.status_code == 200
+    assert first.headers['ETag'] == content_etag(first.data)
+
+    second = client.get('/detalhes/1', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+
+def test_detalhes_gzip(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mock_db(mocker, fetchone=DETALHES)
+
+    response = client.get('/detalhes/1', headers={'Authorization': 'Bearer valid_token', 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['titulo'] == 'Titulo 1'
+
+def test_detalhes_version_etag_skips_db(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch.object(app_module.catalog_listener, 'connected', True)
+    mocker.patch('app.start_catalog_listener')
+    db_mock = mock_db(mocker, fetchone=DETALHES)
+    headers = {'Authorization': 'Bearer valid_token'}
+
+    etag = client.get('/detalhes/1', headers=headers).headers['ETag']
+    db_mock.reset_mock()
+    assert client.get('/detalhes/1', headers={**headers, 'If-None-Match': etag}).status_code == 304
+    db_mock.assert_not_called()
+
+    app_module.on_sys_volumes_changed('1')
+    response = client.get('/detalhes/1', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_title_change_invalidates_snapshot_first(mocker):
+    calls = mocker.MagicMock()
+    for name in ('catalog_snapshot', 'catalog_sampler', 'known_ids'):
+        calls.attach_mock(mocker.patch.object(getattr(app_module, name), 'invalidate'), name)
+    calls.attach_mock(mocker.patch.object(app_module.title_cache, 'invalidate'), 'title_cache')
+    calls.attach_mock(mocker.patch.object(app_module.busca_index, 'mark_dirty'), 'busca_index')
+    calls.attach_mock(mocker.patch.object(app_module.catalog_versions, 'bump'), 'catalog_versions')
+
+    app_module.on_sys_volumes_changed('4')
+    assert [call[0] for call in calls.mock_calls] == [
+        'catalog_snapshot', 'catalog_sampler', 'known_ids', 'title_cache', 'busca_index', 'catalog_versions']
+
+def test_historico_version_etag(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch.object(app_module.catalog_listener, 'connected', True)
+    mocker.patch('app.start_catalog_listener')
+    rows = [{'volr_co_reproducao': 3, 'volr_no_titulo': 'T', 'volr_tp_volume': 'F', 'volr_ep_temp': None}]
+    db_mock = mock_db(mocker, fetchall=rows)
+    headers = {'Authorization': 'Bearer valid_token'}
+
+    first = client.get('/historico/7?limite=10', headers=headers)
+    assert first.status_code == 200
+    assert first.json[0]['titulo'] == 'T'
+    db_mock.reset_mock()
+
+    assert client.get('/historico/7?limite=10', headers={**headers, 'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/historico/7?limite=10', headers=headers).json == first.json
+    db_mock.assert_not_called()
+
+    app_module.on_historico_changed('7')
+    client.get('/historico/7?limite=10', headers=headers)
+    db_mock.assert_called_once()
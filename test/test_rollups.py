@@ -0,0 +1,110 @@
+import json
+import pytest
+from datetime import datetime, timezone
+import app as app_module
+from app import app as flask_app
+from rollups import PlaybackRollup, Ranking, Rankings, hour_bucket
+
+class FakeDb:
+    def __init__(self, mocker, fail=False):
+        self.fail = fail
+        self.conn = mocker.MagicMock()
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        if self.fail:
+            raise RuntimeError('banco indisponível')
+        return self.conn
+
+    def __exit__(self, *exc):
+        return False
+
+def ranking_row(codigo, genero, score, posicao, posicao_genero):
+    return {'vol_co_volume': codigo, 'vol_no_volume': f'Titulo {codigo}', 'vol_tx_small_descricao': 'Desc',
+            'vol_tp_genero': genero, 'vol_tp_volume': 'F', 'reproducoes': int(score), 'score': score,
+            'posicao': posicao, 'posicao_genero': posicao_genero}
+
+TRENDING = [ranking_row(1, 'Drama', 9.5, 1, 1), ranking_row(2, 'Ação', 7.25, 2, 1), ranking_row(3, 'Drama', 3.0, 3, 2)]
+
+def test_hour_bucket():
+    assert hour_bucket(7200 + 1799.5) == datetime(1970, 1, 1, 2, tzinfo=timezone.utc)
+
+def test_rollup_coalesces_per_volume_and_hour(mocker):
+    execute_values = mocker.patch('rollups.execute_values')
+    now = [3600.0]
+    rollup = PlaybackRollup(FakeDb(mocker), clock=lambda: now[0])
+    rollup.add(5)
+    rollup.add(5)
+    rollup.add(9)
+    now[0] = 7300.0
+    rollup.add(5)
+
+    assert rollup.flush()
+    horas, totais = (call.args[2] for call in execute_values.call_args_list)
+    assert horas == [(5, hour_bucket(3600), 2), (5, hour_bucket(7200), 1), (9, hour_bucket(3600), 1)]
+    assert totais == [(5, 3), (9, 1)]
+    assert rollup.stats()['written'] == 4
+    execute_values.reset_mock()
+    assert rollup.flush()
+    execute_values.assert_not_called()
+
+def test_rollup_keeps_counts_on_failure(mocker):
+    mocker.patch('rollups.execute_values')
+    db = FakeDb(mocker, fail=True)
+    rollup = PlaybackRollup(db, clock=lambda: 3600.0)
+    rollup.add(5)
+    assert not rollup.flush()
+    rollup.add(5)
+    assert rollup.stats()['pending'] == 2
+
+    db.fail = False
+    assert rollup.flush()
+    assert rollup.stats() | {'last_flush_ms': 0} == {
+        'pending': 0, 'buckets': 0, 'received': 2, 'written': 2, 'batches': 1, 'failures': 1, 'last_flush_ms': 0}
+
+def test_ranking_body_by_genre_and_limit():
+    ranking = Ranking(1, TRENDING, [], [('Drama', 12)], '2026-01-01T00:00:00+00:00')
+    corpo = json.loads(ranking.body('trending', limite=2).body)
+    assert [t['codigo'] for t in corpo['titulos']] == [1, 2]
+    assert corpo['generos'] == [{'genero': 'Drama', 'reproducoes': 12}]
+    assert [t['codigo'] for t in json.loads(ranking.body('trending', 'DRAMA').body)['titulos']] == [1, 3]
+    assert ranking.body('trending', 'drama') is ranking.body('trending', 'Drama')
+    assert ranking.body('trending', 'nada') is ranking.body('trending', 'outro')
+    assert json.loads(ranking.body('top').body) == {'gerado_em': '2026-01-01T00:00:00+00:00', 'titulos': []}
+
+def test_catalogo_trending(mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    load = mocker.MagicMock(return_value=(TRENDING, [], [('Drama', 12)]))
+    mocker.patch.object(app_module, 'rankings', Rankings(load, refresh_interval=3600))
+    client = flask_app.test_client()
+    headers = {'Authorization': 'Bearer valid_token'}
+
+    response = client.get('/catalogo/trending?genero=acao&limite=5', headers=headers)
+    assert response.status_code == 200
+    assert response.json['titulos'] == []
+    response = client.get('/catalogo/trending?genero=Ação', headers=headers)
+    assert [t['codigo'] for t in response.json['titulos']] == [2]
+    assert client.get('/catalogo/trending?genero=Ação', headers={
+        **headers, 'If-None-Match': response.headers['ETag']}).status_code == 304
+    load.assert_called_once()
+    app_module.rankings.stop()
+
+def test_catalogo_trending_limite_invalido(mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    response = flask_app.test_client().get('/catalogo/top?limite=51', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 400
+
+def test_reproducao_conta_no_rollup(mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch.object(app_module, 'REPRODUCAO_MODO', 'sync')
+    add = mocker.patch.object(app_module.play_rollup, 'add')
+    mocker.patch.object(app_module.play_rollup, 'start')
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value.cursor.return_value.fetchone.return_value = (1,)
+
+    response = flask_app.test_client().post('/reproducao', json={'user_id': 1, 'titulo_id': 7},
+                                            headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 201
+    add.assert_called_once_with(7)
@@ -0,0 +1,40 @@
+from search_index import SearchIndex
+
+ROWS = [
+    (1, 'Os Vingadores', 'Heróis', 'Robert Downey', 'Joss Whedon', 'Ação', '12', 'F', 'A'),
+    (2, 'Vingança', 'Drama', 'Fulano', 'Beltrano', 'Drama', '16', 'F', 'A'),
+    (3, 'Série de Ação', 'Vingadores voltam', 'Ciclano', 'Beltrano', 'Ação', '12', 'S', 'A'),
+    (4, 'Inativo', 'Vingadores', 'Ninguém', 'Ninguém', 'Ação', '12', 'F', 'I')
+]
+
+def params(**kwargs):
+    base = {'q': None, 'genero': None, 'classificacao': None, 'tipo': None, 'limite': 20, 'offset': 0}
+    base.update(kwargs)
+    return base
+
+def make_index(rows):
+    return SearchIndex(lambda: list(rows), lambda ids: [r for r in rows if r[0] in ids])
+
+def test_index_ranks_title_matches_first():
+    index = make_index(ROWS)
+    _, rows = index.search(params(q='vingadores'))
+    assert [r[0] for r in rows] == [1, 3]
+
+def test_index_filters_with_bitsets():
+    index = make_index(ROWS)
+    _, rows = index.search(params(genero='acao', tipo='S'))
+    assert [r[0] for r in rows] == [3]
+    _, rows = index.search(params(classificacao='12', limite=1, offset=1))
+    assert [r[0] for r in rows] == [3]
+
+def test_index_incremental_refresh_bumps_generation():
+    rows = list(ROWS)
+    index = make_index(rows)
+    generation, _ = index.search(params(q='vinganca'))
+    rows[1] = (2, 'Outro Título', 'Drama', 'Fulano', 'Beltrano', 'Drama', '16', 'F', 'A')
+    index.mark_dirty(2)
+    index.refresh()
+    new_generation, found = index.search(params(q='vinganca'))
+    assert new_generation == generation + 1
+    assert found == []
+    assert [r[0] for r in index.search(params(q='outro'))[1]] == [2]
@@ -2,7 +2,8 @@ import pytest
 from app import app as flask_app
 
 @pytest.fixture
-def app():
+def app(mocker):
+    mocker.patch('app.init_firebase')
     yield flask_app
 
 @pytest.fixture
@@ -18,11 +19,11 @@ def test_signup_missing_data(client):
 def test_signup_success(client, mocker):
     mocker.patch('app.auth.create_user', return_value=type('obj', (object,), {'uid': '12345'}))
     mocker.patch('app.auth.create_custom_token', return_value=b'token123')
-    mocker.patch('app.connect_to_db')
     conn_mock = mocker.MagicMock()
     cursor_mock = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
 
     data = {'nome': 'Usuario Teste', 'email': 'usuario@teste.com', 'senha': '123456'}
     response = client.post('/signup', json=data)
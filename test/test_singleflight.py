@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+import pytest
+from app import app as flask_app, leituras, title_cache
+from metrics import Counter
+from singleflight import AsyncSingleFlight, SingleFlight, SingleFlightTimeout
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+def concurrent(flight, n, fn, key=1):
+    results = [None] * n
+    def worker(i):
+        try:
+            results[i] = flight.do('detalhes', key, fn)
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def test_concurrent_calls_share_one_execution():
+    counter = Counter('teste_singleflight_total', '', ('route', 'result'))
+    flight = SingleFlight(counter=counter)
+    release = threading.Event()
+    calls = []
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return b'corpo'
+
+    threads, results = concurrent(flight, 8, fn)
+    wait_until(lambda: flight.stats()['coalesced'] == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [b'corpo'] * 8
+    stats = flight.stats()
+    assert (stats['in_flight'], stats['executed'], stats['coalesced_ratio']) == (0, 1, 7 / 8)
+    assert counter.value('detalhes', 'coalesced') == 7
+
+    # Nada fica guardado: a próxima leitura vai de novo ao banco.
+    assert flight.do('detalhes', 1, fn) == b'corpo'
+    assert len(calls) == 2
+
+def test_error_reaches_all_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+    def fn():
+        release.wait(2)
+        raise RuntimeError('conexão perdida')
+
+    threads, results = concurrent(flight, 4, fn)
+    wait_until(lambda: flight.stats()['coalesced'] == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()['routes']['detalhes']['errors'] == 1
+
+def test_waiter_timeout():
+    flight = SingleFlight(timeout=0.01)
+    release = threading.Event()
+    threads, results = concurrent(flight, 1, lambda: release.wait(2) and 'ok')
+    wait_until(lambda: flight.stats()['in_flight'] == 1)
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do('detalhes', 1, lambda: 'outro')
+    assert flight.do('detalhes', 2, lambda: 'outro') == 'outro'
+    release.set()
+    threads[0].join()
+    assert results == ['ok']
+    assert flight.stats()['routes']['detalhes']['timeouts'] == 1
+
+def test_async_concurrent_calls_share_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b'corpo'
+
+    async def main():
+        return await asyncio.gather(*(flight.do('busca', 'k', fn) for _ in range(5)))
+
+    assert asyncio.run(main()) == [b'corpo'] * 5
+    assert len(calls) == 1
+    assert flight.stats()['routes']['busca'] == {'executed': 1, 'coalesced': 4, 'timeouts': 0, 'errors': 0}
+
+def test_async_leader_cancelled_others_still_get_result():
+    flight = AsyncSingleFlight(timeout=1)
+    async def fn():
+        await asyncio.sleep(0.02)
+        return 'ok'
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do('busca', 'k', fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('busca', 'k', fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == 'ok'
+
+def test_detalhes_concurrent_misses_hit_db_once(mocker):
+    title_cache.clear()
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    release = threading.Event()
+    def fetchone():
+        release.wait(2)
+        return {'vol_no_volume': 'Lançamento', 'vol_tx_sinopse': None, 'vol_tx_elenco': None, 'vol_tx_diretor': None,
+                'vol_av_avaliacao': None, 'vol_tp_genero': None, 'vol_nu_classificacao': None}
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value.cursor.return_value.fetchone.side_effect = fetchone
+    before = leituras.stats()['coalesced']
+
+    statuses = []
+    def request():
+        response = flask_app.test_client().get('/detalhes/77', headers={'Authorization': 'Bearer valid_token'})
+        statuses.append((response.status_code, response.json['titulo']))
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: leituras.stats()['coalesced'] - before == 5)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert statuses == [(200, 'Lançamento')] * 6
+    assert db_mock.call_count == 1
+
+def test_busca_timeout_returns_503(mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.BUSCA_MODO', 'sql')
+    mocker.patch.object(leituras, 'do', side_effect=SingleFlightTimeout('Tempo esgotado'))
+
+    response = flask_app.test_client().post('/busca', json={'q': 'matrix'}, headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 503
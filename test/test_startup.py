@@ -0,0 +1,53 @@
+import subprocess
+import sys
+import firebase_admin
+import pytest
+import app as app_module
+from app import app as flask_app
+
+@pytest.fixture
+def client():
+    return flask_app.test_client()
+
+def test_import_is_side_effect_free():
+    assert app_module._engine is None
+    assert app_module.db_pool.stats()['size'] == 0
+    assert not firebase_admin._apps
+
+def test_status_startup_reports_budget(client):
+    response = client.get('/status/startup')
+    assert response.status_code == 200
+    assert response.json['budget_ms'] == app_module.STARTUP_BUDGET_MS
+    assert response.json['import_ms'] is not None
+    assert response.json['warmup_ms'] is None
+
+def test_create_app_registers_routes_without_warmup(mocker):
+    warm_up = mocker.patch('app.warm_up')
+    other = app_module.create_app(warm=False)
+    assert other is not flask_app
+    assert other.test_client().get('/').status_code == 200
+    warm_up.assert_not_called()
+
+def test_warm_up_opens_dependencies(mocker):
+    init_firebase = mocker.patch('app.init_firebase')
+    pool_open = mocker.patch.object(app_module.db_pool, 'open')
+    sampler_ids = mocker.patch.object(app_module.catalog_sampler, 'ids')
+    mocker.patch('app.start_catalog_listener')
+    app_module.create_app(warm=True)
+    init_firebase.assert_called_once()
+    pool_open.assert_called_once()
+    sampler_ids.assert_called_once()
+    assert app_module.startup_stats['warmup_ms'] is not None
+    app_module.startup_stats['warmup_ms'] = None
+
+def test_migrate_command(mocker):
+    migrate = mocker.patch('app.migrate')
+    result = flask_app.test_cli_runner().invoke(args=['migrate'])
+    assert result.exit_code == 0
+    migrate.assert_called_once()
+
+def test_import_does_not_load_numpy():
+    # numpy/scipy só entram com as recomendações; no startup custam ~230 ms.
+    out = subprocess.run([sys.executable, '-c', "import sys, app; print('numpy' in sys.modules, 'scipy' in sys.modules)"],
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.split()[-2:] == ['False', 'False']
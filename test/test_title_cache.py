@@ -0,0 +1,38 @@
+from title_cache import TitleCache, LocalBackend
+
+def test_title_cache_evicts_by_bytes():
+    cache = TitleCache(max_bytes=10)
+    cache.set(1, b'12345')
+    cache.set(2, b'12345')
+    cache.get(1)
+    cache.set(3, b'12345')
+    assert cache.get(2) is None
+    assert cache.get(1) == b'12345'
+    assert cache.stats()['bytes'] == 10
+    assert cache.stats()['evictions'] == 1
+
+def test_title_cache_discards_set_after_invalidation():
+    cache = TitleCache()
+    generation = cache.generation()
+    cache.invalidate(1)
+    cache.set(1, b'velho', generation=generation)
+    assert cache.get(1) is None
+
+def test_title_cache_reads_through_shared_backend():
+    backend = LocalBackend()
+    TitleCache(backend=backend).set(1, b'{}')
+    other = TitleCache(backend=backend)
+    assert other.get(1) == b'{}'
+    assert other.stats()['backend_hits'] == 1
+    other.invalidate(1)
+    assert backend.get(1) is None
+
+def test_title_cache_expires_after_ttl():
+    now = [100.0]
+    cache = TitleCache(ttl=60, clock=lambda: now[0])
+    cache.set(1, b'{}')
+    now[0] += 59
+    assert cache.get(1) == b'{}'
+    now[0] += 1
+    assert cache.get(1) is None
+    assert (cache.stats()['expirations'], cache.stats()['bytes']) == (1, 0)
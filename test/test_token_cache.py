@@ -0,0 +1,62 @@
+import pytest
+from token_cache import TokenCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def make_verify(calls):
+    def verify(token, check_revoked):
+        calls.append((token, check_revoked))
+        return {'uid': 'uid-' + token, 'exp': 1100}
+    return verify
+
+def test_token_cache_hit_until_exp(clock):
+    calls = []
+    cache = TokenCache(make_verify(calls), clock=clock)
+    assert cache.verify('abc')['uid'] == 'uid-abc'
+    assert cache.verify('abc')['uid'] == 'uid-abc'
+    assert len(calls) == 1
+
+    clock.now = 1100
+    cache.verify('abc')
+    assert len(calls) == 2
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+def test_token_cache_evicts_lru(clock):
+    calls = []
+    cache = TokenCache(make_verify(calls), maxsize=2, clock=clock)
+    cache.verify('a')
+    cache.verify('b')
+    cache.verify('a')
+    cache.verify('c')
+    cache.verify('a')
+    assert [c[0] for c in calls] == ['a', 'b', 'c']
+    assert cache.stats()['evictions'] == 1
+
+def test_token_cache_revocation_interval(clock):
+    calls = []
+    cache = TokenCache(make_verify(calls), revocation_interval=30, clock=clock)
+    cache.verify('abc')
+    clock.now += 10
+    cache.verify('abc')
+    clock.now += 25
+    cache.verify('abc')
+    assert calls == [('abc', True), ('abc', True)]
+    assert cache.stats()['revalidations'] == 1
+
+def test_token_cache_does_not_store_failures(clock):
+    def verify(token, check_revoked):
+        raise ValueError('Token inválido')
+    cache = TokenCache(verify, clock=clock)
+    with pytest.raises(ValueError):
+        cache.verify('abc')
+    assert cache.stats()['size'] == 0
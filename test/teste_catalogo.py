@@ -13,10 +13,15 @@ def test_catalog_success(client, mocker):
     mocker.patch('app.verify_firebase_token', return_value='user_id_123')
     conn_mock = mocker.MagicMock()
     cursor_mock = mocker.MagicMock()
-    cursor_mock.fetchall.return_value = [('Titulo 1', 'Descricao 1'), ('Titulo 2', 'Descricao 2')]
+    cursor_mock.fetchall.return_value = [
+        {'vol_co_volume': 2, 'vol_no_volume': 'Titulo 2', 'vol_tx_small_descricao': 'Descricao 2'},
+        {'vol_co_volume': 1, 'vol_no_volume': 'Titulo 1', 'vol_tx_small_descricao': 'Descricao 1'}
+    ]
     cursor_mock.close = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+    mocker.patch('app.catalog_sampler.sample', return_value=[1, 2])
 
     response = client.get('/catalogo', headers={'Authorization': 'Bearer token'})
     assert response.status_code == 200
@@ -28,3 +33,13 @@ def test_catalog_unauthorized(client, mocker):
     response = client.get('/catalogo', headers={'Authorization': 'Bearer fake_token'})
     assert response.status_code == 401
     assert response.json == {'message': 'Token inválido'}
+
+def test_catalog_empty(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    mocker.patch('app.catalog_sampler.sample', return_value=[])
+    db_mock = mocker.patch('app.get_db')
+
+    response = client.get('/catalogo', headers={'Authorization': 'Bearer token'})
+    assert response.status_code == 200
+    assert response.json == []
+    db_mock.assert_not_called()
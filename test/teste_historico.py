@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime, timezone
 from app import app as flask_app
 
 @pytest.fixture
@@ -19,7 +20,8 @@ def test_historico_success(client, mocker):
     ]
     cursor_mock.close = mocker.MagicMock()
     conn_mock.cursor.return_value = cursor_mock
-    mocker.patch('app.connect_to_db', return_value=conn_mock)
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
 
     response = client.get('/historico/123', headers={'Authorization': 'Bearer valid_token'})
     assert response.status_code == 200
@@ -31,3 +33,49 @@ def test_historico_unauthorized(client, mocker):
     response = client.get('/historico/123', headers={'Authorization': 'Bearer fake_token'})
     assert response.status_code == 401
     assert response.json == {'message': 'Token inválido'}
+
+def test_historico_paginated(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.fetchall.return_value = [
+        {'volr_co_reproducao': 30, 'volr_dt_reproducao': datetime(2026, 5, 3, tzinfo=timezone.utc), 'volr_no_titulo': 'Filme A', 'volr_tp_volume': 'F', 'volr_ep_temp': None},
+        {'volr_co_reproducao': 20, 'volr_dt_reproducao': datetime(2026, 5, 2, tzinfo=timezone.utc), 'volr_no_titulo': 'Filme B', 'volr_tp_volume': 'F', 'volr_ep_temp': None},
+        {'volr_co_reproducao': 10, 'volr_dt_reproducao': datetime(2026, 5, 1, tzinfo=timezone.utc), 'volr_no_titulo': 'Filme C', 'volr_tp_volume': 'F', 'volr_ep_temp': None}
+    ]
+    conn_mock.cursor.return_value = cursor_mock
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+
+    response = client.get('/historico/123?limite=2', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert [item['titulo'] for item in response.json] == ['Filme A', 'Filme B']
+    cursor = response.headers['X-Proximo-Cursor']
+
+    client.get(f'/historico/123?limite=2&cursor={cursor}', headers={'Authorization': 'Bearer valid_token'})
+    assert cursor_mock.execute.call_args[0][1] == {
+        'usuario': 123, 'data': datetime(2026, 5, 2, tzinfo=timezone.utc), 'codigo': 20, 'limite': 3}
+
+def test_historico_invalid_cursor(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    response = client.get('/historico/123?cursor=invalido', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 400
+
+def test_historico_ndjson(client, mocker):
+    mocker.patch('app.verify_firebase_token', return_value='user_id_123')
+    conn_mock = mocker.MagicMock()
+    cursor_mock = mocker.MagicMock()
+    cursor_mock.__iter__.return_value = iter([
+        {'volr_no_titulo': 'Filme A', 'volr_tp_volume': 'F', 'volr_ep_temp': None},
+        {'volr_no_titulo': 'Série B', 'volr_tp_volume': 'S', 'volr_ep_temp': 'S01E01'}
+    ])
+    conn_mock.cursor.return_value = cursor_mock
+    db_mock = mocker.patch('app.get_db')
+    db_mock.return_value.__enter__.return_value = conn_mock
+
+    response = client.get('/historico/123?formato=ndjson', headers={'Authorization': 'Bearer valid_token'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    linhas = response.get_data(as_text=True).strip().split('\n')
+    assert len(linhas) == 2
+    assert conn_mock.cursor.call_args.kwargs['name'] == 'historico_export'
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalBackend:
+    """Substituto local de um cache compartilhado (mesma interface do RedisBackend)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    def __init__(self, url, prefix='detalhes:', ttl=3600):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        return self._client.get(self.prefix + str(key))
+
+    def set(self, key, value):
+        self._client.set(self.prefix + str(key), value, ex=self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + str(key))
+
+    def clear(self):
+        keys = list(self._client.scan_iter(self.prefix + '*'))
+        if keys:
+            self._client.delete(*keys)
+
+
+class TitleCache:
+    """LRU em processo de respostas JSON já serializadas, limitado por bytes.
+
+    As invalidações vêm do LISTEN/NOTIFY; o ttl limita quanto tempo um corpo
+    vive quando elas não chegam (listener desligado ou desconectado).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, backend=None, ttl=300.0, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= self._clock():
+                del self._entries[key]
+                self._bytes -= len(entry[0])
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            generation = self._generation
+
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.backend_hits += 1
+                self._store(key, value, generation)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, generation=None):
+        # Uma invalidação entre a leitura no banco e o set torna o valor obsoleto: descarta.
+        if generation is not None and generation != self._generation:
+            return
+        self._store(key, value, generation)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value)
+            except Exception:
+                pass
+
+    def _store(self, key, value, generation):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+        if self.backend is not None:
+            try:
+                self.backend.delete(key)
+            except Exception:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+        if self.backend is not None:
+            try:
+                self.backend.clear()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.backend_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'backend_hits': self.backend_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_ratio': (self.hits + self.backend_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """LRU de tokens já verificados, válido até o `exp` de cada token."""
+
+    def __init__(self, verify, maxsize=10000, revocation_interval=None, clock=time.time):
+        self._verify = verify
+        self.maxsize = maxsize
+        self.revocation_interval = revocation_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def verify(self, token):
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        now = self._clock()
+        revalidate = False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, expires_at, checked_at = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                elif self.revocation_interval is not None and now - checked_at >= self.revocation_interval:
+                    revalidate = True
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+            if revalidate:
+                self.revalidations += 1
+            else:
+                self.misses += 1
+
+        # A verificação completa acontece fora do lock para não serializar as requisições.
+        claims = self._verify(token, check_revoked=self.revocation_interval is not None)
+        expires_at = claims.get('exp')
+        if not expires_at:
+            return claims
+
+        with self._lock:
+            self._entries[key] = (claims, expires_at, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return claims
+
+    def lookup(self, token):
+        # Só consulta o cache, nunca verifica: usado pelo modo assíncrono antes de ir para uma thread.
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                return None
+            if self.revocation_interval is not None and now - entry[2] >= self.revocation_interval:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def invalidate(self, token):
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidations
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }